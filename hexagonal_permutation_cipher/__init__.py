@@ -1,6 +1,45 @@
-from .grid import create_hexagonal_grid, Matrix
-from .visualization import hex_coord, draw_hex, animate_permutation
-from .aes import aes_encrypt, aes_decrypt, encrypt_aes_block, decrypt_aes_block
-from .encryption import encrypt, decrypt
+from .grid import create_hexagonal_grid, Matrix, padding_overhead
+from .aes import (aes_encrypt, aes_decrypt, encrypt_aes_block, decrypt_aes_block, configure_pool, shutdown_pool,
+                  autotune_chunk_size)
+from .encryption import encrypt, decrypt, encrypt_bytes, decrypt_bytes, check_container
 from .utils import permute_grid, text_to_matrix
-from .benchmark import benchmark
\ No newline at end of file
+from .cache import configure_cache, cache_stats, clear_cache
+from .store import configure_permutation_store, get_permutation_store, PermutationStore
+from .feistel import FeistelPermutation
+from .cipher import HexCipher
+from .stream import encrypt_file, decrypt_file, encrypt_blocks, decrypt_blocks
+from .mmap_io import encrypt_file_mmap, decrypt_file_mmap
+from .bulk import encrypt_many, decrypt_many
+from .container import armor, dearmor, is_container, parse_header, ContainerHeader
+from .ranges import decrypt_range, CipherReader
+from .metrics import (enable_metrics, metrics_enabled, metrics_snapshot, reset_metrics, prometheus_text,
+                      add_metrics_listener, remove_metrics_listener)
+from .benchmark import benchmark
+
+# The visualization stack (pygame, pythreejs) and the asyncio API are only imported when one
+# of their names is first used, so the crypto path loads NumPy and pycryptodome only.
+_LAZY_ATTRIBUTES = {
+    'hex_coord': 'visualization',
+    'draw_hex': 'visualization',
+    'animate_permutation': 'visualization',
+    'export_animation': 'visualization',
+    'animate_permutation_3d': 'visualization_3d',
+    'encrypt_async': 'aio',
+    'decrypt_async': 'aio',
+    'encrypt_bytes_async': 'aio',
+    'decrypt_bytes_async': 'aio',
+    'encrypt_stream_async': 'aio',
+    'decrypt_stream_async': 'aio',
+}
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
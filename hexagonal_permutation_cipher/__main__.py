@@ -1,10 +1,20 @@
 import argparse
 import hashlib
+import io
+import itertools
+import json
 import logging
-from hexagonal_permutation_cipher.encryption import encrypt, decrypt
+import sys
+from typing import Optional
+from hexagonal_permutation_cipher.encryption import (encrypt, decrypt, derive_key, encrypt_text_payloads,
+                                                     decrypt_text_payloads)
 from hexagonal_permutation_cipher.grid import create_hexagonal_grid
-from hexagonal_permutation_cipher.visualization import animate_permutation
-from hexagonal_permutation_cipher.benchmark import benchmark
+from hexagonal_permutation_cipher.stream import encrypt_file, decrypt_file, check_block_size, DEFAULT_BLOCK_SIZE
+from hexagonal_permutation_cipher.mmap_io import encrypt_file_mmap, decrypt_file_mmap
+
+# Output buffer used by the batch mode, and the number of records permuted together
+BATCH_BUFFER_BYTES = 1024 * 1024
+BATCH_RECORDS = 1024
 
 def setup_logging():
     """
@@ -28,11 +38,28 @@ Usage Examples:
 2. Decrypt a message:
     hpc decrypt "ENCRYPTED_BASE64_TEXT" "mysecretkey"
 
-3. Visualize the permutation process:
+   Encrypt or decrypt one record per line (or JSONL records) from stdin to stdout:
+    hpc encrypt --batch "mysecretkey" < messages.txt > messages.enc
+    hpc decrypt --batch --jsonl --field body --workers 4 "mysecretkey" < records.jsonl
+
+3. Encrypt a file (or stdin/stdout with "-") in constant memory:
+    hpc encrypt-file secrets.tar secrets.tar.hpc "mysecretkey"
+    hpc decrypt-file secrets.tar.hpc - "mysecretkey" > secrets.tar
+
+4. Visualize the permutation process:
     hpc visualize 3 "mysecretkey"
 
-4. Run a benchmark test:
-    hpc benchmark
+   Render it without a display, to PNG frames or an animated GIF (requires Pillow):
+    hpc visualize 8 "mysecretkey" --export frames/ --workers 4
+    hpc visualize 8 "mysecretkey" --export permutation.gif --step 4
+
+5. Run a benchmark test, save it and check a later run against it:
+    hpc benchmark --max-size 256M --keys 1 --output baseline.json
+    hpc benchmark --compare baseline.json
+    hpc benchmark --startup --budget-ms 250
+
+6. Compare the padding overhead of the grid layouts:
+    hpc benchmark --overhead
     '''
     return examples
 
@@ -67,24 +94,114 @@ def parse_arguments():
 
     # Encryption command
     encrypt_parser = subparsers.add_parser("encrypt", help="Encrypt plaintext with a given key")
-    encrypt_parser.add_argument("plaintext", help="The plaintext to encrypt")
+    encrypt_parser.add_argument("plaintext", nargs="?", help="The plaintext to encrypt (omitted with --batch)")
     encrypt_parser.add_argument("key", help="The encryption key")
+    add_batch_arguments(encrypt_parser)
 
     # Decryption command
     decrypt_parser = subparsers.add_parser("decrypt", help="Decrypt ciphertext with a given key")
-    decrypt_parser.add_argument("ciphertext", help="The Base64 encoded ciphertext to decrypt")
+    decrypt_parser.add_argument("ciphertext", nargs="?",
+                                help="The Base64 encoded ciphertext to decrypt (omitted with --batch)")
     decrypt_parser.add_argument("key", help="The decryption key")
+    add_batch_arguments(decrypt_parser)
+
+    # Streaming file commands
+    encrypt_file_parser = subparsers.add_parser("encrypt-file", help="Encrypt a file or stdin as a stream of blocks")
+    encrypt_file_parser.add_argument("input", help="The file to encrypt, or - for stdin")
+    encrypt_file_parser.add_argument("output", help="The file to write, or - for stdout")
+    encrypt_file_parser.add_argument("key", help="The encryption key")
+    encrypt_file_parser.add_argument("--block-size", type=block_size_argument, default=DEFAULT_BLOCK_SIZE,
+                                     help="Plaintext bytes per block (default: %(default)s)")
+    encrypt_file_parser.add_argument("--mmap", action="store_true",
+                                     help="Memory-map local input and output files instead of streaming them")
+
+    decrypt_file_parser = subparsers.add_parser("decrypt-file", help="Decrypt a file or stdin produced by encrypt-file")
+    decrypt_file_parser.add_argument("input", help="The file to decrypt, or - for stdin")
+    decrypt_file_parser.add_argument("output", help="The file to write, or - for stdout")
+    decrypt_file_parser.add_argument("key", help="The decryption key")
+    decrypt_file_parser.add_argument("--mmap", action="store_true",
+                                     help="Memory-map local input and output files instead of streaming them")
 
     # Visualization command (including 3D option)
     visualize_parser = subparsers.add_parser("visualize", help="Visualize the hexagonal permutation process")
     visualize_parser.add_argument("size", type=int, help="Size of the hexagonal grid")
     visualize_parser.add_argument("key", help="The key used for permutation")
     visualize_parser.add_argument("--3d", action='store_true', help="Visualize in 3D")
+    visualize_parser.add_argument("--export", metavar="PATH",
+                                  help="Render headless to PNG frames in a directory, or to a .gif file")
+    visualize_parser.add_argument("--workers", type=int, default=None,
+                                  help="Worker processes for --export (default: CPU count)")
+    visualize_parser.add_argument("--step", type=int, default=1, help="Cells revealed per frame (default: 1)")
+    visualize_parser.add_argument("--fps", type=int, default=30, help="Frame rate of an exported GIF (default: 30)")
+    visualize_parser.add_argument("--no-noise", action='store_true', help="Leave the noise out of exported frames")
 
     # Benchmark command
-    subparsers.add_parser("benchmark", help="Run encryption and decryption benchmarks")
+    benchmark_parser = subparsers.add_parser("benchmark", help="Run encryption and decryption benchmarks")
+    # Defaults live in the benchmark module, which is only imported when the command runs
+    benchmark_parser.add_argument("--max-size", default="16M",
+                                  help="Largest payload size to run, e.g. 64K, 16M or 1G (default: 16M)")
+    benchmark_parser.add_argument("--keys", default="1,16",
+                                  help="Comma-separated numbers of distinct keys to cycle through (default: 1,16)")
+    benchmark_parser.add_argument("--repeats", type=int, help="Timed runs per measurement (default: 20)")
+    benchmark_parser.add_argument("--warmup", type=int, help="Untimed warmup runs per measurement (default: 3)")
+    benchmark_parser.add_argument("--output", help="Save the results as JSON to this file")
+    benchmark_parser.add_argument("--compare", metavar="BASELINE",
+                                  help="Compare with JSON results saved by --output and exit 1 on regressions")
+    benchmark_parser.add_argument("--threshold", type=float,
+                                  help="Relative p50 slowdown that counts as a regression (default: 0.10)")
+    benchmark_parser.add_argument("--overhead", action="store_true",
+                                  help="Report the padding and ciphertext overhead of each grid layout instead")
+    benchmark_parser.add_argument("--startup", action="store_true",
+                                  help="Measure the package import time against a budget instead")
+    benchmark_parser.add_argument("--budget-ms", type=float,
+                                  help="Import time budget for --startup in milliseconds (default: 250)")
+
+    args = parser.parse_args()
+    if args.command in ("encrypt", "decrypt"):
+        text = args.plaintext if args.command == "encrypt" else args.ciphertext
+        if args.batch and text is not None:
+            parser.error(f"{args.command} --batch reads its records from stdin, do not pass one as an argument")
+        if not args.batch and text is None:
+            parser.error(f"{args.command} needs a message, or --batch to read records from stdin")
+    return args
+
+def block_size_argument(text: str) -> int:
+    """
+    Parse and validate the --block-size option.
+
+    Args:
+        text (str): The option value.
+
+    Returns:
+        int: The block size in bytes.
+
+    Raises:
+        ArgumentTypeError: If the value is not a valid stream block size.
+    """
+    try:
+        block_size = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {text!r}") from None
+    try:
+        return check_block_size(block_size)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+def add_batch_arguments(subparser: argparse.ArgumentParser):
+    """
+    Add the stdin/stdout batch options shared by encrypt and decrypt.
 
-    return parser.parse_args()
+    Args:
+        subparser (ArgumentParser): The encrypt or decrypt parser.
+    """
+    subparser.add_argument("--batch", action="store_true",
+                           help="Read one record per line from stdin and write one result per line to stdout")
+    subparser.add_argument("--jsonl", action="store_true",
+                           help="With --batch, records are JSON lines: strings, or objects holding the text in --field")
+    subparser.add_argument("--field", default="text",
+                           help="With --jsonl, the object field to encrypt or decrypt in place (default: text)")
+    subparser.add_argument("--workers", type=int, default=1,
+                           help="With --batch, the number of worker processes (default: 1, in-process)")
 
 def handle_encrypt(plaintext: str, key: str):
     """
@@ -120,7 +237,162 @@ def handle_decrypt(ciphertext: str, key: str):
     except Exception as e:
         logging.error(f"Decryption failed: {e}")
 
-def handle_visualize(size: int, key: str, mode_3d: bool):
+def read_records(lines, jsonl: bool, field: str):
+    """
+    Parse batch input into (record, text) pairs.
+
+    Args:
+        lines (Iterable[str]): The input lines.
+        jsonl (bool): Parse every line as JSON instead of taking it verbatim.
+        field (str): The object field holding the text of JSON object records.
+
+    Yields:
+        tuple: The parsed record (None for plain lines) and the text to process.
+    """
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not jsonl:
+            yield None, line
+            continue
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield record, record[field] if isinstance(record, dict) else record
+
+def format_record(record, field: str, result: str) -> str:
+    """
+    Render one batch result as an output line.
+
+    Args:
+        record: The parsed JSON record, or None for plain lines.
+        field (str): The object field to replace in JSON object records.
+        result (str): The encrypted or decrypted text.
+
+    Returns:
+        str: The output line, without the newline.
+    """
+    if isinstance(record, dict):
+        record[field] = result
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    if record is not None:
+        return json.dumps(result, ensure_ascii=False)
+    return result
+
+def process_batches(texts, process, aes_key: bytes):
+    """
+    Encrypt or decrypt batch texts in groups of BATCH_RECORDS.
+
+    A group that fails is retried one record at a time, so every result before the bad record
+    is still yielded and the error raised is that record's own.
+
+    Args:
+        texts (Iterable[str]): The texts to process.
+        process (callable): encrypt_text_payloads or decrypt_text_payloads.
+        aes_key (bytes): The derived AES key.
+
+    Yields:
+        str: The results, in input order.
+    """
+    for batch in iter(lambda: list(itertools.islice(texts, BATCH_RECORDS)), []):
+        try:
+            results = process(batch, aes_key)
+        except Exception:
+            results = (process([text], aes_key)[0] for text in batch)
+        yield from results
+
+def handle_batch(command: str, key: str, jsonl: bool, field: str, workers: int):
+    """
+    Handle encrypting or decrypting one record per line from stdin to stdout.
+
+    Args:
+        command (str): 'encrypt' or 'decrypt'.
+        key (str): The encryption key.
+        jsonl (bool): Records are JSON lines.
+        field (str): The object field holding the text of JSON object records.
+        workers (int): The number of worker processes; 1 processes records in this process.
+    """
+    # Per-record logging would dominate the run time and interleave with the output
+    logging.getLogger().setLevel(logging.WARNING)
+    parse_errors = []
+
+    def parsed_records():
+        # Stop at the first malformed line, so the records before it are still processed
+        try:
+            yield from read_records(sys.stdin, jsonl, field)
+        except (ValueError, KeyError, TypeError) as e:
+            parse_errors.append(e)
+
+    records, texts = itertools.tee(parsed_records())
+    texts = (text for _, text in texts)
+    if workers > 1:
+        from hexagonal_permutation_cipher.bulk import encrypt_many, decrypt_many
+        results = (encrypt_many if command == "encrypt" else decrypt_many)(texts, key, max_workers=workers)
+    else:
+        aes_key = derive_key(key)
+        results = process_batches(texts, encrypt_text_payloads if command == "encrypt" else decrypt_text_payloads,
+                                  aes_key)
+
+    sys.stdout.flush()
+    output = io.open(sys.stdout.fileno(), "w", encoding="utf-8", buffering=BATCH_BUFFER_BYTES, closefd=False)
+    count = 0
+    try:
+        # Results first: zip stops at whichever runs out first, and a failing record raises from results
+        for result, (record, _) in zip(results, records):
+            output.write(format_record(record, field, result))
+            output.write("\n")
+            count += 1
+        if parse_errors:
+            raise ValueError(f"Invalid input record: {parse_errors[0]}")
+    except Exception as e:
+        logging.error(f"Batch {command} failed at record {count + 1}: {e}")
+        sys.exit(1)
+    finally:
+        output.flush()
+    logging.info(f"Batch {command} processed {count} records")
+
+def handle_encrypt_file(input_path: str, output_path: str, key: str, block_size: int, use_mmap: bool):
+    """
+    Handle streaming file encryption.
+
+    Args:
+        input_path (str): The file to encrypt, or - for stdin.
+        output_path (str): The file to write, or - for stdout.
+        key (str): The encryption key.
+        block_size (int): Plaintext bytes per block.
+        use_mmap (bool): Memory-map the files (local files only).
+    """
+    try:
+        logging.info(f"Encrypting {input_path} to {output_path}")
+        if use_mmap and '-' not in (input_path, output_path):
+            encrypt_file_mmap(input_path, output_path, key, block_size)
+        else:
+            encrypt_file(input_path, output_path, key, block_size)
+    except Exception as e:
+        logging.error(f"File encryption failed: {e}")
+        sys.exit(1)
+
+def handle_decrypt_file(input_path: str, output_path: str, key: str, use_mmap: bool):
+    """
+    Handle streaming file decryption.
+
+    Args:
+        input_path (str): The file to decrypt, or - for stdin.
+        output_path (str): The file to write, or - for stdout.
+        key (str): The decryption key.
+        use_mmap (bool): Memory-map the files (local files only).
+    """
+    try:
+        logging.info(f"Decrypting {input_path} to {output_path}")
+        if use_mmap and '-' not in (input_path, output_path):
+            decrypt_file_mmap(input_path, output_path, key)
+        else:
+            decrypt_file(input_path, output_path, key)
+    except Exception as e:
+        logging.error(f"File decryption failed: {e}")
+        sys.exit(1)
+
+def handle_visualize(size: int, key: str, mode_3d: bool, export: Optional[str] = None,
+                     workers: Optional[int] = None, step: int = 1, fps: int = 30, noise: bool = True):
     """
     Handle visualization logic for hexagonal permutation.
 
@@ -128,28 +400,58 @@ def handle_visualize(size: int, key: str, mode_3d: bool):
         size (int): Size of the hexagonal grid.
         key (str): The key used for permutation.
         mode_3d (bool): Enable 3D visualization if True.
+        export (str, optional): Render headless to this directory (PNG frames) or .gif file instead.
+        workers (int, optional): Worker processes for the export.
+        step (int): Cells revealed per frame.
+        fps (int): Frame rate of an exported GIF.
+        noise (bool): Include the noise in exported frames.
     """
     try:
         logging.info("Starting visualization process")
         grid = create_hexagonal_grid(size)
         aes_key = hashlib.sha256(key.encode()).digest()  # Potential issue with encoding
-        if mode_3d:
+        if export:
+            from hexagonal_permutation_cipher.visualization import export_animation, NOISE_AMOUNT
+            written = export_animation(grid, aes_key, export, noise=NOISE_AMOUNT if noise else 0, step=step,
+                                       fps=fps, max_workers=workers)
+            logging.info(f"Exported {len(written)} file(s) to {export}")
+        elif mode_3d:
             from hexagonal_permutation_cipher.visualization_3d import animate_permutation_3d
             animate_permutation_3d(size=size, key=aes_key)
         else:
-            animate_permutation(grid, aes_key)
+            from hexagonal_permutation_cipher.visualization import animate_permutation
+            animate_permutation(grid, aes_key, step=step)
     except Exception as e:
         logging.error(f"Visualization failed: {e}")
 
-def handle_benchmark():
+def handle_benchmark(args: argparse.Namespace):
     """
     Handle running benchmarks.
+
+    Args:
+        args (Namespace): The parsed benchmark arguments.
     """
+    from hexagonal_permutation_cipher.benchmark import (benchmark, check_startup, parse_size, print_overhead_report,
+                                                        IMPORT_BUDGET_MS)
+
     try:
         logging.info("Starting benchmark process")
-        benchmark()
+        if args.overhead:
+            print_overhead_report()
+            return
+        if args.startup:
+            problems = check_startup(args.budget_ms or IMPORT_BUDGET_MS)
+        else:
+            options = {name: value for name, value in (("repeats", args.repeats), ("warmup", args.warmup),
+                                                       ("threshold", args.threshold)) if value is not None}
+            key_counts = [int(count) for count in args.keys.split(",")]
+            problems = benchmark(parse_size(args.max_size), key_counts, output=args.output,
+                                 baseline=args.compare, **options)
     except Exception as e:
         logging.error(f"Benchmark failed: {e}")
+        sys.exit(1)
+    if problems:
+        sys.exit(1)
 
 def main():
     """
@@ -158,18 +460,27 @@ def main():
     setup_logging()
     args = parse_arguments()
 
-    if args.command == "encrypt":
+    if args.command in ("encrypt", "decrypt") and args.batch:
+        handle_batch(args.command, args.key, args.jsonl, args.field, args.workers)
+    elif args.command == "encrypt":
         logging.info("Encrypt command selected")
         handle_encrypt(args.plaintext, args.key)
     elif args.command == "decrypt":
         logging.info("Decrypt command selected")
         handle_decrypt(args.ciphertext, args.key)
+    elif args.command == "encrypt-file":
+        logging.info("Encrypt-file command selected")
+        handle_encrypt_file(args.input, args.output, args.key, args.block_size, args.mmap)
+    elif args.command == "decrypt-file":
+        logging.info("Decrypt-file command selected")
+        handle_decrypt_file(args.input, args.output, args.key, args.mmap)
     elif args.command == "visualize":
         logging.info("Visualize command selected")
-        handle_visualize(args.size, args.key, args._get_kwargs()[3][1])  # Checking for 3d argument
+        handle_visualize(args.size, args.key, getattr(args, '3d'), args.export, args.workers, args.step, args.fps,
+                         not args.no_noise)
     elif args.command == "benchmark":
         logging.info("Benchmark command selected")
-        handle_benchmark()
+        handle_benchmark(args)
     else:
         logging.error(f"Unknown command: {args.command}")
 
@@ -1,25 +1,62 @@
 from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
+from typing import NamedTuple, Optional, Sequence
+import atexit
 import concurrent.futures
+import os
+import threading
+import time
+from . import metrics
 
 # Constants for AES encryption
 AES_BLOCK_SIZE = 16
+DEFAULT_CHUNK_SIZE = AES_BLOCK_SIZE * 16  # Each chunk keeping consistent with block size
+PARALLEL_CHUNK_SIZE = 64 * 1024  # Default for CTR and GCM, whose chunks carry no per-chunk IV
+CIPHER_MODES = ('cbc', 'ctr', 'gcm')
+CTR_NONCE_SIZE = 16  # A random initial counter block per message, incremented per AES block
+GCM_NONCE_SIZE = 12  # A random nonce per message; chunk nonces are derived from it and the chunk index
+GCM_TAG_SIZE = 16
 
 def encrypt_aes_block(data: bytes, key: bytes) -> bytes:
     """
     Encrypt a block of data using AES encryption (CBC mode).
     
     Args:
-        data (bytes): The data to encrypt.
+        data (bytes): The data to encrypt (any bytes-like object, e.g. a memoryview).
         key (bytes): The encryption key.
 
     Returns:
         bytes: The encrypted data with IV prepended.
     """
     cipher = AES.new(key, AES.MODE_CBC)
-    encrypted_data = cipher.encrypt(pad(data, AES_BLOCK_SIZE))
+    # Encrypt the whole blocks straight from the buffer and only copy the tail for padding
+    aligned = len(data) - len(data) % AES_BLOCK_SIZE
+    encrypted_data = cipher.encrypt(data[:aligned]) if aligned else b''
+    encrypted_data += cipher.encrypt(pad(bytes(data[aligned:]), AES_BLOCK_SIZE))
     return cipher.iv + encrypted_data
 
+def encrypt_aes_block_into(data, key: bytes, out: memoryview) -> int:
+    """
+    Encrypt a block of data (CBC mode) straight into a preallocated buffer.
+
+    Args:
+        data (bytes-like): The data to encrypt.
+        key (bytes): The encryption key.
+        out (memoryview): A writable buffer of at least `encrypted_size(len(data))` bytes.
+
+    Returns:
+        int: The number of bytes written (IV followed by the encrypted data).
+    """
+    cipher = AES.new(key, AES.MODE_CBC)
+    out[:AES_BLOCK_SIZE] = cipher.iv
+    aligned = len(data) - len(data) % AES_BLOCK_SIZE
+    if aligned:
+        cipher.encrypt(data[:aligned], output=out[AES_BLOCK_SIZE:AES_BLOCK_SIZE + aligned])
+    start = AES_BLOCK_SIZE + aligned
+    cipher.encrypt(pad(bytes(data[aligned:]), AES_BLOCK_SIZE), output=out[start:start + AES_BLOCK_SIZE])
+    return start + AES_BLOCK_SIZE
+
 def decrypt_aes_block(encrypted_data: bytes, key: bytes) -> bytes:
     """
     Decrypt a block of AES-encrypted data (CBC mode).
@@ -36,43 +73,408 @@ def decrypt_aes_block(encrypted_data: bytes, key: bytes) -> bytes:
     cipher = AES.new(key, AES.MODE_CBC, iv)
     return unpad(cipher.decrypt(encrypted_part), AES_BLOCK_SIZE)
 
-def aes_encrypt(data: bytes, key: bytes) -> bytes:
+def check_chunk_size(chunk_size: int) -> int:
+    """
+    Validate a chunk size.
+
+    Args:
+        chunk_size (int): The number of plaintext bytes encrypted under each IV.
+
+    Returns:
+        int: The chunk size.
+
+    Raises:
+        ValueError: If the chunk size is not a positive multiple of the AES block size.
+    """
+    if chunk_size <= 0 or chunk_size % AES_BLOCK_SIZE:
+        raise ValueError(f"Chunk size must be a positive multiple of {AES_BLOCK_SIZE}, got {chunk_size}.")
+    return chunk_size
+
+def default_chunk_size(mode: str = 'cbc') -> int:
+    """
+    Return the chunk size used for a cipher mode when none is given.
+
+    Args:
+        mode (str): The cipher mode. Default is 'cbc'.
+
+    Returns:
+        int: DEFAULT_CHUNK_SIZE for CBC, PARALLEL_CHUNK_SIZE for CTR and GCM.
+    """
+    return DEFAULT_CHUNK_SIZE if mode == 'cbc' else PARALLEL_CHUNK_SIZE
+
+def encrypted_size(length: int, chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = 'cbc') -> int:
+    """
+    Compute the size of the output of `aes_encrypt` for data of a given length.
+
+    Args:
+        length (int): The plaintext length in bytes.
+        chunk_size (int): The chunk size used for encryption. Default is 256.
+        mode (str): The cipher mode. Default is 'cbc'.
+
+    Returns:
+        int: The encrypted length in bytes.
     """
-    Encrypt data using AES encryption (CBC mode) with parallelization.
+    if mode == 'ctr':
+        return CTR_NONCE_SIZE + length
+    if mode == 'gcm':
+        return GCM_NONCE_SIZE + length + GCM_TAG_SIZE * max(1, -(-length // chunk_size))
+    full_chunks, tail = divmod(length, chunk_size)
+    size = full_chunks * (2 * AES_BLOCK_SIZE + chunk_size)
+    if tail or not full_chunks:
+        size += 2 * AES_BLOCK_SIZE + tail - tail % AES_BLOCK_SIZE
+    return size
+
+def _encrypt_chunks(chunks: list, key: bytes) -> list:
+    # One pool task: encrypt a batch of chunks
+    return [encrypt_aes_block(chunk, key) for chunk in chunks]
+
+def _decrypt_chunks(chunks: list, key: bytes) -> list:
+    # One pool task: decrypt a batch of chunks
+    return [decrypt_aes_block(chunk, key) for chunk in chunks]
+
+def _split_tasks(chunks: list) -> list:
+    per_task = _pool_config.chunks_per_task
+    return [chunks[i:i + per_task] for i in range(0, len(chunks), per_task)]
+
+def _picklable(item):
+    # memoryviews cannot be pickled, send process workers bytes instead
+    if isinstance(item, memoryview):
+        return bytes(item)
+    if isinstance(item, tuple):
+        return tuple(_picklable(part) for part in item)
+    return item
+
+def _map_chunks(task, chunks: list, *args) -> list:
+    metrics.count('aes_chunks', len(chunks))
+    # Small payloads are processed inline; dispatching them costs more than the crypto
+    if len(chunks) <= _pool_config.chunks_per_task:
+        return task(chunks, *args)
+
+    tasks = _split_tasks(chunks)
+    if _pool_config.kind == 'process':
+        tasks = [[_picklable(chunk) for chunk in batch] for batch in tasks]
+
+    # Queue depth: tasks handed to the pool whose results have not been collected yet
+    metrics.count('pool_tasks', len(tasks))
+    metrics.adjust_gauge('pool_queue_depth', len(tasks))
+    results = []
+    executor = get_executor()
+    futures = [executor.submit(task, batch, *args) for batch in tasks]
+    collected = 0
+    try:
+        for future in futures:
+            results.extend(future.result())
+            collected += 1
+            metrics.adjust_gauge('pool_queue_depth', -1)
+    except BaseException:
+        # Cancelled tasks stay queued until a worker drops them; empty their batches so no
+        # slice of the caller's buffer (e.g. a memory map it is about to close) outlives the call
+        for future in futures:
+            future.cancel()
+        concurrent.futures.wait(futures)
+        for batch in tasks:
+            batch.clear()
+        raise
+    finally:
+        metrics.adjust_gauge('pool_queue_depth', collected - len(tasks))
+    return results
+
+def _ctr_chunks(chunks: list, key: bytes, nonce: bytes) -> list:
+    # One pool task: CTR is its own inverse, each chunk starts at its own offset from the initial counter
+    initial = int.from_bytes(nonce, 'big')
+    return [AES.new(key, AES.MODE_CTR, nonce=b'', initial_value=(initial + counter) % 2 ** 128).encrypt(chunk)
+            for counter, chunk in chunks]
+
+def _gcm_cipher(key: bytes, nonce: bytes, index: int, last: bool, associated_data: bytes):
+    # The GCM cipher of one chunk: its nonce is the message nonce XOR its index, and the final-chunk
+    # flag (so truncation is caught) and the caller's associated data are authenticated with it
+    chunk_nonce = (int.from_bytes(nonce, 'big') ^ index).to_bytes(GCM_NONCE_SIZE, 'big')
+    cipher = AES.new(key, AES.MODE_GCM, nonce=chunk_nonce)
+    cipher.update((b'\x01' if last else b'\x00') + associated_data)
+    return cipher
+
+def _gcm_encrypt_chunks(chunks: list, key: bytes, nonce: bytes, associated_data: bytes) -> list:
+    # One pool task: seal each chunk under its own nonce
+    results = []
+    for index, last, chunk in chunks:
+        encrypted_chunk, tag = _gcm_cipher(key, nonce, index, last, associated_data).encrypt_and_digest(chunk)
+        results.append(encrypted_chunk + tag)
+    return results
+
+def _gcm_decrypt_chunks(chunks: list, key: bytes, nonce: bytes, associated_data: bytes) -> list:
+    # One pool task: verify and open the chunks sealed by _gcm_encrypt_chunks
+    return [_gcm_cipher(key, nonce, index, last, associated_data).decrypt_and_verify(chunk[:-GCM_TAG_SIZE],
+                                                                                   chunk[-GCM_TAG_SIZE:])
+            for index, last, chunk in chunks]
+
+def aes_encrypt(data: bytes, key: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = 'cbc',
+                associated_data: bytes = b'') -> bytes:
+    """
+    Encrypt data using AES encryption with parallelization.
+
+    The data is split into chunks that are processed in parallel. In CBC mode every chunk is
+    a separate message with its own IV and padding; larger chunks mean fewer IVs and less
+    padding overhead, smaller chunks more parallelism. CTR and GCM use a single random nonce
+    for the whole payload and need no padding: CTR chunks start at their own offset from the
+    random 16-byte initial counter, GCM chunks are sealed under the 12-byte nonce XOR their
+    index and carry a 16-byte tag.
 
     Args:
-        data (bytes): The data to encrypt.
+        data (bytes): The data to encrypt (any bytes-like object, e.g. a memoryview).
         key (bytes): The encryption key.
+        chunk_size (int): Plaintext bytes per chunk, a multiple of 16. Default is 256.
+        mode (str): 'cbc', 'ctr' or 'gcm'. Default is 'cbc'.
+        associated_data (bytes): Data authenticated with every GCM chunk but not encrypted,
+            e.g. a container header. Ignored by CBC and CTR. Default is empty.
 
     Returns:
-        bytes: The IV followed by the encrypted data.
+        bytes: The encrypted data (CBC: IV and ciphertext per chunk; CTR: initial counter
+        followed by the ciphertext; GCM: nonce followed by ciphertext and tag per chunk).
     """
-    # Split data into chunks
-    chunk_size = AES_BLOCK_SIZE * 16  # Each chunk keeping consistent with block size
-    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    check_chunk_size(chunk_size)
+    view = memoryview(data)
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        encrypted_chunks = list(executor.map(encrypt_aes_block, chunks, [key] * len(chunks)))
+    if mode == 'ctr':
+        nonce = get_random_bytes(CTR_NONCE_SIZE)
+        chunks = [(i // AES_BLOCK_SIZE, view[i:i + chunk_size]) for i in range(0, len(view), chunk_size)]
+        return nonce + b''.join(_map_chunks(_ctr_chunks, chunks, key, nonce))
+    if mode == 'gcm':
+        nonce = get_random_bytes(GCM_NONCE_SIZE)
+        offsets = range(0, len(view), chunk_size) if len(view) else [0]
+        chunks = [(index, offset + chunk_size >= len(view), view[offset:offset + chunk_size])
+                  for index, offset in enumerate(offsets)]
+        return nonce + b''.join(_map_chunks(_gcm_encrypt_chunks, chunks, key, nonce, bytes(associated_data)))
+    if mode != 'cbc':
+        raise ValueError(f"Unknown cipher mode: {mode!r} (expected one of {', '.join(CIPHER_MODES)}).")
+
+    # Split data into chunks (views, not copies)
+    chunks = [view[i:i + chunk_size] for i in range(0, len(view), chunk_size)] or [view]
 
     # Combine the IV and encrypted chunks
-    return b''.join(encrypted_chunks)
+    return b''.join(_map_chunks(_encrypt_chunks, chunks, key))
 
-def aes_decrypt(encrypted_data: bytes, key: bytes) -> bytes:
+def aes_decrypt(encrypted_data: bytes, key: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = 'cbc',
+                associated_data: bytes = b'') -> bytes:
     """
-    Decrypt AES-encrypted data (CBC mode) with parallelization.
+    Decrypt AES-encrypted data with parallelization.
 
     Args:
-        encrypted_data (bytes): The encrypted data (IV followed by ciphertext).
+        encrypted_data (bytes): The encrypted data as produced by `aes_encrypt`.
         key (bytes): The decryption key.
+        chunk_size (int): The chunk size used for encryption. Default is 256.
+        mode (str): The mode used for encryption: 'cbc', 'ctr' or 'gcm'. Default is 'cbc'.
+        associated_data (bytes): The associated data passed to `aes_encrypt` (GCM only).
+            Default is empty.
 
     Returns:
         bytes: The decrypted data.
+
+    Raises:
+        ValueError: If GCM authentication fails.
     """
+    check_chunk_size(chunk_size)
+    view = memoryview(encrypted_data)
+
+    if mode == 'ctr':
+        nonce, body = view[:CTR_NONCE_SIZE], view[CTR_NONCE_SIZE:]
+        chunks = [(i // AES_BLOCK_SIZE, body[i:i + chunk_size]) for i in range(0, len(body), chunk_size)]
+        return b''.join(_map_chunks(_ctr_chunks, chunks, key, bytes(nonce)))
+    if mode == 'gcm':
+        nonce, body = bytes(view[:GCM_NONCE_SIZE]), view[GCM_NONCE_SIZE:]
+        stride = chunk_size + GCM_TAG_SIZE
+        offsets = range(0, len(body), stride)
+        chunks = [(index, offset + stride >= len(body), body[offset:offset + stride])
+                  for index, offset in enumerate(offsets)]
+        return b''.join(_map_chunks(_gcm_decrypt_chunks, chunks, key, nonce, bytes(associated_data)))
+    if mode != 'cbc':
+        raise ValueError(f"Unknown cipher mode: {mode!r} (expected one of {', '.join(CIPHER_MODES)}).")
+
     # Split encrypted data into chunks with IV
-    chunk_size = AES_BLOCK_SIZE * 17  # 16 bytes for IV + actual block size
-    chunks = [encrypted_data[i:i + chunk_size] for i in range(0, len(encrypted_data), chunk_size)]
+    stride = chunk_size + 2 * AES_BLOCK_SIZE  # 16 bytes for IV + chunk + 16 bytes of padding
+    chunks = [view[i:i + stride] for i in range(0, len(view), stride)]
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        decrypted_chunks = list(executor.map(decrypt_aes_block, chunks, [key] * len(chunks)))
+    return b''.join(_map_chunks(_decrypt_chunks, chunks, key))
+
+def aes_decrypt_chunks(encrypted_data: bytes, key: bytes, chunk_indices: Sequence[int], length: int,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, mode: str = 'cbc', associated_data: bytes = b'') -> list:
+    """
+    Decrypt only selected chunks of data encrypted by `aes_encrypt`.
+
+    Chunks are independent in every mode, so any chunk can be located from the fixed chunk
+    stride and decrypted on its own.
+
+    Args:
+        encrypted_data (bytes): The encrypted data as produced by `aes_encrypt`.
+        key (bytes): The decryption key.
+        chunk_indices (Sequence[int]): The chunks to decrypt.
+        length (int): The plaintext length of the whole payload.
+        chunk_size (int): The chunk size used for encryption. Default is 256.
+        mode (str): The mode used for encryption. Default is 'cbc'.
+        associated_data (bytes): The associated data passed to `aes_encrypt` (GCM only).
+            Default is empty.
+
+    Returns:
+        list: The decrypted chunks, in the order of chunk_indices.
+    """
+    check_chunk_size(chunk_size)
+    view = memoryview(encrypted_data)
+    last = max(0, -(-length // chunk_size) - 1)
+
+    if mode == 'ctr':
+        body = view[CTR_NONCE_SIZE:]
+        chunks = [(i * chunk_size // AES_BLOCK_SIZE, body[i * chunk_size:(i + 1) * chunk_size]) for i in chunk_indices]
+        return _map_chunks(_ctr_chunks, chunks, key, bytes(view[:CTR_NONCE_SIZE]))
+    if mode == 'gcm':
+        body = view[GCM_NONCE_SIZE:]
+        stride = chunk_size + GCM_TAG_SIZE
+        chunks = [(i, i == last, body[i * stride:(i + 1) * stride]) for i in chunk_indices]
+        return _map_chunks(_gcm_decrypt_chunks, chunks, key, bytes(view[:GCM_NONCE_SIZE]), bytes(associated_data))
+    if mode != 'cbc':
+        raise ValueError(f"Unknown cipher mode: {mode!r} (expected one of {', '.join(CIPHER_MODES)}).")
+
+    stride = chunk_size + 2 * AES_BLOCK_SIZE
+    return _map_chunks(_decrypt_chunks, [view[i * stride:(i + 1) * stride] for i in chunk_indices], key)
+
+def aes_encrypt_into(data, key: bytes, out: memoryview, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Encrypt data like `aes_encrypt`, writing the result into a preallocated buffer.
+
+    Args:
+        data (bytes-like): The data to encrypt.
+        key (bytes): The encryption key.
+        out (memoryview): A writable buffer of at least `encrypted_size(len(data), chunk_size)`
+            bytes, e.g. a slice of a memory-mapped file.
+        chunk_size (int): Plaintext bytes per chunk, a multiple of 16. Default is 256.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    view = memoryview(data)
+    if _pool_config.kind == 'process':
+        # Worker processes cannot write into our buffer, copy their results in instead
+        encrypted_data = aes_encrypt(view, key, chunk_size)
+        out[:len(encrypted_data)] = encrypted_data
+        return len(encrypted_data)
+
+    stride = check_chunk_size(chunk_size) + 2 * AES_BLOCK_SIZE
+    chunks = list(enumerate(range(0, len(view), chunk_size))) or [(0, 0)]
+
+    def encrypt_chunks_into(batch: list, key: bytes) -> list:
+        return [encrypt_aes_block_into(view[offset:offset + chunk_size], key, out[index * stride:])
+                for index, offset in batch]
+
+    return sum(_map_chunks(encrypt_chunks_into, chunks, key))
+
+def autotune_chunk_size(candidates: Sequence[int] = (256, 1024, 4096, 16384, 65536),
+                        sample_size: int = 4 * 1024 * 1024, repeats: int = 3) -> int:
+    """
+    Measure AES throughput for several chunk sizes on this machine and pick the fastest.
+
+    Args:
+        candidates (Sequence[int]): The chunk sizes to try, each a multiple of 16.
+        sample_size (int): The number of bytes encrypted per measurement. Default is 4 MiB.
+        repeats (int): Measurements per candidate; the best one counts. Default is 3.
+
+    Returns:
+        int: The chunk size with the highest encryption plus decryption throughput.
+    """
+    key = os.urandom(32)
+    sample = os.urandom(sample_size)
+    best_size, best_time = None, None
+
+    for chunk_size in candidates:
+        check_chunk_size(chunk_size)
+        aes_decrypt(aes_encrypt(sample[:chunk_size], key, chunk_size), key, chunk_size)  # Warm up
+        elapsed = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            aes_decrypt(aes_encrypt(sample, key, chunk_size), key, chunk_size)
+            elapsed.append(time.perf_counter() - start)
+        if best_time is None or min(elapsed) < best_time:
+            best_size, best_time = chunk_size, min(elapsed)
+
+    return best_size
+
+
+class PoolConfig(NamedTuple):
+    """
+    Settings of the worker pool shared by the AES functions.
+    """
+    max_workers: Optional[int]
+    kind: str
+    chunks_per_task: int
+
+
+# Persistent pool shared by aes_encrypt, aes_decrypt and aes_encrypt_into
+_pool_config = PoolConfig(max_workers=None, kind='thread', chunks_per_task=64)
+_pool_lock = threading.Lock()
+_executor = None
+
+def configure_pool(max_workers: Optional[int] = None, kind: Optional[str] = None,
+                   chunks_per_task: Optional[int] = None) -> PoolConfig:
+    """
+    Configure the worker pool used for AES chunk processing.
+
+    The running pool (if any) is shut down and a new one is started on next use.
+
+    Args:
+        max_workers (int, optional): The number of workers. Default is the CPU count.
+        kind (str, optional): 'thread' or 'process'.
+        chunks_per_task (int, optional): How many chunks each task handles. Payloads with
+            no more chunks than this are processed inline without the pool.
+
+    Returns:
+        PoolConfig: The new pool settings.
+    """
+    global _pool_config
+    if kind is not None and kind not in ('thread', 'process'):
+        raise ValueError(f"Unknown pool kind: {kind!r} (expected 'thread' or 'process').")
+    if chunks_per_task is not None and chunks_per_task < 1:
+        raise ValueError("chunks_per_task must be at least 1.")
+
+    shutdown_pool()
+    with _pool_lock:
+        _pool_config = PoolConfig(
+            max_workers=max_workers if max_workers is not None else _pool_config.max_workers,
+            kind=kind or _pool_config.kind,
+            chunks_per_task=chunks_per_task or _pool_config.chunks_per_task,
+        )
+        return _pool_config
+
+def pool_config() -> PoolConfig:
+    """
+    Return the current worker pool settings.
+
+    Returns:
+        PoolConfig: The pool settings.
+    """
+    return _pool_config
+
+def get_executor() -> concurrent.futures.Executor:
+    """
+    Return the shared worker pool, starting it on first use.
+
+    Returns:
+        concurrent.futures.Executor: The thread or process pool.
+    """
+    global _executor
+    with _pool_lock:
+        if _executor is None:
+            workers = _pool_config.max_workers or os.cpu_count() or 1
+            if _pool_config.kind == 'process':
+                _executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hpc-aes')
+        return _executor
+
+def shutdown_pool():
+    """
+    Shut down the shared worker pool, waiting for running tasks. Registered to run at exit.
+    """
+    global _executor
+    with _pool_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
 
-    return b''.join(decrypted_chunks)
\ No newline at end of file
+atexit.register(shutdown_pool)
@@ -0,0 +1,244 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import weakref
+from typing import Optional
+from .encryption import derive_key, encrypt_payload, decrypt_payload, encrypt_text_payload, decrypt_text_payload
+from .stream import (STREAM_HEADER, FRAME_HEADER, DEFAULT_BLOCK_SIZE, DEFAULT_STREAM_LAYOUT, pack_stream_header,
+                     parse_stream_header, encrypt_frame, decrypt_frame)
+
+# Requests smaller than this are batched with other concurrent requests into one executor job
+SMALL_REQUEST_BYTES = 64 * 1024
+MAX_BATCH_REQUESTS = 256
+BATCH_DELAY_SECONDS = 0.0005
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def set_async_executor(executor: Optional[concurrent.futures.Executor]):
+    """
+    Replace the executor the coroutines run their CPU work on.
+
+    Args:
+        executor (Executor, optional): The executor to use, or None to go back to the managed
+            thread pool.
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+def get_async_executor() -> concurrent.futures.Executor:
+    """
+    Return the executor the coroutines run their CPU work on, starting the managed pool on first use.
+
+    Returns:
+        concurrent.futures.Executor: The executor.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='hpc-async')
+        return _executor
+
+def _run_batch(requests: list) -> list:
+    # Runs on the executor: one outcome per request, so one bad request does not fail the batch
+    outcomes = []
+    for function, args in requests:
+        try:
+            outcomes.append((True, function(*args)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
+
+
+class _Batcher:
+    """
+    Collects small requests made on one event loop and runs them as a single executor job.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.requests = []
+        self.futures = []
+        self.handle = None
+
+    def submit(self, function, args: tuple) -> asyncio.Future:
+        future = self.loop.create_future()
+        self.requests.append((function, args))
+        self.futures.append(future)
+        if len(self.requests) >= MAX_BATCH_REQUESTS:
+            self.flush()
+        elif self.handle is None:
+            self.handle = self.loop.call_later(BATCH_DELAY_SECONDS, self.flush)
+        return future
+
+    def flush(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        requests, futures = self.requests, self.futures
+        self.requests, self.futures = [], []
+        if not requests:
+            return
+
+        try:
+            job = self.loop.run_in_executor(get_async_executor(), _run_batch, requests)
+        except Exception as e:
+            # flush runs as a loop callback, where an error would leave every request waiting forever
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        def resolve(job: asyncio.Future):
+            try:
+                outcomes = job.result()
+            except BaseException as e:
+                outcomes = [(False, e)] * len(futures)
+            for future, (ok, value) in zip(futures, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+        job.add_done_callback(resolve)
+
+
+_batchers = weakref.WeakKeyDictionary()
+
+async def _submit(function, size: int, *args):
+    loop = asyncio.get_event_loop()
+    if size > SMALL_REQUEST_BYTES:
+        return await loop.run_in_executor(get_async_executor(), function, *args)
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = _Batcher(loop)
+    return await batcher.submit(function, args)
+
+async def encrypt_async(text: str, key: str, **options) -> str:
+    """
+    Encrypt text without blocking the event loop.
+
+    Small concurrent requests are batched into a single executor job.
+
+    Args:
+        text (str): The plaintext to encrypt.
+        key (str): The encryption key.
+        **options: Options for `encrypt_payload`, e.g. container=True, mode='gcm'.
+
+    Returns:
+        str: The encrypted text (Base64 encoded).
+    """
+    return await _submit(functools.partial(encrypt_text_payload, **options), len(text), text, derive_key(key))
+
+async def decrypt_async(encrypted_text: str, key: str) -> str:
+    """
+    Decrypt text without blocking the event loop.
+
+    Args:
+        encrypted_text (str): The encrypted text (Base64 encoded).
+        key (str): The decryption key.
+
+    Returns:
+        str: The decrypted text.
+    """
+    return await _submit(decrypt_text_payload, len(encrypted_text), encrypted_text, derive_key(key))
+
+async def encrypt_bytes_async(data: bytes, key: str, **options) -> bytes:
+    """
+    Encrypt bytes without blocking the event loop.
+
+    Args:
+        data (bytes): The plaintext bytes.
+        key (str): The encryption key.
+        **options: Options for `encrypt_payload`, e.g. container=True, mode='gcm'.
+
+    Returns:
+        bytes: The raw encrypted data, or the container with container=True.
+    """
+    return await _submit(functools.partial(encrypt_payload, **options), len(data), data, derive_key(key))
+
+async def decrypt_bytes_async(encrypted_data: bytes, key: str) -> bytes:
+    """
+    Decrypt bytes without blocking the event loop.
+
+    Args:
+        encrypted_data (bytes): The raw encrypted data, or a container.
+        key (str): The decryption key.
+
+    Returns:
+        bytes: The decrypted bytes.
+    """
+    return await _submit(decrypt_payload, len(encrypted_data), encrypted_data, derive_key(key))
+
+async def _read_block(reader: asyncio.StreamReader, block_size: int) -> bytes:
+    try:
+        return await reader.readexactly(block_size)
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+async def encrypt_stream_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, key: str,
+                               block_size: int = DEFAULT_BLOCK_SIZE, layout: str = DEFAULT_STREAM_LAYOUT):
+    """
+    Encrypt everything read from a stream reader into a stream writer.
+
+    The output uses the `encrypt-file` stream format. Each block is encrypted on the executor
+    and the writer is drained after every frame, so a slow consumer applies backpressure.
+
+    Args:
+        reader (asyncio.StreamReader): The plaintext source.
+        writer (asyncio.StreamWriter): The ciphertext destination.
+        key (str): The encryption key.
+        block_size (int): The plaintext block size. Default is 1 MiB.
+        layout (str): The layout every block is permuted over. Default is 'partial'.
+
+    Raises:
+        ValueError: If the block size or layout is invalid.
+    """
+    header = pack_stream_header(block_size, layout)
+    loop = asyncio.get_event_loop()
+    aes_key = derive_key(key)
+    writer.write(header)
+
+    while True:
+        block = await _read_block(reader, block_size)
+        if not block:
+            break
+        writer.write(await loop.run_in_executor(get_async_executor(), encrypt_frame, block, aes_key, layout))
+        await writer.drain()
+
+    writer.write(FRAME_HEADER.pack(0, 0))
+    await writer.drain()
+
+async def decrypt_stream_async(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, key: str):
+    """
+    Decrypt an `encrypt-file` stream read from a stream reader into a stream writer.
+
+    Args:
+        reader (asyncio.StreamReader): The ciphertext source.
+        writer (asyncio.StreamWriter): The plaintext destination.
+        key (str): The decryption key.
+
+    Raises:
+        ValueError: If the stream header is invalid or the stream is truncated.
+    """
+    loop = asyncio.get_event_loop()
+    aes_key = derive_key(key)
+    try:
+        block_size, layout = parse_stream_header(await reader.readexactly(STREAM_HEADER.size))
+
+        while True:
+            plain_length, encrypted_length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+            if encrypted_length == 0:
+                break
+            if plain_length > block_size:
+                raise ValueError("Corrupt stream: frame is larger than the block size.")
+            encrypted_block = await reader.readexactly(encrypted_length)
+            writer.write(await loop.run_in_executor(get_async_executor(), decrypt_frame,
+                                                    plain_length, encrypted_block, aes_key, layout))
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        raise ValueError("Truncated stream: unexpected end of input.") from None
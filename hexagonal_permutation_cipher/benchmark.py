@@ -1,39 +1,452 @@
-import time
+import itertools
+import json
+import os
+import platform
 import statistics
-from .encryption import encrypt, decrypt
+import subprocess
+import sys
+import time
+from typing import Iterable, Optional
+import numpy as np
+from .aes import aes_encrypt, default_chunk_size, encrypted_size
+from .cache import grid_cache
+from .container import HEADER, armor
+from .encryption import derive_key, encrypt_bytes, decrypt_bytes, permute_payload
+from .grid import LAYOUTS, payload_cell_count, padding_overhead
+from .utils import permutation_indices
+
+# Payload sizes swept by `run_suite`, from 16 B to 1 GiB; `max_size` cuts the sweep short
+BENCHMARK_SIZES = (16, 256, 4096, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024, 256 * 1024 * 1024, 1024 * 1024 * 1024)
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+DEFAULT_KEY_COUNTS = (1, 16)
+DEFAULT_REPEATS = 20
+DEFAULT_WARMUP = 3
+REGRESSION_THRESHOLD = 0.10
+RESULTS_VERSION = 1
+
+# Payloads above this size get proportionally fewer repeats so large sweeps finish
+REPEAT_BUDGET_BYTES = 1024 * 1024
+
+# Options for payloads whose permutation table would not fit the cache: a partial layout and the
+# Feistel engine never materialize a table (a rect table for 1 GiB would need about 17 GB)
+LARGE_PAYLOAD_OPTIONS = {'layout': 'partial', 'permutation': 'feistel'}
+
+# Import-time budget for `check_startup`, and modules the crypto path must not pull in
+IMPORT_BUDGET_MS = 250
+STARTUP_RUNS = 5
+HEAVY_MODULES = ('pygame', 'pythreejs', 'IPython', 'asyncio')
+
+# Message sizes reported by `overhead_report`
+OVERHEAD_LENGTHS = (16, 100, 1000, 4096, 10000, 65536, 100000, 1024 * 1024)
+
+SIZE_SUFFIXES = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+def parse_size(text: str) -> int:
+    """
+    Parse a byte count such as '4096', '64K', '16M' or '1G'.
+
+    Args:
+        text (str): The size, with an optional binary suffix.
+
+    Returns:
+        int: The size in bytes.
+    """
+    text = text.strip().lower().rstrip('b')
+    if text and text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def format_size(size: int) -> str:
+    """
+    Format a byte count with the largest binary suffix that divides it.
+
+    Args:
+        size (int): The size in bytes.
+
+    Returns:
+        str: The formatted size, e.g. '64K'.
+    """
+    for suffix, factor in sorted(SIZE_SUFFIXES.items(), key=lambda item: -item[1]):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{suffix.upper()}"
+    return f"{size}B"
+
+def _time_ns(function, repeats: int, warmup: int) -> list:
+    # Warm caches and the pool first, then record one sample per run
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        function()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+def _summarize(samples: list, size: int) -> dict:
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'runs': len(samples),
+        'p50_ms': p50 / 1e6,
+        'p95_ms': p95 / 1e6,
+        'p99_ms': p99 / 1e6,
+        'mean_ms': statistics.mean(samples) / 1e6,
+        'mb_per_s': size / 1e6 / (p50 / 1e9) if p50 else float('inf'),
+    }
+
+def _repeats_for(size: int, repeats: int) -> int:
+    if size <= REPEAT_BUDGET_BYTES:
+        return repeats
+    return max(3, repeats * REPEAT_BUDGET_BYTES // size)
+
+def suite_options(size: int) -> dict:
+    """
+    Return the encryption options `run_suite` uses for a payload size.
+
+    Every payload is encrypted in a container, which permutes it and decrypts exactly; the
+    headerless 1.0.0 format skips the permutation. Payloads whose permutation table (8 bytes
+    per cell of the default rect layout) would not fit the permutation cache run with
+    LARGE_PAYLOAD_OPTIONS instead, so sweeps up to 1 GiB never build a table.
+
+    Args:
+        size (int): The payload size in bytes.
+
+    Returns:
+        dict: Options for `encrypt_bytes`.
+    """
+    if payload_cell_count(size) * np.dtype(np.int64).itemsize <= grid_cache.max_bytes:
+        return {'container': True}
+    return {'container': True, **LARGE_PAYLOAD_OPTIONS}
+
+def stage_breakdown(data: bytes, key: str, repeats: int = DEFAULT_REPEATS, warmup: int = DEFAULT_WARMUP,
+                    layout: str = 'rect', permutation: str = 'table') -> dict:
+    """
+    Time every stage of encrypting one payload on its own.
+
+    The stages are key derivation, permutation table (generating the key-derived permutation
+    of the grid cells, uncached; left out for the Feistel engine, which has no table),
+    permutation (padding the payload and permuting it), matrix conversion (turning text into
+    the byte payload), AES and Base64 armoring.
+
+    Args:
+        data (bytes): The payload.
+        key (str): The encryption key.
+        repeats (int): The number of timed runs per stage. Default is 20.
+        warmup (int): The number of untimed runs per stage. Default is 3.
+        layout (str): The layout, as for `encrypt_bytes`. Default is 'rect'.
+        permutation (str): The permutation engine, as for `encrypt_bytes`. Default is 'table'.
+
+    Returns:
+        dict: The p50 time of every stage in milliseconds, keyed by stage name.
+    """
+    aes_key = derive_key(key)
+    cells = payload_cell_count(len(data), layout)
+    text = data.decode('latin-1')
+    permuted = memoryview(permute_payload(data, aes_key, layout, permutation))
+    encrypted = aes_encrypt(permuted, aes_key)
+
+    stages = {'key_derivation': lambda: derive_key(key)}
+    if permutation == 'table':
+        stages['permutation_table'] = lambda: permutation_indices(cells, aes_key, use_cache=False)
+    stages.update({
+        'permutation': lambda: permute_payload(data, aes_key, layout, permutation),
+        'matrix_conversion': lambda: text.encode('latin-1'),
+        'aes': lambda: aes_encrypt(permuted, aes_key),
+        'base64': lambda: armor(encrypted),
+    })
+    return {name: float(np.percentile(_time_ns(function, repeats, warmup), 50)) / 1e6
+            for name, function in stages.items()}
+
+def run_suite(sizes: Iterable[int] = BENCHMARK_SIZES, max_size: int = DEFAULT_MAX_SIZE,
+              key_counts: Iterable[int] = DEFAULT_KEY_COUNTS, repeats: int = DEFAULT_REPEATS,
+              warmup: int = DEFAULT_WARMUP, stages: bool = True) -> dict:
+    """
+    Measure encryption and decryption throughput across payload sizes and key counts.
+
+    Every (size, key count) pair encrypts and decrypts random payloads, cycling through that
+    many distinct keys so multi-key workloads exercise the permutation cache. Decrypted
+    payloads are checked against the originals. Sizes whose permutation table would not fit
+    the cache run with the options of `suite_options`, recorded in their results.
+
+    Args:
+        sizes (Iterable[int]): The payload sizes in bytes. Default is 16 B to 1 GiB.
+        max_size (int): Skip sizes above this. Default is 16 MiB.
+        key_counts (Iterable[int]): The numbers of distinct keys to cycle through. Default is (1, 16).
+        repeats (int): The number of timed runs per measurement; sizes above 1 MiB get
+            proportionally fewer, but at least 3. Default is 20.
+        warmup (int): The number of untimed runs per measurement. Default is 3.
+        stages (bool): Also time the individual stages once per size. Default is True.
+
+    Returns:
+        dict: The results, ready to be saved with `save_results`.
+    """
+    results = []
+    for size in sizes:
+        if size > max_size:
+            continue
+        data = os.urandom(size)
+        runs = _repeats_for(size, repeats)
+        options = suite_options(size)
+        for key_count in key_counts:
+            keys = [f"benchmark-key-{index}" for index in range(key_count)]
+            ciphertexts = [encrypt_bytes(data, key, **options) for key in keys]
+            for key, ciphertext in zip(keys, ciphertexts):
+                if decrypt_bytes(ciphertext, key) != data:
+                    raise ValueError("Decryption failed, original and decrypted data do not match.")
+
+            operations = {
+                'encrypt': lambda index: encrypt_bytes(data, keys[index], **options),
+                'decrypt': lambda index: decrypt_bytes(ciphertexts[index], keys[index]),
+            }
+            for operation, function in operations.items():
+                counter = itertools.count()
+                samples = _time_ns(lambda: function(next(counter) % key_count), runs, warmup)
+                result = {'size': size, 'keys': key_count, 'operation': operation, 'options': options}
+                result.update(_summarize(samples, size))
+                results.append(result)
+
+        if stages:
+            results.append({'size': size, 'keys': 1, 'operation': 'stages', 'options': options,
+                            'stages_ms': stage_breakdown(data, 'benchmark-key-0', runs, warmup,
+                                                          options.get('layout', 'rect'),
+                                                          options.get('permutation', 'table'))})
+
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
 
-def benchmark():
+def save_results(results: dict, path: str):
     """
-    Run benchmark tests for encryption and decryption.
+    Write suite results as JSON.
+
+    Args:
+        results (dict): The output of `run_suite`.
+        path (str): The file to write.
+    """
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2)
+
+def load_results(path: str) -> dict:
+    """
+    Read suite results written by `save_results`.
+
+    Args:
+        path (str): The file to read.
+
+    Returns:
+        dict: The results.
+
+    Raises:
+        ValueError: If the file is not a supported results file.
+    """
+    with open(path) as handle:
+        results = json.load(handle)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version in {path}.")
+    return results
+
+def compare_results(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """
+    Find measurements that got slower than a stored baseline.
+
+    Args:
+        current (dict): The results of the current run.
+        baseline (dict): The baseline results.
+        threshold (float): The relative p50 slowdown that counts as a regression. Default is 0.10.
+
+    Returns:
+        list: One dict per regression with the size, key count, operation, both p50 times in
+        milliseconds and the relative change, worst first.
+    """
+    reference = {(row['size'], row['keys'], row['operation']): row
+                 for row in baseline['results'] if 'p50_ms' in row}
+    regressions = []
+    for row in current['results']:
+        old = reference.get((row['size'], row['keys'], row['operation']))
+        if old is None or 'p50_ms' not in row or not old['p50_ms'] or old.get('options') != row.get('options'):
+            continue  # Nothing comparable, e.g. the baseline ran with other options
+        change = row['p50_ms'] / old['p50_ms'] - 1
+        if change > threshold:
+            regressions.append({'size': row['size'], 'keys': row['keys'], 'operation': row['operation'],
+                                'baseline_p50_ms': old['p50_ms'], 'p50_ms': row['p50_ms'], 'change': change})
+    return sorted(regressions, key=lambda regression: -regression['change'])
+
+def print_results(results: dict):
     """
-    test_cases = [
-        ("Short text", "ShortKey"),
-        ("This is a longer unique and even longer test!", "MediumKey"),
-        ("This is a much longer text to test the performance of the encryption and decryption algorithms over a significant amount of data.", "AnotherKey"),
-        (" " * 1000, "LongKeyInfiniteText"),
-    ]
+    Print suite results as throughput and stage tables.
 
-    for plain_text, key in test_cases:
-        encryption_times = []
-        decryption_times = []
+    Args:
+        results (dict): The output of `run_suite`.
+    """
+    print(f"{'Size':>6} {'Keys':>5} {'Op':>8} {'Runs':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'MB/s':>9}")
+    for row in results['results']:
+        if 'p50_ms' in row:
+            print(f"{format_size(row['size']):>6} {row['keys']:>5} {row['operation']:>8} {row['runs']:>5} "
+                  f"{row['p50_ms']:>10.3f} {row['p95_ms']:>10.3f} {row['p99_ms']:>10.3f} {row['mb_per_s']:>9.1f}")
 
-        for _ in range(10):  # Run each test case 10 times
-            start_time = time.time()
-            encrypted_text = encrypt(plain_text, key)
-            encryption_times.append(time.time() - start_time)
+    stage_rows = [row for row in results['results'] if 'stages_ms' in row]
+    if stage_rows:
+        names = list(dict.fromkeys(name for row in stage_rows for name in row['stages_ms']))
+        print()
+        print(f"{'Size':>6} " + " ".join(f"{name:>17}" for name in names) + "   (p50 ms per stage)")
+        for row in stage_rows:
+            print(f"{format_size(row['size']):>6} " + " ".join(
+                f"{row['stages_ms'][name]:>17.4f}" if name in row['stages_ms'] else f"{'-':>17}" for name in names))
 
-            start_time = time.time()
-            decrypted_text = decrypt(encrypted_text, key)
-            decryption_times.append(time.time() - start_time)
+def print_regressions(regressions: list, threshold: float = REGRESSION_THRESHOLD):
+    """
+    Print the output of `compare_results`.
 
-            if plain_text != decrypted_text:
-                print(f"Original: {plain_text}")
-                print(f"Decrypted: {decrypted_text}")
-                raise ValueError("Decryption failed, original and decrypted text do not match.")
+    Args:
+        regressions (list): The regressions.
+        threshold (float): The threshold used for the comparison. Default is 0.10.
+    """
+    if not regressions:
+        print(f"No regressions above {threshold:.0%} against the baseline.")
+        return
+    print(f"{len(regressions)} regression(s) above {threshold:.0%}:")
+    for regression in regressions:
+        print(f"  {format_size(regression['size']):>6} keys={regression['keys']:<3} {regression['operation']:<8} "
+              f"{regression['baseline_p50_ms']:.3f} ms -> {regression['p50_ms']:.3f} ms "
+              f"(+{regression['change']:.1%})")
+
+def benchmark(max_size: int = DEFAULT_MAX_SIZE, key_counts: Iterable[int] = DEFAULT_KEY_COUNTS,
+              repeats: int = DEFAULT_REPEATS, warmup: int = DEFAULT_WARMUP, output: Optional[str] = None,
+              baseline: Optional[str] = None, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """
+    Run the benchmark suite, print it and optionally save it or compare it with a baseline.
+
+    Args:
+        max_size (int): The largest payload size to run. Default is 16 MiB.
+        key_counts (Iterable[int]): The numbers of distinct keys to cycle through. Default is (1, 16).
+        repeats (int): The number of timed runs per measurement. Default is 20.
+        warmup (int): The number of untimed runs per measurement. Default is 3.
+        output (str, optional): Save the results as JSON to this file.
+        baseline (str, optional): Compare the results with the JSON results in this file.
+        threshold (float): The relative p50 slowdown that counts as a regression. Default is 0.10.
+
+    Returns:
+        list: The regressions found against the baseline (empty without one).
+    """
+    results = run_suite(max_size=max_size, key_counts=key_counts, repeats=repeats, warmup=warmup)
+    print_results(results)
+    if output:
+        save_results(results, output)
+        print(f"Results saved to {output}")
 
-        avg_encryption_time = statistics.mean(encryption_times)
-        avg_decryption_time = statistics.mean(decryption_times)
+    regressions = []
+    if baseline:
+        regressions = compare_results(results, load_results(baseline), threshold)
+        print()
+        print_regressions(regressions, threshold)
+    return regressions
 
-        print(f"Test case: {plain_text[:30]}... with key {key}")
-        print(f"  Average encryption time: {avg_encryption_time:.6f} seconds")
-        print(f"  Average decryption time: {avg_decryption_time:.6f} seconds")
\ No newline at end of file
+def measure_import_time(module: str = 'hexagonal_permutation_cipher', runs: int = STARTUP_RUNS) -> dict:
+    """
+    Measure how long a fresh interpreter takes to import a module.
+
+    Every run starts a new interpreter, so nothing is cached in sys.modules.
+
+    Args:
+        module (str): The module to import. Default is the package itself.
+        runs (int): The number of interpreters to start. Default is 5.
+
+    Returns:
+        dict: The p50/min/max import time in milliseconds and the heavy modules that the
+        import loaded.
+    """
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter_ns()\n"
+        f"import {module}\n"
+        "print(time.perf_counter_ns() - start)\n"
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+    )
+    # Import the same copy of the package as the running interpreter
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+
+    samples, heavy = [], set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                env=env).stdout.splitlines()
+        samples.append(int(output[0]))
+        heavy.update(name for name in output[1].split(',') if name)
+    return {
+        'module': module,
+        'runs': runs,
+        'p50_ms': float(np.percentile(samples, 50)) / 1e6,
+        'min_ms': min(samples) / 1e6,
+        'max_ms': max(samples) / 1e6,
+        'heavy_modules': sorted(heavy),
+    }
+
+def check_startup(budget_ms: float = IMPORT_BUDGET_MS, runs: int = STARTUP_RUNS) -> list:
+    """
+    Check the package import time against a budget and print the outcome.
+
+    Args:
+        budget_ms (float): The largest acceptable p50 import time in milliseconds. Default is 250.
+        runs (int): The number of interpreters to start. Default is 5.
+
+    Returns:
+        list: The problems found: a blown budget and/or heavy modules loaded on import.
+    """
+    result = measure_import_time(runs=runs)
+    print(f"Import of {result['module']}: p50 {result['p50_ms']:.1f} ms "
+          f"(min {result['min_ms']:.1f} ms, max {result['max_ms']:.1f} ms, {result['runs']} runs)")
+
+    problems = []
+    if result['p50_ms'] > budget_ms:
+        problems.append(f"import time {result['p50_ms']:.1f} ms exceeds the budget of {budget_ms:.0f} ms")
+    if result['heavy_modules']:
+        problems.append(f"import loads {', '.join(result['heavy_modules'])}")
+    for problem in problems:
+        print(f"  FAIL: {problem}")
+    if not problems:
+        print(f"  OK: within the budget of {budget_ms:.0f} ms")
+    return problems
+
+def overhead_report(lengths=OVERHEAD_LENGTHS, mode: str = 'cbc') -> list:
+    """
+    Measure how much padding and ciphertext every layout adds per message size.
+
+    Args:
+        lengths (Iterable[int]): The message sizes in bytes. Default is OVERHEAD_LENGTHS.
+        mode (str): The cipher mode used to size the ciphertext, with the chunk size `encrypt_bytes`
+            uses for it. Default is 'cbc'.
+
+    Returns:
+        list: One dict per (length, layout) with the permuted cell count, the padding overhead
+        and the container size in bytes.
+    """
+    chunk_size = default_chunk_size(mode)
+    report = []
+    for length in lengths:
+        for layout in LAYOUTS:
+            cells = payload_cell_count(length, layout)
+            report.append({
+                'length': length,
+                'layout': layout,
+                'cells': cells,
+                'padding_overhead': padding_overhead(length, layout),
+                'ciphertext_bytes': HEADER.size + encrypted_size(cells, chunk_size, mode),
+            })
+    return report
+
+def print_overhead_report(lengths=OVERHEAD_LENGTHS, mode: str = 'cbc'):
+    """
+    Print `overhead_report` as a table.
+
+    Args:
+        lengths (Iterable[int]): The message sizes in bytes. Default is OVERHEAD_LENGTHS.
+        mode (str): The cipher mode used to size the ciphertext. Default is 'cbc'.
+    """
+    print(f"{'Length':>10} {'Layout':>8} {'Cells':>10} {'Padding':>9} {'Ciphertext':>11} {'Expansion':>10}")
+    for row in overhead_report(lengths, mode):
+        expansion = row['ciphertext_bytes'] / row['length'] if row['length'] else float('nan')
+        print(f"{row['length']:>10} {row['layout']:>8} {row['cells']:>10} {row['padding_overhead']:>8.1%} "
+              f"{row['ciphertext_bytes']:>11} {expansion:>9.2f}x")
@@ -0,0 +1,133 @@
+import collections
+import concurrent.futures
+import itertools
+import os
+import time
+from typing import Iterable, Iterator, Optional, Union
+from .encryption import (derive_key, encrypt_payloads, decrypt_payloads, encrypt_text_payloads,
+                         decrypt_text_payloads)
+
+# Adaptive batching bounds: batches grow or shrink so each one takes about TARGET_BATCH_SECONDS
+INITIAL_BATCH_SIZE = 16
+MAX_BATCH_SIZE = 16384
+TARGET_BATCH_SECONDS = 0.05
+
+Record = Union[str, bytes]
+
+def _split_by_type(records: list, text_task, bytes_task) -> list:
+    # Run str and bytes records through their batch functions and merge them back in order
+    texts = [index for index, record in enumerate(records) if isinstance(record, str)]
+    if len(texts) == len(records):
+        return text_task(records)
+    if not texts:
+        return bytes_task(records)
+    results = [None] * len(records)
+    others = [index for index, record in enumerate(records) if not isinstance(record, str)]
+    for indices, task in ((texts, text_task), (others, bytes_task)):
+        for index, result in zip(indices, task([records[index] for index in indices])):
+            results[index] = result
+    return results
+
+def _encrypt_batch(records: list, aes_key: bytes, options: dict) -> tuple:
+    # Runs in a worker process: str records become Base64 text, bytes records stay raw
+    start = time.perf_counter()
+    results = _split_by_type(records, lambda texts: encrypt_text_payloads(texts, aes_key, **options),
+                             lambda payloads: encrypt_payloads(payloads, aes_key, **options))
+    return results, time.perf_counter() - start
+
+def _decrypt_batch(records: list, aes_key: bytes, options: dict) -> tuple:
+    # Runs in a worker process: str records are Base64 text, bytes records are raw ciphertext
+    start = time.perf_counter()
+    results = _split_by_type(records, lambda texts: decrypt_text_payloads(texts, aes_key),
+                             lambda payloads: decrypt_payloads(payloads, aes_key))
+    return results, time.perf_counter() - start
+
+def _next_batch_size(batch_size: int, elapsed: float) -> int:
+    if elapsed < TARGET_BATCH_SECONDS / 2:
+        return min(batch_size * 2, MAX_BATCH_SIZE)
+    if elapsed > TARGET_BATCH_SECONDS * 2:
+        return max(batch_size // 2, 1)
+    return batch_size
+
+def _map_records(task, records: Iterable[Record], key: str, max_workers: Optional[int],
+                 executor: Optional[concurrent.futures.Executor], options: dict) -> Iterator[Record]:
+    aes_key = derive_key(key)
+    workers = max_workers or os.cpu_count() or 1
+    owned = executor is None
+    if owned:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+    source = iter(records)
+    pending = collections.deque()
+    batch_size = INITIAL_BATCH_SIZE
+    try:
+        while True:
+            # Keep a bounded number of batches in flight so memory stays flat
+            while len(pending) < 2 * workers:
+                batch = list(itertools.islice(source, batch_size))
+                if not batch:
+                    break
+                pending.append((batch, executor.submit(task, batch, aes_key, options)))
+            if not pending:
+                return
+
+            batch, future = pending.popleft()
+            try:
+                results, elapsed = future.result()
+            except Exception:
+                # Retry one record at a time, so the records before a bad one are still yielded and
+                # the error raised is the bad record's own
+                for record in batch:
+                    yield task([record], aes_key, options)[0][0]
+                continue
+            batch_size = _next_batch_size(batch_size, elapsed)
+            yield from results
+    finally:
+        for _, future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown(wait=True)
+
+def encrypt_many(records: Iterable[Record], key: str, max_workers: Optional[int] = None,
+                 executor: Optional[concurrent.futures.Executor] = None, **options) -> Iterator[Record]:
+    """
+    Encrypt many independent records across a process pool.
+
+    Records are consumed lazily and sent to the workers in batches whose size adapts to how
+    long each batch takes. Results are yielded in input order.
+
+    Args:
+        records (Iterable[str | bytes]): The records. str records are encrypted like `encrypt`
+            (Base64 output), bytes records like `encrypt_bytes` (raw output).
+        key (str): The encryption key.
+        max_workers (int, optional): The number of worker processes. Default is the CPU count.
+        executor (Executor, optional): An existing pool to use instead of starting one.
+        **options: Options for `encrypt_payload`, e.g. container=True, mode='gcm'.
+
+    Yields:
+        str | bytes: The encrypted records, in input order.
+
+    Raises:
+        ValueError: If a record cannot be encrypted, after every record before it was yielded.
+    """
+    return _map_records(_encrypt_batch, records, key, max_workers, executor, options)
+
+def decrypt_many(records: Iterable[Record], key: str, max_workers: Optional[int] = None,
+                 executor: Optional[concurrent.futures.Executor] = None) -> Iterator[Record]:
+    """
+    Decrypt many independent records across a process pool.
+
+    Args:
+        records (Iterable[str | bytes]): The encrypted records. str records are decrypted like
+            `decrypt` (Base64 input), bytes records like `decrypt_bytes` (raw input).
+        key (str): The decryption key.
+        max_workers (int, optional): The number of worker processes. Default is the CPU count.
+        executor (Executor, optional): An existing pool to use instead of starting one.
+
+    Yields:
+        str | bytes: The decrypted records, in input order.
+
+    Raises:
+        ValueError: If a record cannot be decrypted, after every record before it was yielded.
+    """
+    return _map_records(_decrypt_batch, records, key, max_workers, executor, {})
@@ -0,0 +1,186 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+import numpy as np
+
+# Default limits for the shared permutation cache
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CacheStats(NamedTuple):
+    """
+    A snapshot of the counters of an `LRUCache`.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+def value_nbytes(value: Any) -> int:
+    """
+    Estimate the memory held by a cached value.
+
+    Args:
+        value (Any): A numpy array, or a tuple of numpy arrays.
+
+    Returns:
+        int: The number of bytes held by the arrays in the value.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(value_nbytes(item) for item in value)
+    return 0
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded by entry count and byte size.
+
+    Attributes:
+    ----------
+    max_entries : int
+        The maximum number of entries kept in the cache.
+    max_bytes : int
+        The maximum number of bytes (as reported by `value_nbytes`) kept in the cache.
+    enabled : bool
+        When False, lookups always miss and nothing is stored.
+    hits, misses, evictions : int
+        Counters updated on every lookup and eviction.
+
+    Methods:
+    -------
+    get_or_create(key: Hashable, factory: Callable[[], Any]) -> Any
+        Return the cached value for key, creating and storing it on a miss.
+    configure(max_entries: int, max_bytes: int, enabled: bool)
+        Change the limits, evicting entries that no longer fit.
+    stats() -> CacheStats
+        Return a snapshot of the cache counters.
+    clear()
+        Drop every entry and reset the counters.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for a key, creating and storing it on a miss.
+
+        Args:
+            key (Hashable): The cache key.
+            factory (Callable[[], Any]): Builds the value when it is not cached.
+
+        Returns:
+            Any: The cached or newly created value.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # Build outside the lock so slow factories do not serialize other lookups
+        value = factory()
+        if not self.enabled:
+            return value
+
+        nbytes = value_nbytes(value)
+        with self._lock:
+            if nbytes > self.max_bytes or key in self._entries:
+                return value
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            self._evict()
+        return value
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                  enabled: Optional[bool] = None):
+        """
+        Change the cache limits, evicting entries that no longer fit.
+
+        Args:
+            max_entries (int, optional): The new maximum entry count.
+            max_bytes (int, optional): The new maximum byte size.
+            enabled (bool, optional): Enable or disable the cache. Disabling it drops every entry.
+        """
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if enabled is not None:
+                self.enabled = enabled
+            if not self.enabled:
+                self._entries.clear()
+                self._bytes = 0
+            self._evict()
+
+    def stats(self) -> CacheStats:
+        """
+        Return a snapshot of the cache counters.
+
+        Returns:
+            CacheStats: The hit, miss and eviction counters with the current entry count and size.
+        """
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self._bytes)
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+
+# Cache shared by encrypt, decrypt and permute_grid
+grid_cache = LRUCache()
+
+def configure_cache(max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                    enabled: Optional[bool] = None):
+    """
+    Configure the shared permutation cache.
+
+    Args:
+        max_entries (int, optional): The maximum number of cached permutation tables.
+        max_bytes (int, optional): The maximum memory held by the cache.
+        enabled (bool, optional): Enable or disable caching.
+    """
+    grid_cache.configure(max_entries=max_entries, max_bytes=max_bytes, enabled=enabled)
+
+def cache_stats() -> CacheStats:
+    """
+    Return the counters of the shared permutation cache.
+
+    Returns:
+        CacheStats: The current cache counters.
+    """
+    return grid_cache.stats()
+
+def clear_cache():
+    """
+    Empty the shared permutation cache.
+    """
+    grid_cache.clear()
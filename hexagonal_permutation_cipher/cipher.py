@@ -0,0 +1,107 @@
+from typing import Optional
+from .encryption import (derive_key, encrypt_payload, decrypt_payload, encrypt_text_payload, decrypt_text_payload,
+                         _check_options)
+
+
+class HexCipher:
+    """
+    A reusable cipher context holding the key material derived from a user key.
+
+    Deriving the key once lets request handlers keep one instance per key instead of
+    hashing the key on every call. Grids and permutations for each message size are
+    shared through the grid cache.
+
+    Attributes:
+    ----------
+    aes_key : bytes
+        The AES key (and permutation seed) derived from the user key.
+    container : bool
+        Whether encrypt and encrypt_bytes permute the payload and wrap their output in a binary
+        container; by default they write the headerless, unpermuted 1.0.0 format.
+    chunk_size : int
+        Plaintext bytes per AES chunk, resolved to the mode's default when not given (requires
+        container=True when not the default).
+    mode : str
+        The AES mode, 'cbc', 'ctr' or 'gcm' (requires container=True when not 'cbc').
+    layout : str
+        The cell layout, 'rect', 'dense' or 'partial' (requires container=True when not 'rect').
+    permutation : str
+        The permutation engine, 'table' or 'feistel' (requires container=True when not 'table').
+
+    Methods:
+    -------
+    encrypt(text: str) -> str
+        Encrypt text to Base64 encoded ciphertext.
+    decrypt(encrypted_text: str) -> str
+        Decrypt Base64 encoded ciphertext to text.
+    encrypt_bytes(data: bytes) -> bytes
+        Encrypt bytes to raw ciphertext.
+    decrypt_bytes(encrypted_data: bytes) -> bytes
+        Decrypt raw ciphertext to bytes.
+    """
+
+    __slots__ = ('aes_key', 'container', 'chunk_size', 'mode', 'layout', 'permutation')
+
+    def __init__(self, key: str, container: bool = False, chunk_size: Optional[int] = None, mode: str = 'cbc',
+                 layout: str = 'rect', permutation: str = 'table'):
+        # Reject bad options here rather than on the first message
+        self.chunk_size = _check_options(container, chunk_size, mode, layout, permutation)
+        self.aes_key = derive_key(key)
+        self.container = container
+        self.mode = mode
+        self.layout = layout
+        self.permutation = permutation
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(<key {self.aes_key[:4].hex()}...>)"
+
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """
+        Encrypt bytes using hexagonal permutation and AES encryption.
+
+        Args:
+            data (bytes): The plaintext bytes (any bytes-like object).
+
+        Returns:
+            bytes: The raw encrypted data, or the container with container=True.
+        """
+        return encrypt_payload(data, self.aes_key, self.container, self.chunk_size, self.mode, self.layout,
+                               self.permutation)
+
+    def decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """
+        Decrypt bytes encrypted with `encrypt_bytes`.
+
+        Args:
+            encrypted_data (bytes): The raw encrypted data, or a container.
+
+        Returns:
+            bytes: The decrypted bytes (exact for containers, with the trailing grid padding
+            removed for headerless ciphertext).
+        """
+        return decrypt_payload(encrypted_data, self.aes_key)
+
+    def encrypt(self, text: str) -> str:
+        """
+        Encrypt text using hexagonal permutation and AES encryption.
+
+        Args:
+            text (str): The plaintext to encrypt.
+
+        Returns:
+            str: The encrypted text (Base64 encoded).
+        """
+        return encrypt_text_payload(text, self.aes_key, container=self.container, chunk_size=self.chunk_size,
+                                    mode=self.mode, layout=self.layout, permutation=self.permutation)
+
+    def decrypt(self, encrypted_text: str) -> str:
+        """
+        Decrypt text encrypted using hexagonal permutation and AES encryption.
+
+        Args:
+            encrypted_text (str): The encrypted text (Base64 encoded).
+
+        Returns:
+            str: The decrypted text.
+        """
+        return decrypt_text_payload(encrypted_text, self.aes_key)
@@ -0,0 +1,107 @@
+import base64
+import struct
+from typing import NamedTuple
+
+# Binary container: a fixed header describing how the payload was encrypted, followed by the
+# AES output. The header lets decrypt size its buffers up front and restore the exact length.
+CONTAINER_MAGIC = b'HPC'
+CONTAINER_VERSION = 1
+
+# Cipher modes
+MODE_CBC = 1
+MODE_CTR = 2
+MODE_GCM = 3
+MODE_IDS = {'cbc': MODE_CBC, 'ctr': MODE_CTR, 'gcm': MODE_GCM}
+MODE_NAMES = {mode_id: name for name, mode_id in MODE_IDS.items()}
+
+# Header flags
+FLAG_DENSE = 0x01  # Payload spread over the real hexagon cells only
+FLAG_PARTIAL = 0x02  # Payload fills the hexagon up to a partial outer ring, without padding
+FLAG_FEISTEL = 0x04  # Cells permuted by the on-demand Feistel bijection instead of a table
+LAYOUT_MASK = FLAG_DENSE | FLAG_PARTIAL
+KNOWN_FLAGS = LAYOUT_MASK | FLAG_FEISTEL
+LAYOUT_FLAGS = {'rect': 0, 'dense': FLAG_DENSE, 'partial': FLAG_PARTIAL}
+PERMUTATION_FLAGS = {'table': 0, 'feistel': FLAG_FEISTEL}
+
+HEADER = struct.Struct('>3sBBBIIQ')  # magic, version, mode, flags, grid size, chunk size, original length
+
+
+class ContainerHeader(NamedTuple):
+    """
+    The header of a binary ciphertext container.
+    """
+    mode: int
+    flags: int
+    grid_size: int
+    chunk_size: int
+    length: int
+    version: int = CONTAINER_VERSION
+
+
+def pack_header(header: ContainerHeader) -> bytes:
+    """
+    Serialize a container header.
+
+    Args:
+        header (ContainerHeader): The header to serialize.
+
+    Returns:
+        bytes: The packed header.
+    """
+    return HEADER.pack(CONTAINER_MAGIC, header.version, header.mode, header.flags,
+                       header.grid_size, header.chunk_size, header.length)
+
+def is_container(data) -> bool:
+    """
+    Check whether data starts with a container header.
+
+    Args:
+        data (bytes-like): The ciphertext.
+
+    Returns:
+        bool: True if the data carries the container magic and a supported version.
+    """
+    return (len(data) >= HEADER.size and bytes(data[:len(CONTAINER_MAGIC)]) == CONTAINER_MAGIC
+            and data[len(CONTAINER_MAGIC)] == CONTAINER_VERSION)
+
+def parse_header(data) -> ContainerHeader:
+    """
+    Parse the header at the start of a container.
+
+    Args:
+        data (bytes-like): The container.
+
+    Returns:
+        ContainerHeader: The parsed header.
+
+    Raises:
+        ValueError: If the data is not a container of a supported version.
+    """
+    if not is_container(data):
+        raise ValueError("Not an HPC ciphertext container (bad header).")
+    _, version, mode, flags, grid_size, chunk_size, length = HEADER.unpack_from(data, 0)
+    return ContainerHeader(mode, flags, grid_size, chunk_size, length, version)
+
+def armor(data: bytes) -> str:
+    """
+    Encode ciphertext as Base64 text for safe transmission.
+
+    Args:
+        data (bytes): The raw ciphertext or container.
+
+    Returns:
+        str: The Base64 encoded data.
+    """
+    return base64.b64encode(data).decode('utf-8')
+
+def dearmor(text: str) -> bytes:
+    """
+    Decode Base64 armored ciphertext.
+
+    Args:
+        text (str): The Base64 encoded data.
+
+    Returns:
+        bytes: The raw ciphertext or container.
+    """
+    return base64.b64decode(text)
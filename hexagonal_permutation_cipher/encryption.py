@@ -1,102 +1,563 @@
 from hashlib import sha256
-import base64
-import math
+from typing import Optional, Sequence
 import numpy as np  # Import the numpy library
-from .grid import create_hexagonal_grid, text_to_matrix, Matrix
-from .aes import aes_encrypt, aes_decrypt
+from .grid import layout_cell_count, payload_cell_count, grid_size_for, grid_size_from_cells, LAYOUTS
+from .aes import aes_encrypt, aes_decrypt, check_chunk_size, default_chunk_size, encrypted_size, DEFAULT_CHUNK_SIZE
+from .container import (ContainerHeader, HEADER, MODE_IDS, MODE_NAMES, LAYOUT_FLAGS, LAYOUT_MASK, KNOWN_FLAGS,
+                        PERMUTATION_FLAGS, FLAG_FEISTEL, pack_header, parse_header, is_container, armor, dearmor)
+from .cache import grid_cache
+from .feistel import FeistelPermutation, permute_blocks, unpermute_blocks
+from .utils import permute_grid, permutation_indices
+from . import metrics
 
-def permute_grid(grid: np.ndarray, key: bytes) -> np.ndarray:
+# Byte used to pad the payload up to the grid's cell count (an ASCII space)
+PAD_BYTE = 0x20
+
+# Permutation engines: a precomputed index table, or the on-demand Feistel bijection
+PERMUTATIONS = ('table', 'feistel')
+
+def derive_key(key: str) -> bytes:
     """
-    Permute the hexagonal grid using a key.
+    Derive the AES key (and permutation seed) from a user key.
 
     Args:
-        grid (np.ndarray): The original hexagonal grid.
-        key (bytes): The key used for permutation.
+        key (str): The user-provided key.
 
     Returns:
-        np.ndarray: The permuted hexagonal grid.
+        bytes: The 32-byte SHA-256 digest of the key.
     """
-    matrix = Matrix(grid)
-    flat_grid = matrix.flat
-    size = len(flat_grid)
+    with metrics.stage('key_derivation'):
+        return sha256(key.encode()).digest()
 
-    # Create a random number generator with the provided key as seed
-    seed = int.from_bytes(key, byteorder='big')
-    rng = np.random.default_rng(seed)
+def permute_payload(data, aes_key: bytes, layout: str = 'rect', permutation: str = 'table') -> np.ndarray:
+    """
+    Pad a payload to its grid's cell count and permute it.
 
-    # Generate permuted indices for the flat grid
-    permuted_indices = rng.permutation(size)
-    
-    # Create a new flat grid with permuted values
-    permuted_flat_grid = flat_grid[permuted_indices]
+    Args:
+        data (bytes-like): The payload to permute.
+        aes_key (bytes): The derived key used for permutation.
+        layout (str): 'rect' spreads the payload over the grid's bounding rectangle, 'dense'
+            only over its real hexagon cells (about half the padding) and 'partial' over as
+            many cells as it has bytes. Default is 'rect'.
+        permutation (str): 'table' gathers through the cached permutation table, 'feistel'
+            computes the permutation block by block without materializing it. Default is 'table'.
 
-    # Convert the flat permuted grid back to 2D numpy array representation
-    return matrix.to_2d(permuted_flat_grid)
+    Returns:
+        np.ndarray: The permuted payload as a uint8 array.
+    """
+    with metrics.stage('permutation'):
+        payload = np.frombuffer(data, dtype=np.uint8)
+        cells = payload_cell_count(len(payload), layout)
 
-def encrypt(text: str, key: str) -> str:
+        padded = np.full(cells, PAD_BYTE, dtype=np.uint8)
+        padded[:len(payload)] = payload
+        if permutation == 'feistel':
+            return permute_blocks(padded, FeistelPermutation(cells, aes_key))
+        return padded[permutation_indices(cells, aes_key)]
+
+def unpermute_payload(data, aes_key: bytes, layout: str = 'rect', permutation: str = 'table') -> np.ndarray:
     """
-    Encrypt text using hexagonal permutation and AES encryption.
+    Undo `permute_payload`, keeping the padding in place.
 
     Args:
-        text (str): The plaintext to encrypt.
+        data (bytes-like): The permuted payload.
+        aes_key (bytes): The derived key used for permutation.
+        layout (str): The layout used by `permute_payload`. Default is 'rect'.
+        permutation (str): The permutation engine used by `permute_payload`. Default is 'table'.
+
+    Returns:
+        np.ndarray: The padded payload in its original order as a uint8 array.
+    """
+    permuted = np.frombuffer(data, dtype=np.uint8)
+    cells = len(permuted)
+    if layout == 'rect':
+        grid_size_from_cells(cells)  # Reject payloads that do not fill a grid
+
+    with metrics.stage('permutation'):
+        if permutation == 'feistel':
+            return unpermute_blocks(permuted, FeistelPermutation(cells, aes_key))
+        padded = np.empty(cells, dtype=np.uint8)
+        padded[permutation_indices(cells, aes_key)] = permuted
+        return padded
+
+def pad_payload(data) -> np.ndarray:
+    """
+    Pad a payload to its rect grid's cell count without permuting it.
+
+    This is the headerless format of 1.0.0, which only used the grid to size the padding.
+
+    Args:
+        data (bytes-like): The payload to pad.
+
+    Returns:
+        np.ndarray: The padded payload as a uint8 array.
+    """
+    payload = np.frombuffer(data, dtype=np.uint8)
+    padded = np.full(payload_cell_count(len(payload)), PAD_BYTE, dtype=np.uint8)
+    padded[:len(payload)] = payload
+    return padded
+
+def encrypt_payload(data, aes_key: bytes, container: bool = False, chunk_size: Optional[int] = None,
+                    mode: str = 'cbc', layout: str = 'rect', permutation: str = 'table') -> bytes:
+    """
+    Permute and AES-encrypt a payload with an already derived key.
+
+    Args:
+        data (bytes-like): The plaintext bytes.
+        aes_key (bytes): The derived key.
+        container (bool): Permute the payload and prefix the ciphertext with a container header
+            recording the grid size, chunk size, cipher mode and original length, so decryption
+            is exact. Without a container the payload is only padded, not permuted, and
+            AES-encrypted in the headerless format of 1.0.0, which 1.0.0 can still read and whose
+            decryption strips trailing spaces. Default is False.
+        chunk_size (int, optional): Plaintext bytes per AES chunk, a multiple of 16. Sizes other
+            than the default of 256 are recorded in the container and require container=True.
+            The default for CTR and GCM is 64 KiB.
+        mode (str): The AES mode, 'cbc', 'ctr' or 'gcm'. CTR and GCM use one nonce for the whole
+            payload and need no padding, and GCM also authenticates the container header; they are
+            recorded in the container and require container=True. Default is 'cbc'.
+        layout (str): 'rect', 'dense' or 'partial'. The dense layout only permutes the real
+            hexagon cells, roughly halving the padding that is encrypted and stored; the partial
+            layout leaves the outer ring partly filled and needs no padding at all. Both are
+            recorded in the container and require container=True. Default is 'rect'.
+        permutation (str): 'table' or 'feistel'. The Feistel engine computes the permuted position
+            of every cell from the key on demand, in O(1) memory per cell, so huge grids never
+            need a full index table and any block can be permuted on its own; it is recorded in
+            the container and requires container=True. Default is 'table'.
+
+    Returns:
+        bytes: The container, or the raw encrypted data with container=False.
+
+    Raises:
+        ValueError: If non-default options are requested without a container.
+    """
+    chunk_size = _check_options(container, chunk_size, mode, layout, permutation)
+    metrics.count('encrypt_input_bytes', len(data))
+    if container:
+        permuted = permute_payload(data, aes_key, layout, permutation)
+    else:
+        with metrics.stage('permutation'):
+            permuted = pad_payload(data)
+    return _seal(permuted, len(data), aes_key, container, chunk_size, mode, layout, permutation)
+
+def _check_options(container: bool, chunk_size: Optional[int], mode: str, layout: str, permutation: str) -> int:
+    # Validate the options of encrypt_payload and resolve the chunk size
+    if mode not in MODE_IDS:
+        raise ValueError(f"Unknown cipher mode: {mode!r} (expected one of {', '.join(MODE_IDS)}).")
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout!r} (expected one of {', '.join(LAYOUTS)}).")
+    if permutation not in PERMUTATIONS:
+        raise ValueError(f"Unknown permutation: {permutation!r} (expected one of {', '.join(PERMUTATIONS)}).")
+    chunk_size = check_chunk_size(chunk_size or default_chunk_size(mode))
+    if not container and (chunk_size != DEFAULT_CHUNK_SIZE or mode != 'cbc' or layout != 'rect'
+                          or permutation != 'table'):
+        raise ValueError("Non-default chunk sizes, modes, layouts and permutations are only recorded in containers, "
+                         "pass container=True.")
+    return chunk_size
+
+def _seal(permuted: np.ndarray, length: int, aes_key: bytes, container: bool, chunk_size: int, mode: str,
+          layout: str, permutation: str) -> bytes:
+    # AES-encrypt a permuted payload and add the container header, which GCM authenticates
+    if not container:
+        with metrics.stage('aes'):
+            return aes_encrypt(memoryview(permuted), aes_key, chunk_size, mode)
+
+    flags = LAYOUT_FLAGS[layout] | PERMUTATION_FLAGS[permutation]
+    header = pack_header(ContainerHeader(mode=MODE_IDS[mode], flags=flags, grid_size=grid_size_for(length, layout),
+                                         chunk_size=chunk_size, length=length))
+    with metrics.stage('aes'):
+        return header + aes_encrypt(memoryview(permuted), aes_key, chunk_size, mode, associated_data=header)
+
+def container_layout(header: ContainerHeader) -> str:
+    """
+    Return the cell layout recorded in a container header.
+
+    Args:
+        header (ContainerHeader): The container header.
+
+    Returns:
+        str: 'rect', 'dense' or 'partial'.
+
+    Raises:
+        ValueError: If the header carries more than one layout flag.
+    """
+    for layout, flag in LAYOUT_FLAGS.items():
+        if header.flags & LAYOUT_MASK == flag:
+            return layout
+    raise ValueError("Corrupt container: conflicting layout flags.")
+
+def container_permutation(header: ContainerHeader) -> str:
+    """
+    Return the permutation engine recorded in a container header.
+
+    Args:
+        header (ContainerHeader): The container header.
+
+    Returns:
+        str: 'table' or 'feistel'.
+    """
+    return 'feistel' if header.flags & FLAG_FEISTEL else 'table'
+
+def container_cells(header: ContainerHeader) -> int:
+    """
+    Return the number of permuted cells in a container's payload.
+
+    Args:
+        header (ContainerHeader): The container header.
+
+    Returns:
+        int: The cell count of the grid described by the header.
+    """
+    layout = container_layout(header)
+    if layout == 'partial':
+        return header.length
+    return layout_cell_count(header.grid_size, layout)
+
+def check_container(encrypted_data) -> ContainerHeader:
+    """
+    Parse and validate the header of a container against the ciphertext that follows it.
+
+    Args:
+        encrypted_data (bytes-like): The container.
+
+    Returns:
+        ContainerHeader: The parsed header.
+
+    Raises:
+        ValueError: If the data is not a container, uses unsupported options or does not
+            match the size its header describes.
+    """
+    header = parse_header(encrypted_data)
+    if header.mode not in MODE_NAMES or header.flags & ~KNOWN_FLAGS:
+        raise ValueError("Unsupported container options.")
+    check_chunk_size(header.chunk_size)
+    cells = container_cells(header)
+    if header.length > cells:
+        raise ValueError("Corrupt container: length exceeds the grid size.")
+    if len(encrypted_data) - HEADER.size != encrypted_size(cells, header.chunk_size, MODE_NAMES[header.mode]):
+        raise ValueError("Corrupt container: payload does not match the grid size.")
+    return header
+
+def decrypt_payload(encrypted_data: bytes, aes_key: bytes) -> bytes:
+    """
+    Undo `encrypt_payload` with an already derived key.
+
+    Containers are recognised by their header, unpermuted and restored to their exact original
+    length; headerless ciphertext (the 1.0.0 format) has the trailing grid padding stripped instead.
+
+    Args:
+        encrypted_data (bytes): The raw encrypted data, or a container.
+        aes_key (bytes): The derived key.
+
+    Returns:
+        bytes: The decrypted bytes.
+    """
+    return _decrypt(encrypted_data, aes_key)[0]
+
+def _decrypt(encrypted_data: bytes, aes_key: bytes) -> tuple:
+    # decrypt_payload, also returning whether the ciphertext was a container
+    decrypted, layout, permutation, length = _open(encrypted_data, aes_key)
+    if length is None:
+        return _trim(decrypted, length), False
+    return _trim(unpermute_payload(decrypted, aes_key, layout, permutation), length), True
+
+def _open(encrypted_data: bytes, aes_key: bytes) -> tuple:
+    # AES-decrypt a payload: returns the permuted payload, its layout, its permutation engine
+    # and its length (None for headerless ciphertext, which is not permuted and whose padding
+    # is stripped instead)
+    metrics.count('decrypt_input_bytes', len(encrypted_data))
+    if not is_container(encrypted_data):
+        return _open_headerless(encrypted_data, aes_key)
+
+    try:
+        header = check_container(encrypted_data)
+    except ValueError as error:
+        # About 1 in 2**32 headerless ciphertexts start with the container magic by chance
+        try:
+            return _open_headerless(encrypted_data, aes_key)
+        except ValueError:
+            raise error from None
+
+    view = memoryview(encrypted_data)
+    with metrics.stage('aes'):
+        decrypted = aes_decrypt(view[HEADER.size:], aes_key, header.chunk_size, MODE_NAMES[header.mode],
+                                associated_data=view[:HEADER.size])
+    return decrypted, container_layout(header), container_permutation(header), header.length
+
+def _open_headerless(encrypted_data: bytes, aes_key: bytes) -> tuple:
+    # _open for the headerless 1.0.0 format
+    with metrics.stage('aes'):
+        return aes_decrypt(encrypted_data, aes_key), 'rect', 'table', None
+
+def _trim(padded, length: Optional[int]) -> bytes:
+    # Cut an unpermuted payload to its recorded length, or strip the padding of headerless ciphertext
+    if length is None:
+        return bytes(padded).rstrip(bytes([PAD_BYTE]))
+    return bytes(padded[:length])
+
+def _permutation_table(cells: int, aes_key: bytes, permutation: str) -> np.ndarray:
+    # The full index table of either engine, for the batch path where grids are small
+    if permutation == 'feistel':
+        def build():
+            table = FeistelPermutation(cells, aes_key).indices()
+            table.setflags(write=False)
+            return table
+
+        return grid_cache.get_or_create(('feistel', aes_key, cells), build)
+    return permutation_indices(cells, aes_key)
+
+def permute_payloads(payloads: Sequence, aes_key: bytes, layout: str = 'rect', permutation: str = 'table') -> list:
+    """
+    Pad and permute many payloads at once.
+
+    Payloads are grouped into buckets by the cell count of their grid. Every bucket is packed
+    into a 2-D uint8 array, one payload per row, and permuted with a single gather.
+
+    Args:
+        payloads (Sequence[bytes-like]): The payloads to permute.
+        aes_key (bytes): The derived key used for permutation.
+        layout (str): The layout, as for `permute_payload`. Default is 'rect'.
+        permutation (str): The permutation engine, as for `permute_payload`. Default is 'table'.
+
+    Returns:
+        list: The permuted payloads as uint8 arrays, in input order.
+    """
+    with metrics.stage('permutation'):
+        buckets = {}
+        for index, payload in enumerate(payloads):
+            cells = payload_cell_count(len(payload), layout)
+            buckets.setdefault(cells, {}).setdefault(len(payload), []).append(index)
+
+        permuted = [None] * len(payloads)
+        for cells, lengths in buckets.items():
+            order = [index for indices in lengths.values() for index in indices]
+            rows = np.full((len(order), cells), PAD_BYTE, dtype=np.uint8)
+            start = 0
+            # Payloads of equal length are copied in with one reshape instead of row by row
+            for length, indices in lengths.items():
+                block = np.frombuffer(b''.join(payloads[index] for index in indices), dtype=np.uint8)
+                rows[start:start + len(indices), :length] = block.reshape(len(indices), length)
+                start += len(indices)
+
+            # Gather into a C-ordered array so every row can be handed to AES as one buffer
+            rows = np.take(rows, _permutation_table(cells, aes_key, permutation), axis=1, out=np.empty_like(rows))
+            for row, index in enumerate(order):
+                permuted[index] = rows[row]
+        return permuted
+
+def unpermute_payloads(payloads: Sequence, aes_key: bytes, layouts: Sequence[str],
+                       permutations: Optional[Sequence[str]] = None) -> list:
+    """
+    Undo `permute_payloads` for many payloads at once.
+
+    Payloads of equal cell count are packed into a 2-D uint8 array and restored with a single
+    scatter through the permutation.
+
+    Args:
+        payloads (Sequence[bytes-like]): The permuted payloads.
+        aes_key (bytes): The derived key used for permutation.
+        layouts (Sequence[str]): The layout of every payload.
+        permutations (Sequence[str], optional): The permutation engine of every payload.
+            Default is 'table' for all.
+
+    Returns:
+        list: The padded payloads in their original order as uint8 arrays, in input order.
+    """
+    permutations = permutations or ['table'] * len(payloads)
+    buckets = {}
+    for index, (payload, layout, permutation) in enumerate(zip(payloads, layouts, permutations)):
+        buckets.setdefault((len(payload), layout, permutation), []).append(index)
+    for cells, layout, _ in buckets:
+        if layout == 'rect':
+            grid_size_from_cells(cells)  # Reject payloads that do not fill a grid
+
+    with metrics.stage('permutation'):
+        restored = [None] * len(payloads)
+        for (cells, _, permutation), indices in buckets.items():
+            rows = np.frombuffer(b''.join(payloads[index] for index in indices), dtype=np.uint8)
+            padded = np.empty((len(indices), cells), dtype=np.uint8)
+            padded[:, _permutation_table(cells, aes_key, permutation)] = rows.reshape(len(indices), cells)
+            for row, index in enumerate(indices):
+                restored[index] = padded[row]
+        return restored
+
+def encrypt_payloads(payloads: Sequence, aes_key: bytes, container: bool = False, chunk_size: Optional[int] = None,
+                     mode: str = 'cbc', layout: str = 'rect', permutation: str = 'table') -> list:
+    """
+    Encrypt many payloads with an already derived key, permuting them in batches.
+
+    The output is identical to calling `encrypt_payload` on every payload, but payloads that
+    share a grid are permuted together by `permute_payloads`.
+
+    Args:
+        payloads (Sequence[bytes-like]): The plaintext payloads.
+        aes_key (bytes): The derived key.
+        container, chunk_size, mode, layout, permutation: As for `encrypt_payload`.
+
+    Returns:
+        list: The containers (or raw encrypted payloads), in input order.
+    """
+    chunk_size = _check_options(container, chunk_size, mode, layout, permutation)
+    metrics.count('encrypt_input_bytes', sum(len(payload) for payload in payloads))
+    if container:
+        permuted = permute_payloads(payloads, aes_key, layout, permutation)
+    else:
+        with metrics.stage('permutation'):
+            permuted = [pad_payload(payload) for payload in payloads]
+    return [_seal(row, len(payload), aes_key, container, chunk_size, mode, layout, permutation)
+            for row, payload in zip(permuted, payloads)]
+
+def decrypt_payloads(encrypted_payloads: Sequence[bytes], aes_key: bytes) -> list:
+    """
+    Decrypt many payloads with an already derived key, unpermuting them in batches.
+
+    Args:
+        encrypted_payloads (Sequence[bytes]): The raw encrypted payloads or containers.
+        aes_key (bytes): The derived key.
+
+    Returns:
+        list: The decrypted payloads, in input order.
+    """
+    return [payload for payload, _ in _decrypt_payloads(encrypted_payloads, aes_key)]
+
+def _decrypt_payloads(encrypted_payloads: Sequence[bytes], aes_key: bytes) -> list:
+    # decrypt_payloads, pairing every payload with whether its ciphertext was a container
+    opened = [_open(encrypted_data, aes_key) for encrypted_data in encrypted_payloads]
+    # Only containers are permuted; headerless ciphertext is just trimmed
+    permuted = [index for index, (_, _, _, length) in enumerate(opened) if length is not None]
+    restored = [decrypted for decrypted, _, _, _ in opened]
+    unpermuted = unpermute_payloads([restored[index] for index in permuted], aes_key,
+                                    [opened[index][1] for index in permuted], [opened[index][2] for index in permuted])
+    for index, padded in zip(permuted, unpermuted):
+        restored[index] = padded
+    return [(_trim(padded, length), length is not None) for padded, (_, _, _, length) in zip(restored, opened)]
+
+def encrypt_bytes(data: bytes, key: str, **options) -> bytes:
+    """
+    Encrypt bytes using hexagonal permutation and AES encryption.
+
+    Args:
+        data (bytes): The plaintext bytes (any bytes-like object).
         key (str): The encryption key.
+        **options: Options for `encrypt_payload`, e.g. container=True for an exact, permuted
+            container, with chunk_size, mode, layout or permutation.
 
     Returns:
-        str: The encrypted text (Base64 encoded).
+        bytes: The raw encrypted data in the 1.0.0 format, or the container.
     """
-    size = max(1, math.ceil((len(text) / 3) ** 0.5))
-    grid = create_hexagonal_grid(size)
+    return encrypt_payload(data, derive_key(key), **options)
 
-    # Derive AES key from the provided key
-    aes_key = sha256(key.encode()).digest()
-    permuted_grid = permute_grid(grid, aes_key)
+def decrypt_bytes(encrypted_data: bytes, key: str) -> bytes:
+    """
+    Decrypt bytes encrypted with `encrypt_bytes`.
 
-    matrix = text_to_matrix(text, permuted_grid)
-    flattened_matrix = matrix.flatten()
+    Args:
+        encrypted_data (bytes): The raw encrypted data, or a container.
+        key (str): The decryption key.
 
-    # Join the characters into a single string and then convert to bytes
-    data_bytes = ''.join(flattened_matrix).encode('utf-8')
+    Returns:
+        bytes: The decrypted bytes (exact for containers, with the trailing grid padding removed
+        for headerless ciphertext).
+    """
+    return decrypt_payload(encrypted_data, derive_key(key))
 
-    encrypted_data = aes_encrypt(data_bytes, aes_key)
+def encrypt_text_payload(text: str, aes_key: bytes, **options) -> str:
+    """
+    Encrypt text with an already derived key and armor it as Base64.
 
-    # Encode encrypted data to Base64 to ensure safe transmission
-    encrypted_text = base64.b64encode(encrypted_data).decode('utf-8')
-    return encrypted_text
+    Args:
+        text (str): The plaintext to encrypt.
+        aes_key (bytes): The derived key.
+        **options: Options for `encrypt_payload`.
 
-def decrypt(encrypted_text: str, key: str) -> str:
+    Returns:
+        str: The encrypted text (Base64 encoded).
     """
-    Decrypt text encrypted using hexagonal permutation and AES encryption.
+    with metrics.stage('matrix_conversion'):
+        data = text.encode('utf-8')
+    encrypted_data = encrypt_payload(data, aes_key, **options)
+    with metrics.stage('base64'):
+        return armor(encrypted_data)
+
+def decrypt_text_payload(encrypted_text: str, aes_key: bytes) -> str:
+    """
+    Decrypt Base64 armored text with an already derived key.
 
     Args:
         encrypted_text (str): The encrypted text (Base64 encoded).
-        key (str): The decryption key.
+        aes_key (bytes): The derived key.
 
     Returns:
-        str: The decrypted text.
+        str: The decrypted text. Text from headerless ciphertext is trimmed of trailing
+        whitespace, since the grid padding cannot be told apart from it.
+    """
+    with metrics.stage('base64'):
+        encrypted_data = dearmor(encrypted_text)
+    decrypted, exact = _decrypt(encrypted_data, aes_key)
+    with metrics.stage('matrix_conversion'):
+        text = decrypted.decode('utf-8')
+    return text if exact else text.rstrip()
+
+def encrypt_text_payloads(texts: Sequence[str], aes_key: bytes, **options) -> list:
+    """
+    Encrypt many texts with an already derived key, permuting them in batches.
+
+    Args:
+        texts (Sequence[str]): The plaintexts.
+        aes_key (bytes): The derived key.
+        **options: Options for `encrypt_payload`.
+
+    Returns:
+        list: The encrypted texts (Base64 encoded), in input order.
+    """
+    with metrics.stage('matrix_conversion'):
+        payloads = [text.encode('utf-8') for text in texts]
+    encrypted_payloads = encrypt_payloads(payloads, aes_key, **options)
+    with metrics.stage('base64'):
+        return [armor(encrypted_data) for encrypted_data in encrypted_payloads]
+
+def decrypt_text_payloads(encrypted_texts: Sequence[str], aes_key: bytes) -> list:
     """
-    # Decode the Base64 encoded string to bytes
-    encrypted_data = base64.b64decode(encrypted_text)
+    Decrypt many Base64 armored texts with an already derived key, unpermuting them in batches.
 
-    # Derive AES key from the provided key
-    aes_key = sha256(key.encode()).digest()
+    Args:
+        encrypted_texts (Sequence[str]): The encrypted texts (Base64 encoded).
+        aes_key (bytes): The derived key.
 
-    # Decrypt AES-encrypted data
-    decrypted_data = aes_decrypt(encrypted_data, aes_key)
+    Returns:
+        list: The decrypted texts, in input order, trimmed like `decrypt_text_payload`.
+    """
+    with metrics.stage('base64'):
+        encrypted_payloads = [dearmor(encrypted_text) for encrypted_text in encrypted_texts]
+    decrypted = _decrypt_payloads(encrypted_payloads, aes_key)
+    with metrics.stage('matrix_conversion'):
+        return [payload.decode('utf-8') if exact else payload.decode('utf-8').rstrip() for payload, exact in decrypted]
 
-    # Convert byte data to string for further processing
-    decrypted_text = decrypted_data.decode('utf-8')
+def encrypt(text: str, key: str, **options) -> str:
+    """
+    Encrypt text using hexagonal permutation and AES encryption.
 
-    # Determine grid size
-    total_chars = len(decrypted_text)
-    grid_size = max(1, math.ceil((total_chars / 3) ** 0.5))
+    Args:
+        text (str): The plaintext to encrypt.
+        key (str): The encryption key.
+        **options: Options for `encrypt_payload`, e.g. container=True, mode='gcm'. Without a
+            container the output is the headerless 1.0.0 format, whose decryption trims trailing
+            whitespace.
 
-    grid = create_hexagonal_grid(grid_size)
-    permuted_grid = permute_grid(grid, aes_key)
+    Returns:
+        str: The encrypted text (Base64 encoded).
+    """
+    return encrypt_text_payload(text, derive_key(key), **options)
 
-    # Create matrix from the decrypted text
-    decrypted_matrix = text_to_matrix(decrypted_text, permuted_grid)
+def decrypt(encrypted_text: str, key: str) -> str:
+    """
+    Decrypt text encrypted using hexagonal permutation and AES encryption.
 
-    # Ensure the decrypted text is trimmed to match original text length without padding
-    final_decrypted_text = ''.join(decrypted_matrix.flatten()).rstrip()
+    Args:
+        encrypted_text (str): The encrypted text (Base64 encoded).
+        key (str): The decryption key.
 
-    return final_decrypted_text
\ No newline at end of file
+    Returns:
+        str: The decrypted text.
+    """
+    return decrypt_text_payload(encrypted_text, derive_key(key))
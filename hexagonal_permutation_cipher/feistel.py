@@ -0,0 +1,152 @@
+import hashlib
+from typing import Optional
+import numpy as np
+
+# A keyed bijection over [0, cells) evaluated on demand: a balanced Feistel network over the
+# smallest even bit width covering the domain, with cycle walking to stay inside it. Any
+# block of indices can be permuted on its own in O(block) memory, without the full table.
+FEISTEL_ROUNDS = 6
+BLOCK_CELLS = 1024 * 1024  # Indices evaluated per vectorized step by `permute_blocks`
+
+_MULTIPLIER_1 = np.uint64(0x9E3779B97F4A7C15)
+_MULTIPLIER_2 = np.uint64(0xBF58476D1CE4E5B9)
+_MULTIPLIER_3 = np.uint64(0x94D049BB133111EB)
+_SHIFT_30 = np.uint64(30)
+_SHIFT_27 = np.uint64(27)
+_SHIFT_31 = np.uint64(31)
+
+
+class FeistelPermutation:
+    """
+    A key-derived permutation of the cell indices of a grid, computed index by index.
+
+    The round function is a 64-bit mixing function keyed by round keys derived from the key
+    and the cell count. It only has to scatter cells well; the secrecy of the payload still
+    rests on the AES layer.
+
+    Attributes:
+    ----------
+    cells : int
+        The size of the domain.
+
+    Methods:
+    -------
+    forward(indices: np.ndarray) -> np.ndarray
+        Map cell indices through the permutation.
+    inverse(indices: np.ndarray) -> np.ndarray
+        Map cell indices back through the inverse permutation.
+    indices(start: int, stop: int) -> np.ndarray
+        The permutation of a contiguous block of indices.
+    """
+
+    def __init__(self, cells: int, key: bytes, rounds: int = FEISTEL_ROUNDS):
+        if cells < 0:
+            raise ValueError("The cell count must not be negative.")
+        self.cells = cells
+        self._half_bits = max(1, ((cells - 1).bit_length() + 1) // 2)
+        self._mask = np.uint64((1 << self._half_bits) - 1)
+        self._shift = np.uint64(self._half_bits)
+        seed = hashlib.sha512(b'hpc-feistel\x00' + cells.to_bytes(8, 'big') + key).digest()
+        words = np.frombuffer(seed, dtype='>u8').astype(np.uint64)
+        self._round_keys = [words[index % len(words)] ^ np.uint64(index) for index in range(rounds)]
+
+    def _round(self, half: np.ndarray, round_key: np.uint64) -> np.ndarray:
+        # SplitMix64 finalizer over the keyed half, cut to the half width
+        x = (half ^ round_key) * _MULTIPLIER_1
+        x = (x ^ (x >> _SHIFT_30)) * _MULTIPLIER_2
+        x = (x ^ (x >> _SHIFT_27)) * _MULTIPLIER_3
+        return (x ^ (x >> _SHIFT_31)) & self._mask
+
+    def _encipher(self, values: np.ndarray) -> np.ndarray:
+        left, right = values >> self._shift, values & self._mask
+        for round_key in self._round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self._shift) | right
+
+    def _decipher(self, values: np.ndarray) -> np.ndarray:
+        left, right = values >> self._shift, values & self._mask
+        for round_key in reversed(self._round_keys):
+            left, right = right ^ self._round(left, round_key), left
+        return (left << self._shift) | right
+
+    def _walk(self, indices, step) -> np.ndarray:
+        # Cycle walking: re-apply the network to values that left the domain until they return
+        values = step(np.asarray(indices, dtype=np.uint64))
+        outside = np.flatnonzero(values >= self.cells)
+        while outside.size:
+            values[outside] = step(values[outside])
+            outside = outside[values[outside] >= self.cells]
+        return values.astype(np.int64)
+
+    def forward(self, indices) -> np.ndarray:
+        """
+        Map cell indices through the permutation.
+
+        Args:
+            indices (array-like): Cell indices in [0, cells).
+
+        Returns:
+            np.ndarray: The permuted indices (int64).
+        """
+        return self._walk(indices, self._encipher)
+
+    def inverse(self, indices) -> np.ndarray:
+        """
+        Map cell indices back through the inverse permutation.
+
+        Args:
+            indices (array-like): Cell indices in [0, cells).
+
+        Returns:
+            np.ndarray: The indices i with forward(i) equal to the given ones (int64).
+        """
+        return self._walk(indices, self._decipher)
+
+    def indices(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Return the permutation of a contiguous block of indices.
+
+        Args:
+            start (int): The first index. Default is 0.
+            stop (int, optional): One past the last index. Default is the cell count.
+
+        Returns:
+            np.ndarray: forward(range(start, stop)).
+        """
+        stop = self.cells if stop is None else stop
+        return self.forward(np.arange(start, stop, dtype=np.uint64))
+
+
+def permute_blocks(padded: np.ndarray, permutation: FeistelPermutation) -> np.ndarray:
+    """
+    Gather a padded payload through a Feistel permutation, block by block.
+
+    Args:
+        padded (np.ndarray): The padded payload, one byte per cell.
+        permutation (FeistelPermutation): The permutation over its cells.
+
+    Returns:
+        np.ndarray: The permuted payload, with permuted[j] == padded[forward(j)].
+    """
+    permuted = np.empty_like(padded)
+    for start in range(0, len(padded), BLOCK_CELLS):
+        stop = min(start + BLOCK_CELLS, len(padded))
+        permuted[start:stop] = padded[permutation.indices(start, stop)]
+    return permuted
+
+def unpermute_blocks(permuted: np.ndarray, permutation: FeistelPermutation) -> np.ndarray:
+    """
+    Undo `permute_blocks`, block by block.
+
+    Args:
+        permuted (np.ndarray): The permuted payload.
+        permutation (FeistelPermutation): The permutation over its cells.
+
+    Returns:
+        np.ndarray: The padded payload in its original order.
+    """
+    padded = np.empty_like(permuted)
+    for start in range(0, len(permuted), BLOCK_CELLS):
+        stop = min(start + BLOCK_CELLS, len(permuted))
+        padded[permutation.indices(start, stop)] = permuted[start:stop]
+    return padded
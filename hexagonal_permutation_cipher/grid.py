@@ -2,6 +2,10 @@ import numpy as np
 import math
 from typing import Tuple
 
+# Cell layouts: 'rect' covers the grid's bounding rectangle (zero cells included),
+# 'dense' only the real hexagon cells
+LAYOUTS = ('rect', 'dense', 'partial')
+
 
 class Matrix:
     """
@@ -76,4 +80,150 @@ def text_to_matrix(text: str, grid: np.ndarray) -> np.ndarray:
     """
     flat_grid_length = grid.size
     padded_text = text.ljust(flat_grid_length)  # Pad text to fit into the grid
-    return np.array(list(padded_text)).reshape(grid.shape)
\ No newline at end of file
+    return np.array(list(padded_text)).reshape(grid.shape)
+
+def hex_cell_count(size: int) -> int:
+    """
+    Number of real hexagon cells in a grid of the given size.
+
+    Args:
+        size (int): The size (radius) of the grid.
+
+    Returns:
+        int: The number of cells, 3s^2 - 3s + 1.
+    """
+    return 3 * size * size - 3 * size + 1
+
+# Cube coordinate steps around a ring, in walking order
+HEX_DIRECTIONS = np.array([(1, -1, 0), (1, 0, -1), (0, 1, -1), (-1, 1, 0), (-1, 0, 1), (0, -1, 1)])
+
+def hex_ring_cells(radius: int) -> np.ndarray:
+    """
+    Enumerate the cells of a hexagon in ring order, from the centre outwards.
+
+    Every ring is generated directly from its corners, so the cost is O(cells) instead of a
+    scan over the whole cube of coordinates.
+
+    Args:
+        radius (int): The number of rings around the centre cell.
+
+    Returns:
+        np.ndarray: The cube coordinates (x, y, z) with x + y + z == 0, one row per cell,
+        3r^2 + 3r + 1 rows.
+    """
+    rings = np.arange(1, radius + 1)
+    ring = np.repeat(rings, 6 * rings)
+    # Position of every cell within its ring, then the side it lies on and its step along it
+    local = np.arange(ring.size) - np.repeat(3 * rings * (rings - 1), 6 * rings)
+    side, along = np.divmod(local, ring)
+
+    # Corners of the unit ring: the walk starts at direction 4 and turns at every corner
+    corners = HEX_DIRECTIONS[4] + np.concatenate([[(0, 0, 0)], np.cumsum(HEX_DIRECTIONS, axis=0)[:-1]])
+    cells = ring[:, None] * corners[side] + along[:, None] * HEX_DIRECTIONS[side]
+    return np.concatenate([np.zeros((1, 3), dtype=cells.dtype), cells])
+
+def layout_cell_count(size: int, layout: str = 'rect') -> int:
+    """
+    Number of cells a grid size and layout can hold.
+
+    Args:
+        size (int): The size (radius) of the grid.
+        layout (str): 'rect', 'dense' or 'partial'. Default is 'rect'.
+
+    Returns:
+        int: The number of cells. For 'partial' this is the capacity of the full hexagon; the
+        payload only fills `payload_cell_count` of them.
+    """
+    if layout == 'rect':
+        return grid_cell_count(size)
+    if layout in ('dense', 'partial'):
+        return hex_cell_count(size)
+    raise ValueError(f"Unknown layout: {layout!r} (expected one of {', '.join(LAYOUTS)}).")
+
+def payload_cell_count(length: int, layout: str = 'rect') -> int:
+    """
+    Number of cells a payload of the given length is padded to and permuted over.
+
+    The 'partial' layout fills the hexagon ring by ring from the centre and stops as soon as
+    the payload is placed, leaving the outer ring partly filled, so no padding is needed.
+
+    Args:
+        length (int): The payload length in bytes.
+        layout (str): 'rect', 'dense' or 'partial'. Default is 'rect'.
+
+    Returns:
+        int: The number of permuted cells.
+    """
+    if layout == 'partial':
+        return length
+    return layout_cell_count(grid_size_for(length, layout), layout)
+
+def padding_overhead(length: int, layout: str = 'rect') -> float:
+    """
+    Fraction of padding added to a payload by a layout.
+
+    Args:
+        length (int): The payload length in bytes.
+        layout (str): 'rect', 'dense' or 'partial'. Default is 'rect'.
+
+    Returns:
+        float: The padding cells divided by the payload length (0.0 for empty payloads).
+    """
+    if length == 0:
+        return 0.0
+    return (payload_cell_count(length, layout) - length) / length
+
+def grid_cell_count(size: int) -> int:
+    """
+    Number of cells in the grid returned by `create_hexagonal_grid(size)`.
+
+    Args:
+        size (int): The size (radius) of the grid.
+
+    Returns:
+        int: The total cell count of the grid, zero cells included.
+    """
+    return (2 * size - 1) * (3 * size - 2)
+
+def grid_size_for(length: int, layout: str = 'rect') -> int:
+    """
+    Pick the grid size used to hold a payload of the given length.
+
+    Args:
+        length (int): The payload length in bytes.
+        layout (str): 'rect', 'dense' or 'partial'. Default is 'rect'.
+
+    Returns:
+        int: For 'rect', the smallest grid size, starting from the usual estimate, whose grid holds
+        the payload; for 'dense' and 'partial', the smallest grid size whose hexagon holds it.
+    """
+    if layout in ('dense', 'partial'):
+        size = max(1, math.ceil((3 + math.sqrt(max(0, 12 * length - 3))) / 6))
+        while size > 1 and hex_cell_count(size - 1) >= length:
+            size -= 1
+        while hex_cell_count(size) < length:
+            size += 1
+        return size
+
+    size = max(1, math.ceil((length / 3) ** 0.5))
+    while layout_cell_count(size, layout) < length:
+        size += 1
+    return size
+
+def grid_size_from_cells(cells: int) -> int:
+    """
+    Recover the grid size from the cell count of a padded payload.
+
+    Args:
+        cells (int): The number of cells in the grid.
+
+    Returns:
+        int: The grid size.
+
+    Raises:
+        ValueError: If no grid has exactly that many cells.
+    """
+    size = round((7 + math.sqrt(1 + 24 * cells)) / 12)
+    if size < 1 or grid_cell_count(size) != cells:
+        raise ValueError(f"No hexagonal grid has {cells} cells.")
+    return size
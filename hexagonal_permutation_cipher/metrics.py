@@ -0,0 +1,272 @@
+import threading
+import time
+from typing import Callable, Dict, NamedTuple
+from .cache import cache_stats
+
+# Instrumentation is off by default; the hot path then only pays for one attribute check per
+# call site, and `stage` hands back a shared no-op context manager.
+
+Listener = Callable[[str, str, float], None]
+
+
+class StageTimings(NamedTuple):
+    """
+    The accumulated timings of one stage.
+    """
+    calls: int
+    total_seconds: float
+    max_seconds: float
+
+
+class MetricsSnapshot(NamedTuple):
+    """
+    A point-in-time copy of every metric.
+
+    Attributes:
+    ----------
+    stages : dict
+        Stage name to StageTimings.
+    counters : dict
+        Counter name to total, e.g. input bytes per operation or AES chunks processed.
+    gauges : dict
+        Gauge name to current value, e.g. the pool queue depth.
+    cache : dict
+        The counters of the shared grid/permutation cache.
+    """
+    stages: Dict[str, StageTimings]
+    counters: Dict[str, float]
+    gauges: Dict[str, float]
+    cache: Dict[str, int]
+
+
+class MetricsRegistry:
+    """
+    Collects stage timers, counters and gauges, and forwards every update to listeners.
+
+    Attributes:
+    ----------
+    enabled : bool
+        Whether updates are recorded. Checked on the hot path before any other work.
+
+    Methods:
+    -------
+    record_stage(name: str, seconds: float)
+        Add one timed call of a stage.
+    increment(name: str, value: float = 1)
+        Add to a counter.
+    adjust_gauge(name: str, delta: float)
+        Move a gauge up or down.
+    snapshot() -> MetricsSnapshot
+        Copy the current metrics.
+    reset()
+        Zero every metric.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._gauges = {}
+        self._listeners = []
+
+    def add_listener(self, listener: Listener):
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Listener):
+        with self._lock:
+            self._listeners = [existing for existing in self._listeners if existing is not listener]
+
+    def _notify(self, kind: str, name: str, value: float):
+        # Listeners run on the calling thread, outside the lock
+        for listener in self._listeners:
+            listener(kind, name, value)
+
+    def record_stage(self, name: str, seconds: float):
+        with self._lock:
+            calls, total, longest = self._stages.get(name, (0, 0.0, 0.0))
+            self._stages[name] = StageTimings(calls + 1, total + seconds, max(longest, seconds))
+        self._notify('stage', name, seconds)
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        self._notify('counter', name, value)
+
+    def adjust_gauge(self, name: str, delta: float):
+        with self._lock:
+            value = self._gauges[name] = self._gauges.get(name, 0) + delta
+        self._notify('gauge', name, value)
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            stages, counters, gauges = dict(self._stages), dict(self._counters), dict(self._gauges)
+        return MetricsSnapshot(stages, counters, gauges, cache_stats()._asdict())
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+class _StageTimer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        registry.record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+registry = MetricsRegistry()
+
+def enable_metrics(enabled: bool = True):
+    """
+    Turn instrumentation on or off.
+
+    Args:
+        enabled (bool): Record metrics from now on. Default is True.
+    """
+    registry.enabled = enabled
+
+def metrics_enabled() -> bool:
+    """
+    Check whether instrumentation is on.
+
+    Returns:
+        bool: True if metrics are being recorded.
+    """
+    return registry.enabled
+
+def stage(name: str):
+    """
+    Time a block of code as one call of a named stage.
+
+    Args:
+        name (str): The stage name, e.g. 'aes' or 'permutation'.
+
+    Returns:
+        A context manager; a shared no-op when instrumentation is off.
+    """
+    if not registry.enabled:
+        return _NULL_TIMER
+    return _StageTimer(name)
+
+def count(name: str, value: float = 1):
+    """
+    Add to a counter if instrumentation is on.
+
+    Args:
+        name (str): The counter name, e.g. 'encrypt_input_bytes'.
+        value (float): The amount to add. Default is 1.
+    """
+    if registry.enabled:
+        registry.increment(name, value)
+
+def adjust_gauge(name: str, delta: float):
+    """
+    Move a gauge up or down if instrumentation is on.
+
+    Args:
+        name (str): The gauge name, e.g. 'pool_queue_depth'.
+        delta (float): The change.
+    """
+    if registry.enabled:
+        registry.adjust_gauge(name, delta)
+
+def add_metrics_listener(listener: Listener):
+    """
+    Register a callback for every metric update.
+
+    The callback is called as listener(kind, name, value) on the thread that made the update,
+    where kind is 'stage' (value in seconds), 'counter' (the increment) or 'gauge' (the new
+    value). Keep it cheap; it runs on the hot path.
+
+    Args:
+        listener (Callable[[str, str, float], None]): The callback.
+    """
+    registry.add_listener(listener)
+
+def remove_metrics_listener(listener: Listener):
+    """
+    Unregister a callback added with `add_metrics_listener`.
+
+    Args:
+        listener (Callable[[str, str, float], None]): The callback.
+    """
+    registry.remove_listener(listener)
+
+def metrics_snapshot() -> MetricsSnapshot:
+    """
+    Return a copy of the current metrics, including the cache counters.
+
+    Returns:
+        MetricsSnapshot: The metrics.
+    """
+    return registry.snapshot()
+
+def reset_metrics():
+    """
+    Zero every stage timer, counter and gauge.
+    """
+    registry.reset()
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text(prefix: str = 'hpc') -> str:
+    """
+    Render the current metrics in the Prometheus text exposition format.
+
+    Args:
+        prefix (str): The metric name prefix. Default is 'hpc'.
+
+    Returns:
+        str: The exposition text, ending with a newline.
+    """
+    snapshot = registry.snapshot()
+    lines = []
+
+    def family(name: str, kind: str, help_text: str, samples: list):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape_label(str(label))}"' for key, label in labels)
+            lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+    stages = sorted(snapshot.stages.items())
+    family('stage_seconds_total', 'counter', "Time spent in each stage.",
+           [((('stage', name),), timings.total_seconds) for name, timings in stages])
+    family('stage_calls_total', 'counter', "Number of timed calls of each stage.",
+           [((('stage', name),), timings.calls) for name, timings in stages])
+    family('stage_max_seconds', 'gauge', "Longest single call of each stage.",
+           [((('stage', name),), timings.max_seconds) for name, timings in stages])
+    for name, value in sorted(snapshot.counters.items()):
+        family(f"{name}_total", 'counter', f"Total {name.replace('_', ' ')}.", [((), value)])
+    for name, value in sorted(snapshot.gauges.items()):
+        family(name, 'gauge', f"Current {name.replace('_', ' ')}.", [((), value)])
+    for name in ('hits', 'misses', 'evictions'):
+        family(f"cache_{name}_total", 'counter', f"Grid/permutation cache {name}.", [((), snapshot.cache[name])])
+    family('cache_entries', 'gauge', "Entries in the grid/permutation cache.", [((), snapshot.cache['entries'])])
+    family('cache_bytes', 'gauge', "Bytes held by the grid/permutation cache.", [((), snapshot.cache['bytes'])])
+    return '\n'.join(lines) + '\n'
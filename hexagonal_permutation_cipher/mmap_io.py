@@ -0,0 +1,169 @@
+import mmap
+import os
+import traceback
+import numpy as np
+from .aes import aes_encrypt_into, aes_decrypt, encrypted_size
+from .encryption import derive_key, permute_payload, unpermute_payload
+from .grid import payload_cell_count
+from .stream import (STREAM_HEADER, FRAME_HEADER, DEFAULT_BLOCK_SIZE, DEFAULT_STREAM_LAYOUT, pack_stream_header,
+                     parse_stream_header, encrypt_file, decrypt_file)
+
+def encrypted_file_size(length: int, block_size: int = DEFAULT_BLOCK_SIZE, layout: str = DEFAULT_STREAM_LAYOUT) -> int:
+    """
+    Compute the size of the stream produced by encrypting `length` bytes.
+
+    Args:
+        length (int): The plaintext length in bytes.
+        block_size (int): The plaintext block size. Default is 1 MiB.
+        layout (str): The layout every block is permuted over. Default is 'partial'.
+
+    Returns:
+        int: The encrypted stream size in bytes, header and end frame included.
+    """
+    full_blocks, tail = divmod(length, block_size)
+    frame_size = FRAME_HEADER.size + encrypted_size(payload_cell_count(block_size, layout))
+    size = STREAM_HEADER.size + full_blocks * frame_size + FRAME_HEADER.size
+    if tail:
+        size += FRAME_HEADER.size + encrypted_size(payload_cell_count(tail, layout))
+    return size
+
+def encrypt_file_mmap(input_path: str, output_path: str, key: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                      layout: str = DEFAULT_STREAM_LAYOUT):
+    """
+    Encrypt a local file through memory maps, without per-block copies.
+
+    Blocks of the source file are handed to the cipher as memoryview slices of the map, and
+    ciphertext is written into a memory-mapped output file preallocated to its final size.
+    The output is the same stream format as `stream.encrypt_file`.
+
+    Args:
+        input_path (str): The file to encrypt.
+        output_path (str): The file to write.
+        key (str): The encryption key.
+        block_size (int): The plaintext block size. Default is 1 MiB.
+        layout (str): The layout every block is permuted over. Default is 'partial'.
+
+    Raises:
+        ValueError: If the block size or layout is invalid. If encryption fails partway, the output
+            file is removed.
+    """
+    header = pack_stream_header(block_size, layout)
+    length = os.path.getsize(input_path)
+    if length == 0:
+        # Empty files cannot be mapped
+        encrypt_file(input_path, output_path, key, block_size, layout)
+        return
+
+    aes_key = derive_key(key)
+    total_size = encrypted_file_size(length, block_size, layout)
+    created = False
+
+    try:
+        with open(input_path, 'rb') as source, open(output_path, 'w+b') as target:
+            created = True
+            target.truncate(total_size)
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as source_map, \
+                    mmap.mmap(target.fileno(), total_size) as target_map:
+                with memoryview(source_map) as source_view, memoryview(target_map) as target_view:
+                    target_view[:len(header)] = header
+                    position = len(header)
+
+                    try:
+                        for offset in range(0, length, block_size):
+                            block = source_view[offset:offset + block_size]
+                            permuted = permute_payload(block, aes_key, layout)
+                            block.release()
+
+                            written = aes_encrypt_into(permuted, aes_key, target_view[position + FRAME_HEADER.size:])
+                            FRAME_HEADER.pack_into(target_view, position, min(block_size, length - offset), written)
+                            position += FRAME_HEADER.size + written
+                    except Exception as e:
+                        # Frames of the traceback hold slices of both maps, which could not be closed otherwise
+                        traceback.clear_frames(e.__traceback__)
+                        raise
+
+                    FRAME_HEADER.pack_into(target_view, position, 0, 0)
+                target_map.flush()
+    except Exception:
+        # The preallocated output would look like a valid stream, do not leave it behind
+        if created:
+            os.remove(output_path)
+        raise
+
+def decrypt_file_mmap(input_path: str, output_path: str, key: str):
+    """
+    Decrypt a local file produced by `encrypt_file` or `encrypt_file_mmap` through memory maps.
+
+    The frame headers are scanned first so the output file can be preallocated to its final
+    size; every decrypted block is then written straight into the output map.
+
+    Args:
+        input_path (str): The file to decrypt.
+        output_path (str): The file to write.
+        key (str): The decryption key.
+
+    Raises:
+        ValueError: If the stream header is invalid, the stream is truncated or a block does not
+            decrypt; the output file is removed in that case.
+    """
+    if os.path.getsize(input_path) == 0:
+        # Let the streaming reader report the missing header
+        decrypt_file(input_path, output_path, key)
+        return
+
+    aes_key = derive_key(key)
+    created = False
+
+    try:
+        with open(input_path, 'rb') as source, \
+                mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as source_map, \
+                memoryview(source_map) as source_view:
+            layout, frames = _scan_frames(source_view)
+            total_size = sum(plain_length for _, plain_length, _ in frames)
+
+            with open(output_path, 'w+b') as target:
+                created = True
+                target.truncate(total_size)
+                if total_size == 0:
+                    return
+                with mmap.mmap(target.fileno(), total_size) as target_map:
+                    output = np.frombuffer(target_map, dtype=np.uint8)
+                    try:
+                        position = 0
+                        for offset, plain_length, encrypted_length in frames:
+                            decrypted = aes_decrypt(source_view[offset:offset + encrypted_length], aes_key)
+                            output[position:position + plain_length] = \
+                                unpermute_payload(decrypted, aes_key, layout)[:plain_length]
+                            position += plain_length
+                    except Exception as e:
+                        # Frames of the traceback hold slices of both maps, which could not be closed otherwise
+                        traceback.clear_frames(e.__traceback__)
+                        raise
+                    finally:
+                        del output  # Release the buffer export before the map closes
+                    target_map.flush()
+    except Exception:
+        # Do not leave a partially decrypted file behind
+        if created:
+            os.remove(output_path)
+        raise
+
+def _scan_frames(view: memoryview) -> list:
+    # Walk the frame headers, returning the layout and (data offset, plaintext length, encrypted length) per frame
+    if len(view) < STREAM_HEADER.size:
+        raise ValueError("Truncated stream: unexpected end of input.")
+    block_size, layout = parse_stream_header(view)
+
+    frames = []
+    position = STREAM_HEADER.size
+    while True:
+        if position + FRAME_HEADER.size > len(view):
+            raise ValueError("Truncated stream: unexpected end of input.")
+        plain_length, encrypted_length = FRAME_HEADER.unpack_from(view, position)
+        position += FRAME_HEADER.size
+        if encrypted_length == 0:
+            return layout, frames
+        if plain_length > block_size or position + encrypted_length > len(view):
+            raise ValueError("Corrupt or truncated stream.")
+        frames.append((position, plain_length, encrypted_length))
+        position += encrypted_length
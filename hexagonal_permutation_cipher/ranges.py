@@ -0,0 +1,121 @@
+import io
+import numpy as np
+from .aes import aes_decrypt_chunks
+from .container import HEADER, MODE_NAMES, is_container
+from .encryption import derive_key, check_container, container_cells, container_permutation
+from .feistel import FeistelPermutation
+from .utils import inverse_permutation_indices
+
+
+class CipherReader(io.RawIOBase):
+    """
+    A seekable, read-only file over the plaintext of a ciphertext container.
+
+    Reads decrypt only the AES chunks holding the requested bytes: the inverse permutation maps
+    each plaintext offset to its position in the permuted payload, and the fixed chunk stride
+    locates the chunk holding that position.
+
+    Attributes:
+    ----------
+    size : int
+        The plaintext length.
+
+    Methods:
+    -------
+    read_range(offset: int, length: int) -> bytes
+        Decrypt a plaintext byte range without changing the position.
+    """
+
+    def __init__(self, encrypted_data: bytes, key: str):
+        super().__init__()
+        if not is_container(encrypted_data):
+            raise ValueError("Random access needs a ciphertext container (encrypt with container=True).")
+        self._header = check_container(encrypted_data)
+        self._header_bytes = bytes(encrypted_data[:HEADER.size])  # Authenticated with every GCM chunk
+        self._body = memoryview(encrypted_data)[HEADER.size:]
+        self._aes_key = derive_key(key)
+        self._cells = container_cells(self._header)
+        # Feistel containers map just the requested offsets, without building the inverse table
+        self._feistel = (FeistelPermutation(self._cells, self._aes_key)
+                         if container_permutation(self._header) == 'feistel' else None)
+        self._position = 0
+        self.size = self._header.length
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Decrypt a plaintext byte range.
+
+        Args:
+            offset (int): The first plaintext byte to return.
+            length (int): The number of bytes to return.
+
+        Returns:
+            bytes: The plaintext bytes, fewer than length if the range runs past the end.
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("Offset and length must not be negative.")
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return b''
+
+        chunk_size = self._header.chunk_size
+        if self._feistel is not None:
+            positions = self._feistel.inverse(np.arange(offset, end, dtype=np.uint64))
+        else:
+            positions = inverse_permutation_indices(self._cells, self._aes_key)[offset:end]
+        chunk_ids = positions // chunk_size
+        needed = np.unique(chunk_ids)
+
+        decrypted = aes_decrypt_chunks(self._body, self._aes_key, needed.tolist(), self._cells,
+                                       chunk_size, MODE_NAMES[self._header.mode], self._header_bytes)
+        chunks = np.zeros((len(needed), chunk_size), dtype=np.uint8)
+        for row, chunk in enumerate(decrypted):
+            chunks[row, :len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+
+        rows = np.searchsorted(needed, chunk_ids)
+        return chunks[rows, positions % chunk_size].tobytes()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position.")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        data = self.read_range(self._position, len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+def decrypt_range(encrypted_data: bytes, key: str, offset: int, length: int) -> bytes:
+    """
+    Decrypt a plaintext byte range of a ciphertext container without decrypting all of it.
+
+    Args:
+        encrypted_data (bytes): The container.
+        key (str): The decryption key.
+        offset (int): The first plaintext byte to return.
+        length (int): The number of bytes to return.
+
+    Returns:
+        bytes: The plaintext bytes, fewer than length if the range runs past the end.
+    """
+    return CipherReader(encrypted_data, key).read_range(offset, length)
@@ -0,0 +1,255 @@
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Callable, NamedTuple, Optional
+import numpy as np
+from . import metrics
+
+# On-disk store of precomputed permutation tables. Tables are int32 .npy files loaded with
+# mmap_mode='r', so every process using the same store shares their pages through the OS
+# page cache instead of regenerating and holding its own copy.
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+DEFAULT_MIN_CELLS = 1024 * 1024  # Smaller tables are cheaper to generate than to load
+MAX_CELLS = int(np.iinfo(np.int32).max)  # Larger tables would not fit int32 indices
+STORE_ENV = 'HPC_PERMUTATION_STORE'
+TABLE_KINDS = ('permutation', 'inverse')
+
+
+class StoreStats(NamedTuple):
+    """
+    A snapshot of the counters of a `PermutationStore`.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    corrupt: int
+    files: int
+    bytes: int
+
+
+def key_fingerprint(key: bytes) -> str:
+    """
+    Derive the file name prefix of a key's tables, without revealing the key.
+
+    Args:
+        key (bytes): The derived key.
+
+    Returns:
+        str: A hex fingerprint of the key.
+    """
+    return hashlib.sha256(b'hpc-permutation-store\x00' + key).hexdigest()[:32]
+
+
+class PermutationStore:
+    """
+    A directory of permutation and inverse-permutation tables keyed by key fingerprint and
+    cell count.
+
+    Every table has a .sha256 sidecar that is checked the first time a process loads it;
+    tables that fail the check are discarded and rebuilt. Grids with more than MAX_CELLS
+    cells are never stored, since their indices do not fit int32. When the tables outgrow max_bytes,
+    the least recently used ones are deleted. The tables are derived from the key, so the
+    directory should be as private as the key itself.
+
+    Attributes:
+    ----------
+    directory : str
+        The directory holding the tables.
+    max_bytes : int
+        The size limit of all tables together.
+    min_cells : int
+        Grids with fewer cells are not stored.
+
+    Methods:
+    -------
+    get_or_create(kind: str, key: bytes, cells: int, factory: Callable) -> np.ndarray
+        Load a table, or build, store and load it.
+    stats() -> StoreStats
+        Return the store counters.
+    clear()
+        Delete every table.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, min_cells: int = DEFAULT_MIN_CELLS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_cells = min_cells
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._corrupt = 0
+        self._verified = {}  # Path -> (inode, size) of the file whose checksum this process checked
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, kind: str, key: bytes, cells: int) -> str:
+        return os.path.join(self.directory, f"{key_fingerprint(key)}-{cells}-{kind}.npy")
+
+    def get_or_create(self, kind: str, key: bytes, cells: int, factory: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Return a stored table, building and storing it on a miss.
+
+        Args:
+            kind (str): 'permutation' or 'inverse'.
+            key (bytes): The derived key.
+            cells (int): The number of cells in the grid.
+            factory (Callable[[], np.ndarray]): Builds the table on a miss.
+
+        Returns:
+            np.ndarray: The table as a read-only, memory-mapped int32 array, or the factory's own
+            table when the grid has more than MAX_CELLS cells.
+        """
+        if kind not in TABLE_KINDS:
+            raise ValueError(f"Unknown table kind: {kind!r} (expected one of {', '.join(TABLE_KINDS)}).")
+        if cells > MAX_CELLS:
+            return factory()
+        path = self._path(kind, key, cells)
+        table = self._load(path, cells)
+        if table is not None:
+            with self._lock:
+                self._hits += 1
+            metrics.count('store_hits')
+            return table
+
+        with self._lock:
+            self._misses += 1
+        metrics.count('store_misses')
+        self._save(path, np.asarray(factory(), dtype=np.int32))
+        self._evict(keep=path)
+        table = self._load(path, cells)
+        # The file can vanish between saving and loading if another process evicts it
+        return table if table is not None else np.asarray(factory(), dtype=np.int32)
+
+    def _load(self, path: str, cells: int) -> Optional[np.ndarray]:
+        try:
+            stat = os.stat(path)
+            table = np.load(path, mmap_mode='r', allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+
+        # A replaced file has a new inode, so it is checked again
+        identity = (stat.st_ino, stat.st_size)
+        with self._lock:
+            verified = self._verified.get(path) == identity
+        if table.dtype != np.int32 or table.shape != (cells,) or not table.flags.c_contiguous:
+            verified = False
+        elif not verified:
+            try:
+                with open(path + '.sha256') as handle:
+                    verified = hashlib.sha256(table).hexdigest() == handle.read().strip()
+            except OSError:
+                return None
+        if not verified:
+            with self._lock:
+                self._corrupt += 1
+            self._remove(path)
+            return None
+
+        with self._lock:
+            self._verified[path] = identity
+
+        os.utime(path)  # Mark as recently used for eviction
+        return table
+
+    def _save(self, path: str, table: np.ndarray):
+        # Write to a temporary file and rename it, so readers never see a partial table
+        digest = hashlib.sha256(np.ascontiguousarray(table)).hexdigest()
+        for target, write in ((path + '.sha256', lambda handle: handle.write(digest.encode())),
+                              (path, lambda handle: np.save(handle, table, allow_pickle=False))):
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as handle:
+                    write(handle)
+                os.replace(temporary, target)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+
+    def _remove(self, path: str):
+        with self._lock:
+            self._verified.pop(path, None)
+        for target in (path, path + '.sha256'):
+            try:
+                os.unlink(target)
+            except FileNotFoundError:
+                pass
+
+    def _tables(self) -> list:
+        tables = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                tables.append((stat.st_mtime, stat.st_size, entry.path))
+        return tables
+
+    def _evict(self, keep: str):
+        # Delete the least recently used tables until the store fits its limit
+        tables = sorted(self._tables())
+        total = sum(size for _, size, _ in tables)
+        for _, size, path in tables:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+            with self._lock:
+                self._evictions += 1
+
+    def stats(self) -> StoreStats:
+        """
+        Return a snapshot of the store counters.
+
+        Returns:
+            StoreStats: The hit, miss, eviction and corruption counters with the current file count
+            and size.
+        """
+        tables = self._tables()
+        with self._lock:
+            return StoreStats(self._hits, self._misses, self._evictions, self._corrupt,
+                              len(tables), sum(size for _, size, _ in tables))
+
+    def clear(self):
+        """
+        Delete every table in the store.
+        """
+        for _, _, path in self._tables():
+            self._remove(path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def configure_permutation_store(directory: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES,
+                                min_cells: int = DEFAULT_MIN_CELLS) -> Optional[PermutationStore]:
+    """
+    Enable, replace or disable the on-disk permutation store.
+
+    The store can also be enabled by setting the HPC_PERMUTATION_STORE environment variable
+    to a directory, which also covers freshly spawned worker processes.
+
+    Args:
+        directory (str, optional): The directory holding the tables, or None to disable the store.
+        max_bytes (int): The size limit of all tables together. Default is 4 GiB.
+        min_cells (int): Grids with fewer cells are not stored. Default is 1 Mi cells.
+
+    Returns:
+        PermutationStore: The new store, or None if disabled.
+    """
+    global _store
+    with _store_lock:
+        _store = PermutationStore(directory, max_bytes, min_cells) if directory else None
+        return _store
+
+def get_permutation_store() -> Optional[PermutationStore]:
+    """
+    Return the configured permutation store, if any.
+
+    Returns:
+        PermutationStore: The store, or None if disabled.
+    """
+    return _store
+
+if os.environ.get(STORE_ENV):
+    configure_permutation_store(os.environ[STORE_ENV])
@@ -0,0 +1,248 @@
+import struct
+import sys
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator
+from .aes import aes_encrypt, aes_decrypt, encrypted_size
+from .container import LAYOUT_FLAGS
+from .encryption import derive_key, permute_payload, unpermute_payload
+from .grid import LAYOUTS, payload_cell_count
+
+# Stream format: header, then frames of (plaintext length, encrypted length, encrypted block),
+# closed by an empty frame so truncated streams are detected
+STREAM_MAGIC = b'HPCS'
+STREAM_VERSION = 1
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+# Every frame is permuted over this layout unless another is requested; partial grids need no padding
+DEFAULT_STREAM_LAYOUT = 'partial'
+
+STREAM_HEADER = struct.Struct('>4sBBI')  # magic, version, layout flag (as in containers), block size
+FRAME_HEADER = struct.Struct('>II')  # plaintext length, encrypted length
+
+# Block sizes and encrypted frame lengths are recorded in the 32-bit fields of the headers
+MAX_BLOCK_SIZE = 2 ** 32 - 1
+MAX_FRAME_SIZE = 2 ** 32 - 1
+
+def check_block_size(block_size: int, layout: str = DEFAULT_STREAM_LAYOUT) -> int:
+    """
+    Validate a stream block size.
+
+    Args:
+        block_size (int): The number of plaintext bytes per block.
+        layout (str): The layout every frame is permuted over. Default is 'partial'.
+
+    Returns:
+        int: The block size.
+
+    Raises:
+        ValueError: If the block size is not positive, or a full block does not fit the stream
+            header or its encrypted length does not fit the frame header.
+    """
+    if not 0 < block_size <= MAX_BLOCK_SIZE:
+        raise ValueError(f"Block size must be between 1 and {MAX_BLOCK_SIZE} bytes, got {block_size}.")
+    if layout in LAYOUTS and encrypted_size(payload_cell_count(block_size, layout)) > MAX_FRAME_SIZE:
+        raise ValueError(f"Block size {block_size} is too large for the {layout!r} layout: an encrypted block "
+                         f"must fit in {MAX_FRAME_SIZE} bytes.")
+    return block_size
+
+def pack_stream_header(block_size: int, layout: str = DEFAULT_STREAM_LAYOUT) -> bytes:
+    """
+    Serialize a stream header.
+
+    Args:
+        block_size (int): The plaintext block size.
+        layout (str): The layout every frame is permuted over. Default is 'partial'.
+
+    Returns:
+        bytes: The packed header.
+
+    Raises:
+        ValueError: If the block size or layout is invalid.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout!r} (expected one of {', '.join(LAYOUTS)}).")
+    return STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, LAYOUT_FLAGS[layout],
+                              check_block_size(block_size, layout))
+
+def parse_stream_header(data) -> tuple:
+    """
+    Parse the header at the start of a stream.
+
+    Args:
+        data (bytes-like): At least the first STREAM_HEADER.size bytes of the stream.
+
+    Returns:
+        tuple: The block size and the layout of the frames.
+
+    Raises:
+        ValueError: If the data is not a stream header of a supported version and layout.
+    """
+    magic, version, flags, block_size = STREAM_HEADER.unpack_from(data, 0)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise ValueError("Not an encrypted HPC stream (bad header).")
+    for layout, flag in LAYOUT_FLAGS.items():
+        if flags == flag:
+            return block_size, layout
+    raise ValueError("Unsupported stream options.")
+
+def read_blocks(source: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Read a binary stream in blocks of a bounded size.
+
+    Args:
+        source (BinaryIO): The stream to read.
+        block_size (int): The size of every block but the last. Default is 1 MiB.
+
+    Yields:
+        bytes: The next block of the stream.
+    """
+    while True:
+        block = source.read(block_size)
+        # Pipes and sockets may return short reads, top the block up before framing it
+        while block and len(block) < block_size:
+            more = source.read(block_size - len(block))
+            if not more:
+                break
+            block += more
+        if not block:
+            return
+        yield block
+
+def _read_exact(source: BinaryIO, size: int) -> bytes:
+    data = source.read(size)
+    while len(data) < size:
+        more = source.read(size - len(data))
+        if not more:
+            raise ValueError("Truncated stream: unexpected end of input.")
+        data += more
+    return data
+
+def encrypt_frame(block, aes_key: bytes, layout: str = DEFAULT_STREAM_LAYOUT) -> bytes:
+    """
+    Encrypt one plaintext block into a stream frame.
+
+    Args:
+        block (bytes-like): The plaintext block.
+        aes_key (bytes): The derived key.
+        layout (str): The layout recorded in the stream header. Default is 'partial'.
+
+    Returns:
+        bytes: The frame header followed by the encrypted block.
+    """
+    encrypted_block = aes_encrypt(memoryview(permute_payload(block, aes_key, layout)), aes_key)
+    return FRAME_HEADER.pack(len(block), len(encrypted_block)) + encrypted_block
+
+def decrypt_frame(plain_length: int, encrypted_block: bytes, aes_key: bytes,
+                  layout: str = DEFAULT_STREAM_LAYOUT) -> bytes:
+    """
+    Decrypt the body of one stream frame.
+
+    Args:
+        plain_length (int): The plaintext length recorded in the frame header.
+        encrypted_block (bytes): The encrypted block following the frame header.
+        aes_key (bytes): The derived key.
+        layout (str): The layout recorded in the stream header. Default is 'partial'.
+
+    Returns:
+        bytes: The plaintext block.
+    """
+    padded = unpermute_payload(aes_decrypt(encrypted_block, aes_key), aes_key, layout)
+    return padded[:plain_length].tobytes()
+
+def encrypt_blocks(blocks: Iterable[bytes], key: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                   layout: str = DEFAULT_STREAM_LAYOUT) -> Iterator[bytes]:
+    """
+    Encrypt a sequence of plaintext blocks into the framed stream format.
+
+    Args:
+        blocks (Iterable[bytes]): The plaintext blocks, each at most block_size bytes long.
+        key (str): The encryption key.
+        block_size (int): The block size recorded in the stream header. Default is 1 MiB.
+        layout (str): The layout every block is permuted over, recorded in the stream header.
+            Default is 'partial', which adds no padding.
+
+    Yields:
+        bytes: The stream header, one frame per block, then the end-of-stream frame.
+
+    Raises:
+        ValueError: If the block size or layout is invalid or a block exceeds the block size.
+    """
+    header = pack_stream_header(block_size, layout)
+    aes_key = derive_key(key)
+    yield header
+
+    for block in blocks:
+        if len(block) > block_size:
+            raise ValueError(f"Block of {len(block)} bytes exceeds the block size of {block_size} bytes.")
+        yield encrypt_frame(block, aes_key, layout)
+
+    yield FRAME_HEADER.pack(0, 0)
+
+def decrypt_blocks(source: BinaryIO, key: str) -> Iterator[bytes]:
+    """
+    Decrypt a framed stream produced by `encrypt_blocks`.
+
+    Args:
+        source (BinaryIO): The encrypted stream.
+        key (str): The decryption key.
+
+    Yields:
+        bytes: The decrypted plaintext blocks.
+
+    Raises:
+        ValueError: If the stream header is invalid or the stream is truncated.
+    """
+    aes_key = derive_key(key)
+    block_size, layout = parse_stream_header(_read_exact(source, STREAM_HEADER.size))
+
+    while True:
+        plain_length, encrypted_length = FRAME_HEADER.unpack(_read_exact(source, FRAME_HEADER.size))
+        if encrypted_length == 0:
+            return
+        if plain_length > block_size:
+            raise ValueError("Corrupt stream: frame is larger than the block size.")
+        yield decrypt_frame(plain_length, _read_exact(source, encrypted_length), aes_key, layout)
+
+@contextmanager
+def _open_binary(path: str, mode: str):
+    # '-' stands for stdin/stdout
+    if path == '-':
+        yield sys.stdin.buffer if 'r' in mode else sys.stdout.buffer
+    else:
+        with open(path, mode) as handle:
+            yield handle
+
+def encrypt_file(input_path: str, output_path: str, key: str, block_size: int = DEFAULT_BLOCK_SIZE,
+                 layout: str = DEFAULT_STREAM_LAYOUT):
+    """
+    Encrypt a file block by block with constant memory use.
+
+    Args:
+        input_path (str): The file to encrypt, or '-' for stdin.
+        output_path (str): The file to write, or '-' for stdout.
+        key (str): The encryption key.
+        block_size (int): The plaintext block size. Default is 1 MiB.
+        layout (str): The layout every block is permuted over. Default is 'partial'.
+
+    Raises:
+        ValueError: If the block size or layout is invalid.
+    """
+    pack_stream_header(block_size, layout)  # Validate before the output file is created
+    with _open_binary(input_path, 'rb') as source, _open_binary(output_path, 'wb') as target:
+        for frame in encrypt_blocks(read_blocks(source, block_size), key, block_size, layout):
+            target.write(frame)
+        target.flush()
+
+def decrypt_file(input_path: str, output_path: str, key: str):
+    """
+    Decrypt a file produced by `encrypt_file` block by block with constant memory use.
+
+    Args:
+        input_path (str): The file to decrypt, or '-' for stdin.
+        output_path (str): The file to write, or '-' for stdout.
+        key (str): The decryption key.
+    """
+    with _open_binary(input_path, 'rb') as source, _open_binary(output_path, 'wb') as target:
+        for block in decrypt_blocks(source, key):
+            target.write(block)
+        target.flush()
@@ -1,6 +1,67 @@
 import numpy as np
+from .cache import grid_cache
+from . import metrics
+from .store import get_permutation_store
 from .grid import Matrix
 
+def _generate_permutation(size: int, key: bytes) -> np.ndarray:
+    # Create a random number generator with the provided key as seed
+    seed = int.from_bytes(key, byteorder='big')
+    rng = np.random.default_rng(seed)
+    indices = rng.permutation(size)
+    indices.setflags(write=False)  # Shared through the cache
+    return indices
+
+def permutation_indices(size: int, key: bytes, use_cache: bool = True) -> np.ndarray:
+    """
+    Generate the key-derived permutation of the cell indices of a grid.
+
+    Large grids go through the on-disk permutation store when one is configured.
+
+    Args:
+        size (int): The number of cells in the grid.
+        key (bytes): The key used for permutation.
+        use_cache (bool): Look the permutation up in the shared LRU cache. Default is True.
+
+    Returns:
+        np.ndarray: The permuted cell indices (read-only).
+    """
+    if not use_cache:
+        return _generate_permutation(size, key)
+    def build():
+        return _stored('permutation', key, size, lambda: _generate_permutation(size, key))
+
+    return grid_cache.get_or_create(('permutation', key, size), build)
+
+def _stored(kind: str, key: bytes, size: int, factory):
+    # Go through the on-disk store for grids large enough to be worth it
+    store = get_permutation_store()
+    if store is None or size < store.min_cells:
+        return factory()
+    return store.get_or_create(kind, key, size, factory)
+
+def inverse_permutation_indices(size: int, key: bytes) -> np.ndarray:
+    """
+    Return the inverse of `permutation_indices(size, key)` from the shared LRU cache.
+
+    Position `inverse[i]` of a permuted payload holds cell `i` of the original payload.
+
+    Args:
+        size (int): The number of cells in the grid.
+        key (bytes): The key used for permutation.
+
+    Returns:
+        np.ndarray: The inverse permutation (read-only).
+    """
+    def build():
+        indices = permutation_indices(size, key)
+        inverse = np.empty(size, dtype=indices.dtype)
+        inverse[indices] = np.arange(size, dtype=indices.dtype)
+        inverse.setflags(write=False)
+        return inverse
+
+    return grid_cache.get_or_create(('inverse', key, size), lambda: _stored('inverse', key, size, build))
+
 def permute_grid(grid: np.ndarray, key: bytes) -> np.ndarray:
     """
     Permute the hexagonal grid using a key.
@@ -12,22 +73,19 @@ def permute_grid(grid: np.ndarray, key: bytes) -> np.ndarray:
     Returns:
         np.ndarray: The permuted hexagonal grid.
     """
-    matrix = Matrix(grid)
-    flat_grid = matrix.flat
-    size = len(flat_grid)
-
-    # Create a random number generator with the provided key as seed
-    seed = int.from_bytes(key, byteorder='big')
-    rng = np.random.default_rng(seed)
+    with metrics.stage('permute_grid'):
+        matrix = Matrix(grid)
+        flat_grid = matrix.flat
+        size = len(flat_grid)
 
-    # Generate permuted indices for the flat grid
-    permuted_indices = rng.permutation(size)
+        # Generate permuted indices for the flat grid
+        permuted_indices = permutation_indices(size, key)
 
-    # Create a new flat grid with permuted values
-    permuted_flat_grid = flat_grid[permuted_indices]
+        # Create a new flat grid with permuted values
+        permuted_flat_grid = flat_grid[permuted_indices]
 
-    # Convert the flat permuted grid back to 2D numpy array representation
-    return matrix.to_2d(permuted_flat_grid)
+        # Convert the flat permuted grid back to 2D numpy array representation
+        return matrix.to_2d(permuted_flat_grid)
 
 def text_to_matrix(text: str, grid: np.ndarray) -> np.ndarray:
     """
@@ -40,6 +98,7 @@ def text_to_matrix(text: str, grid: np.ndarray) -> np.ndarray:
     Returns:
         np.ndarray: The matrix representation of the text.
     """
-    flat_grid_length = grid.size
-    padded_text = text.ljust(flat_grid_length)  # Pad text to fit into the grid
-    return np.array(list(padded_text)).reshape(grid.shape)
+    with metrics.stage('matrix_conversion'):
+        flat_grid_length = grid.size
+        padded_text = text.ljust(flat_grid_length)  # Pad text to fit into the grid
+        return np.array(list(padded_text)).reshape(grid.shape)
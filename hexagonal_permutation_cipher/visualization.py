@@ -1,12 +1,44 @@
+import os
 import numpy as np
+
+# Keep pygame's import banner off stdout, which may be carrying ciphertext
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
 import pygame
 import math
-import random
-from typing import Tuple
+import concurrent.futures
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import sys
 from contextlib import redirect_stdout, redirect_stderr
 from io import StringIO
 
+# Everything that does not change between frames (hexagon shapes, glyphs, the scanline overlay
+# and the hexagons revealed so far) is rendered once and blitted afterwards; a frame only draws
+# its newly revealed cells and, if enabled, the noise. Moving the camera redraws the visible cells.
+HEX_COLOR = (0, 100, 0)  # pygame's 'darkgreen'
+TEXT_COLOR = (0, 255, 0)  # pygame's 'green'
+HEX_SIZE = 30
+FONT_SIZE = 24
+NOISE_AMOUNT = 0.02
+
+# Camera limits and level of detail: below GLYPH_MIN_RADIUS pixels hexagons lose their labels,
+# below POLYGON_MIN_RADIUS they are drawn as square blocks of pixels
+MIN_ZOOM = 0.002
+MAX_ZOOM = 8.0
+ZOOM_FACTOR = 1.25
+PAN_PIXELS = 40
+GLYPH_MIN_RADIUS = 18
+POLYGON_MIN_RADIUS = 6
+PAN_KEYS = {pygame.K_LEFT: (PAN_PIXELS, 0), pygame.K_RIGHT: (-PAN_PIXELS, 0),
+            pygame.K_UP: (0, PAN_PIXELS), pygame.K_DOWN: (0, -PAN_PIXELS)}
+
+# Headless export: frames are rendered to offscreen surfaces, in contiguous ranges per task
+FRAME_NAME = 'frame_{:06d}.png'
+EXPORT_FPS = 30
+TASKS_PER_WORKER = 4
+
+_noise_rng = np.random.default_rng()
+
 def hex_coord(x: int, y: int, size: float) -> Tuple[float, float]:
     """
     Calculate the 2D coordinates for a hexagon in a hexagonal grid.
@@ -21,10 +53,28 @@ def hex_coord(x: int, y: int, size: float) -> Tuple[float, float]:
     """
     return (size * (3 / 2 * x), size * (np.sqrt(3) * (y + 0.5 * (x % 2))))
 
-def draw_hex(surface, x: int, y: int, size: float, facecolor: str, text: str, font):
+@lru_cache(maxsize=64)
+def _hex_sprite(size: float, facecolor: Tuple[int, ...]) -> pygame.Surface:
+    # A transparent surface holding one filled hexagon, centred
+    width, height = math.ceil(2 * size * math.cos(math.radians(30))) + 2, math.ceil(2 * size) + 2
+    sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+    hexagon = [
+        (width / 2 + size * math.cos(math.radians(angle)), height / 2 + size * math.sin(math.radians(angle)))
+        for angle in range(30, 360, 60)
+    ]
+    pygame.draw.polygon(sprite, facecolor, hexagon)
+    return sprite
+
+@lru_cache(maxsize=4096)
+def _glyph(font, text: str) -> pygame.Surface:
+    return font.render(text, True, TEXT_COLOR)
+
+def draw_hex(surface, x: int, y: int, size: float, facecolor: str, text: str, font) -> pygame.Rect:
     """
     Draw a hexagon on the Pygame surface.
 
+    The hexagon and its text are rendered once per size, color and font, and blitted from then on.
+
     Args:
         surface : The Pygame surface to draw on.
         x (int): The x-coordinate in the grid.
@@ -33,102 +83,420 @@ def draw_hex(surface, x: int, y: int, size: float, facecolor: str, text: str, fo
         facecolor (str): The color to fill the hexagon.
         text (str): The text to display inside the hexagon.
         font : The font used to render the text.
+
+    Returns:
+        pygame.Rect: The area of the surface that was drawn on.
     """
     xy = hex_coord(x, y, size)
-    hexagon = [
-        (xy[0] + size * math.cos(math.radians(angle)), xy[1] + size * math.sin(math.radians(angle)))
-        for angle in range(30, 360, 60)
-    ]
-    pygame.draw.polygon(surface, facecolor, hexagon)
+    sprite = _hex_sprite(size, tuple(pygame.Color(facecolor)))
+    area = surface.blit(sprite, sprite.get_rect(center=xy))
     # Render the text inside the hexagon
-    text_surf = font.render(text, True, pygame.Color('green'))
-    text_rect = text_surf.get_rect(center=xy)
-    surface.blit(text_surf, text_rect)
+    text_surf = _glyph(font, text)
+    return area.union(surface.blit(text_surf, text_surf.get_rect(center=xy)))
 
-def add_scanlines(surface):
+@lru_cache(maxsize=8)
+def _scanline_overlay(width: int, height: int) -> pygame.Surface:
+    # Opaque lines on every alternate row, transparent in between
+    overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+    overlay.fill(HEX_COLOR + (0,))
+    alpha = pygame.surfarray.pixels_alpha(overlay)
+    alpha[:, ::2] = 255
+    del alpha  # Release the pixel lock
+    return overlay
+
+def add_scanlines(surface, area=None):
     """
     Add scanlines to the surface to create a retro monitor effect.
 
     Args:
         surface : The surface to draw on.
+        area (pygame.Rect, optional): Only add scanlines inside this rectangle. Default is the whole surface.
     """
-    width, height = surface.get_size()
-    for y in range(0, height, 2):  # Adding horizontal lines at every alternate row
-        pygame.draw.line(surface, pygame.Color('darkgreen'), (0, y), (width, y))
+    overlay = _scanline_overlay(*surface.get_size())
+    if area is None:
+        surface.blit(overlay, (0, 0))
+    else:
+        surface.blit(overlay, area, area)
 
-def add_noise(surface, amount=0.02):
+@lru_cache(maxsize=8)
+def _noise_surface(width: int, height: int) -> pygame.Surface:
+    noise_surf = pygame.Surface((width, height), pygame.SRCALPHA)
+    noise_surf.fill((0, 0, 0, 0))
+    return noise_surf
+
+def add_noise(surface, amount=0.02, rng=None):
     """
     Add noise to the surface to create a retro monitor effect.
 
     Args:
         surface : The surface to draw on.
         amount (float): The amount of noise to add. Default is 0.02.
+        rng (np.random.Generator, optional): The noise source. Default is a shared generator.
     """
     width, height = surface.get_size()
-    noise_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-    for _ in range(int(width * height * amount)):
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        color = (0, random.randint(50, 255), 0, random.randint(50, 100))  # Greenish noise
-        noise_surf.set_at((x, y), color)
+    count = int(width * height * amount)
+    rng = rng or _noise_rng
+    noise_surf = _noise_surface(width, height)
+
+    # Write greenish pixels straight into the surface's pixel buffers
+    rgb = pygame.surfarray.pixels3d(noise_surf)
+    alpha = pygame.surfarray.pixels_alpha(noise_surf)
+    alpha[:] = 0
+    xs, ys = rng.integers(0, width, count), rng.integers(0, height, count)
+    rgb[xs, ys, 1] = rng.integers(50, 256, count)
+    alpha[xs, ys] = rng.integers(50, 101, count)
+    del rgb, alpha  # Release the pixel locks before blitting
     surface.blit(noise_surf, (0, 0))
 
-def animate_permutation(grid: np.ndarray, key: bytes, width=800, height=600):
+
+class Camera:
+    """
+    The view onto the grid: a zoom factor and the screen position of the grid's origin.
+
+    Attributes:
+    ----------
+    zoom : float
+        Screen pixels per grid pixel at the default hexagon size.
+    offset : np.ndarray
+        The screen position of the grid's origin.
+
+    Methods:
+    -------
+    to_screen(points: np.ndarray) -> np.ndarray
+        Map grid positions to screen positions.
+    zoom_at(factor: float, pivot: Tuple[float, float])
+        Zoom while keeping the grid point under the pivot in place.
+    pan(dx: float, dy: float)
+        Move the view by a screen distance.
+    """
+
+    def __init__(self, zoom: float = 1.0, offset: Tuple[float, float] = (0.0, 0.0)):
+        self.zoom = zoom
+        self.offset = np.array(offset, dtype=float)
+
+    @classmethod
+    def fitting(cls, low: np.ndarray, high: np.ndarray, width: int, height: int, margin: float = HEX_SIZE):
+        """
+        Return the identity view if the bounds fit the window, otherwise a view that zooms out
+        to show all of them, centred.
+
+        Args:
+            low (np.ndarray): The smallest grid position.
+            high (np.ndarray): The largest grid position.
+            width (int): The window width.
+            height (int): The window height.
+            margin (float): Space kept around the bounds, in grid pixels. Default is the hexagon size.
+
+        Returns:
+            Camera: The view.
+        """
+        extent = np.asarray(high, dtype=float) - low + 2 * margin
+        zoom = min(1.0, width / extent[0], height / extent[1])
+        if zoom == 1.0:
+            return cls()
+        centre = (np.asarray(low, dtype=float) + high) / 2
+        return cls(zoom, (width / 2 - centre[0] * zoom, height / 2 - centre[1] * zoom))
+
+    def to_screen(self, points: np.ndarray) -> np.ndarray:
+        return points * self.zoom + self.offset
+
+    def zoom_at(self, factor: float, pivot: Tuple[float, float]):
+        zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        pivot = np.asarray(pivot, dtype=float)
+        self.offset = pivot - (pivot - self.offset) * (zoom / self.zoom)
+        self.zoom = zoom
+
+    def pan(self, dx: float, dy: float):
+        self.offset = self.offset + (dx, dy)
+
+
+def visible_cells(screen: np.ndarray, radius: float, width: int, height: int) -> np.ndarray:
+    """
+    Find the cells whose hexagons overlap the viewport.
+
+    Args:
+        screen (np.ndarray): The screen positions of the cell centres, one row per cell.
+        radius (float): The hexagon radius in screen pixels.
+        width (int): The viewport width.
+        height (int): The viewport height.
+
+    Returns:
+        np.ndarray: A boolean mask over the cells.
+    """
+    x, y = screen[:, 0], screen[:, 1]
+    return (x > -radius) & (x < width + radius) & (y > -radius) & (y < height + radius)
+
+
+class _PermutationCanvas:
+    # The hexagons revealed so far, on an offscreen surface with the scanlines baked in. Only
+    # cells inside the viewport are drawn, with less detail as the camera zooms out.
+
+    def __init__(self, grid: np.ndarray, key: bytes, width: int, height: int, font, size: float = HEX_SIZE,
+                 camera: Optional[Camera] = None):
+        self.surface = pygame.Surface((width, height))
+        self.font = font
+        self.size = size
+
+        self.labels = [str(value) for value in grid.flatten()]
+        ys, xs = np.divmod(np.arange(len(self.labels)), grid.shape[1])
+        self.centres = np.stack([size * (3 / 2 * xs), size * (np.sqrt(3) * (ys + 0.5 * (xs % 2)))], axis=1)
+        self.camera = camera or Camera()
+
+        # Create a random number generator with the provided key as seed
+        seed = int.from_bytes(key, byteorder='big')
+        rng = np.random.default_rng(seed)
+        self.order = rng.permutation(len(self.labels))
+        self.revealed = 0
+        self.shown = np.zeros(len(self.labels), dtype=bool)  # Revealed cells, in grid order
+        self.redraw()
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def fit_camera(self) -> Camera:
+        width, height = self.surface.get_size()
+        return Camera.fitting(self.centres.min(axis=0), self.centres.max(axis=0), width, height)
+
+    def reveal(self, stop: int) -> Optional[pygame.Rect]:
+        # Draw the cells revealed up to this step and return the area that changed
+        cells = self.order[self.revealed:stop]
+        self.revealed = max(self.revealed, stop)
+        self.shown[cells] = True
+        screen = self.camera.to_screen(self.centres[cells])
+        visible = visible_cells(screen, self.size * self.camera.zoom, *self.surface.get_size())
+        return self._draw(cells[visible], screen[visible])
+
+    def redraw(self):
+        # Start over after the camera moved, culling in grid order to keep memory access sequential
+        self.surface.fill((0, 0, 0))  # Dark background for retro look
+        screen = self.camera.to_screen(self.centres)
+        cells = np.flatnonzero(visible_cells(screen, self.size * self.camera.zoom, *self.surface.get_size())
+                               & self.shown)
+        self._draw(cells, screen[cells])
+        add_scanlines(self.surface)
+
+    def _draw(self, cells: np.ndarray, screen: np.ndarray) -> Optional[pygame.Rect]:
+        # Draw visible cells at their screen positions, with detail depending on the zoom
+        if not len(cells):
+            return None
+        radius = self.size * self.camera.zoom
+
+        if radius < POLYGON_MIN_RADIUS:
+            # Small hexagons collapse to blocks of pixels: mark the centres on a coverage mask,
+            # grow it into blocks and write the mask into the surface in one assignment
+            width, height = self.surface.get_size()
+            side = max(1, int(radius * 3 / 2))
+            x = np.clip(screen[:, 0].astype(int) - side // 2, 0, width - 1)
+            y = np.clip(screen[:, 1].astype(int) - side // 2, 0, height - 1)
+            centres = np.zeros((width, height), dtype=bool)
+            centres.ravel()[x * height + y] = True
+            covered = centres.copy()
+            for dx in range(side):
+                for dy in range(side):
+                    covered[dx:, dy:] |= centres[:width - dx, :height - dy]
+            pixels = pygame.surfarray.pixels2d(self.surface)
+            pixels[covered] = self.surface.map_rgb(HEX_COLOR)
+            del pixels  # Release the pixel lock
+            columns, rows = np.flatnonzero(covered.any(axis=1)), np.flatnonzero(covered.any(axis=0))
+            area = pygame.Rect(int(columns[0]), int(rows[0]), int(columns[-1] - columns[0]) + 1,
+                               int(rows[-1] - rows[0]) + 1)
+        else:
+            sprite = _hex_sprite(round(radius * 2) / 2, HEX_COLOR)  # Half-pixel steps bound the sprite cache
+            centres = [tuple(centre) for centre in screen.tolist()]
+            blits = [(sprite, sprite.get_rect(center=centre)) for centre in centres]
+            if radius >= GLYPH_MIN_RADIUS:
+                for index, centre in zip(cells.tolist(), centres):
+                    text_surf = _glyph(self.font, self.labels[index])
+                    blits.append((text_surf, text_surf.get_rect(center=centre)))
+            rects = self.surface.blits(blits)
+            area = rects[0].unionall(rects[1:])
+
+        area = area.clip(self.surface.get_rect())
+        add_scanlines(self.surface, area)
+        return area
+
+
+def animate_permutation(grid: np.ndarray, key: bytes, width=800, height=600, noise: float = NOISE_AMOUNT,
+                        step: int = 1):
     """
     Animate the permutation process of the hexagonal grid.
 
+    Each frame reveals step more cells. Only the new cells are drawn; with noise=0 only their
+    area of the window is updated. Grids larger than the window start zoomed out to fit.
+    Zoom with the mouse wheel or +/-, pan by dragging or with the arrow keys, and press 0 to
+    reset the view. Only cells inside the window are drawn; when zoomed out, labels are left
+    out and then hexagons collapse to pixels. The window stays open for exploring once every
+    cell is revealed.
+
     Args:
         grid (np.ndarray): The original hexagonal grid.
         key (bytes): The key used for permutation.
         width (int): The width of the Pygame window. Default is 800.
         height (int): The height of the Pygame window. Default is 600.
+        noise (float): The fraction of pixels covered by noise each frame. Default is 0.02.
+        step (int): Cells revealed per frame. Default is 1.
     """
     # Temporary StringIO objects to suppress the pygame message
-    with StringIO() as f, redirect_stdout(f), redirect_stderr(f):  
+    with StringIO() as f, redirect_stdout(f), redirect_stderr(f):
         pygame.init()
-    
+
     screen = pygame.display.set_mode((width, height))
     pygame.display.set_caption("Hexagonal Permutation Animation")
 
     # Load the retro monospaced/pixel font
-    font = pygame.font.Font(pygame.font.match_font('monospace'), 24)
-    size = 30
-
-    flat_grid = grid.flatten()
-    grid_length = len(flat_grid)
-
-    # Create a random number generator with the provided key as seed
-    seed = int.from_bytes(key, byteorder='big')
-    rng = np.random.default_rng(seed)
-    permuted_indices = rng.permutation(grid_length)
+    font = pygame.font.Font(pygame.font.match_font('monospace'), FONT_SIZE)
+    canvas = _PermutationCanvas(grid, key, width, height, font)
+    canvas.camera = canvas.fit_camera()
+    canvas.redraw()
 
     clock = pygame.time.Clock()
     running = True
     frame = 0
+    frames = -(-len(canvas) // step)
 
-    while running and frame <= grid_length:
+    screen.blit(canvas.surface, (0, 0))
+    pygame.display.flip()
+
+    while running:
+        moved = False
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.MOUSEWHEEL:
+                canvas.camera.zoom_at(ZOOM_FACTOR ** event.y, pygame.mouse.get_pos())
+                moved = True
+            elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+                canvas.camera.pan(*event.rel)
+                moved = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key in PAN_KEYS:
+                    canvas.camera.pan(*PAN_KEYS[event.key])
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    canvas.camera.zoom_at(ZOOM_FACTOR, (width / 2, height / 2))
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    canvas.camera.zoom_at(1 / ZOOM_FACTOR, (width / 2, height / 2))
+                elif event.key == pygame.K_0:
+                    canvas.camera = canvas.fit_camera()
+                else:
+                    continue
+                moved = True
 
-        screen.fill((0, 0, 0))  # Dark background for retro look
+        area = canvas.reveal(min((frame + 1) * step, len(canvas))) if frame < frames else None
+        frame += 1
+        if moved:
+            # Redraw everything once per frame, however many events moved the camera
+            canvas.redraw()
+            dirty = [screen.get_rect()]
+        else:
+            dirty = [area] if area else []
 
-        current_indices = permuted_indices[:frame + 1]
-        current_grid = np.full(grid_length, None)
-        current_grid[current_indices] = flat_grid[current_indices]
+        if noise:
+            screen.blit(canvas.surface, (0, 0))
+            add_noise(screen, noise)
+            pygame.display.flip()
+        elif dirty:
+            for area in dirty:
+                screen.blit(canvas.surface, area, area)
+            pygame.display.update(dirty)
 
-        index = 0
-        for y, row in enumerate(grid):
-            for x, _ in enumerate(row):
-                if current_grid[index] is not None:
-                    draw_hex(screen, x, y, size, pygame.Color('darkgreen'), str(current_grid[index]), font)
-                index += 1
+        clock.tick(30)  # Increase frame rate for smoother animation
 
-        add_scanlines(screen)
-        add_noise(screen)
+    pygame.quit()
 
-        pygame.display.flip()
-        clock.tick(30)  # Increase frame rate for smoother animation
-        frame += 1
 
-    pygame.quit()
\ No newline at end of file
+def _start_headless():
+    # Fonts and surfaces work without a window; the dummy driver keeps SDL off any display
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    with StringIO() as f, redirect_stdout(f), redirect_stderr(f):
+        pygame.font.init()
+    return pygame.font.Font(pygame.font.match_font('monospace'), FONT_SIZE)
+
+def _render_range(grid: np.ndarray, key: bytes, width: int, height: int, noise: float, noise_seed: int,
+                  step: int, start: int, stop: int, directory: Optional[str]) -> list:
+    # Runs in a worker process: renders frames [start, stop), saving PNGs to directory or
+    # returning palette images for a GIF
+    canvas = _PermutationCanvas(grid, key, width, height, _start_headless())
+    canvas.camera = canvas.fit_camera()
+    canvas.redraw()
+    canvas.reveal(min(start * step, len(canvas)))
+
+    frame_surface = pygame.Surface((width, height))
+    results = []
+    for frame in range(start, stop):
+        canvas.reveal(min((frame + 1) * step, len(canvas)))
+        frame_surface.blit(canvas.surface, (0, 0))
+        if noise:
+            # Seeded per frame, so the output does not depend on how frames are split
+            add_noise(frame_surface, noise, np.random.default_rng([noise_seed, frame]))
+
+        if directory is not None:
+            path = os.path.join(directory, FRAME_NAME.format(frame))
+            pygame.image.save(frame_surface, path)
+            results.append(path)
+        else:
+            from PIL import Image
+            image = Image.frombytes('RGB', (width, height), pygame.image.tobytes(frame_surface, 'RGB'))
+            results.append(image.quantize())
+    return results
+
+def export_animation(grid: np.ndarray, key: bytes, output: str, width: int = 800, height: int = 600,
+                     noise: float = NOISE_AMOUNT, step: int = 1, fps: int = EXPORT_FPS,
+                     max_workers: Optional[int] = None, noise_seed: int = 0) -> List[str]:
+    """
+    Render the permutation animation without a display, as fast as the machine allows.
+
+    Frame i shows the first (i + 1) * step revealed cells. Frames are split into contiguous
+    ranges rendered by a process pool and collected in order. Rendering is deterministic:
+    the noise of each frame is seeded by noise_seed and the frame number.
+
+    Args:
+        grid (np.ndarray): The original hexagonal grid.
+        key (bytes): The key used for permutation.
+        output (str): A path ending in .gif for an animated GIF (requires Pillow), otherwise a
+            directory that receives one PNG per frame (frame_000000.png, ...).
+        width (int): The frame width. Default is 800.
+        height (int): The frame height. Default is 600.
+        noise (float): The fraction of pixels covered by noise in each frame. Default is 0.02.
+        step (int): Cells revealed per frame. Default is 1.
+        fps (int): The GIF frame rate. Default is 30.
+        max_workers (int, optional): Worker processes. Default is the CPU count; 1 renders in-process.
+        noise_seed (int): Seed of the noise. Default is 0.
+
+    Returns:
+        List[str]: The written files, in frame order.
+
+    Raises:
+        ValueError: If step or fps is not positive.
+        ImportError: If a GIF is requested and Pillow is not installed.
+    """
+    if step < 1 or fps < 1:
+        raise ValueError("step and fps must be positive.")
+    gif = output.lower().endswith('.gif')
+    if gif:
+        try:
+            from PIL import Image  # noqa: F401
+        except ImportError as e:
+            raise ImportError("GIF export requires Pillow (pip install Pillow); "
+                              "export PNG frames to a directory instead.") from e
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    frames = max(1, -(-grid.size // step))
+    workers = max(1, min(max_workers or os.cpu_count() or 1, frames))
+    span = -(-frames // (workers * TASKS_PER_WORKER)) if workers > 1 else frames
+    ranges = [(start, min(start + span, frames)) for start in range(0, frames, span)]
+    arguments = (grid, key, width, height, noise, noise_seed, step)
+    directory = None if gif else output
+
+    if workers == 1:
+        chunks = [_render_range(*arguments, start, stop, directory) for start, stop in ranges]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_render_range, *arguments, start, stop, directory) for start, stop in ranges]
+            chunks = [future.result() for future in futures]
+
+    results = [item for chunk in chunks for item in chunk]
+    if not gif:
+        return results
+    results[0].save(output, save_all=True, append_images=results[1:], duration=round(1000 / fps), loop=0)
+    return [output]
@@ -2,8 +2,15 @@ import numpy as np
 from pythreejs import *
 from IPython.display import display
 import hashlib
-from .grid import Matrix
-from .utils import permute_grid
+import time
+from .grid import hex_ring_cells
+from .utils import permutation_indices
+
+# All hexagons share one merged BufferGeometry (a centre vertex and six corners per cell), so
+# an animation step is a single bulk update of the position buffer instead of one widget per cell.
+HEX_VERTICES = 7
+ANIMATION_STEPS = 30
+FRAME_SECONDS = 1 / 30
 
 def coords_to_hex(x, y, z, size):
     """
@@ -11,57 +18,94 @@ def coords_to_hex(x, y, z, size):
     """
     return [(x * size * 3/2, (y - z) * size * np.sqrt(3)/2, 0)]
 
-def create_3d_grid(size, hex_size):
+def cells_to_positions(cells: np.ndarray, size: float) -> np.ndarray:
     """
-    Create a 3D hexagonal grid as a list of meshes.
+    Convert an array of cube coordinates to the centres of their hexagons, like `coords_to_hex`.
     """
-    hexagons = []
-
-    for x in range(-size, size + 1):
-        for y in range(-size, size + 1):
-            for z in range(-size, size + 1):
-                if x + y + z == 0:
-                    hex_pos = coords_to_hex(x, y, z, hex_size)
-                    hex_geometry = CircleGeometry(radius=hex_size, radiusTop=1, radiusBottom=1, height=1, radialSegments=6)
-                    hex_color = 'green'
-                    hex_material = MeshLambertMaterial(color=hex_color)
-                    hexagon = Mesh(geometry=hex_geometry, material=hex_material, position=hex_pos)
-                    hexagons.append(hexagon)
-
-    return hexagons
-
-def permute_3d_grid(grid, key, size):
+    positions = np.zeros((len(cells), 3), dtype=np.float32)
+    positions[:, 0] = cells[:, 0] * size * 3/2
+    positions[:, 1] = (cells[:, 1] - cells[:, 2]) * size * np.sqrt(3)/2
+    return positions
+
+def _hexagon_template(size: float) -> np.ndarray:
+    # The centre and the six corners of a flat-topped hexagon around the origin
+    angles = np.radians(np.arange(0, 360, 60))
+    template = np.zeros((HEX_VERTICES, 3), dtype=np.float32)
+    template[1:, 0] = size * np.cos(angles)
+    template[1:, 1] = size * np.sin(angles)
+    return template
+
+def _hexagon_faces(count: int) -> np.ndarray:
+    # Six triangles fanning out from the centre of every hexagon
+    corner = np.arange(6)
+    fan = np.stack([np.zeros(6, dtype=int), corner + 1, (corner + 1) % 6 + 1], axis=1).ravel()
+    return (np.arange(count)[:, None] * HEX_VERTICES + fan).astype(np.uint32).ravel()
+
+def merged_vertices(centres: np.ndarray, template: np.ndarray) -> np.ndarray:
     """
-    Permute the hexagonal grid using a key in 3D.
+    Place the hexagon template at every centre, as one flat vertex array.
     """
-    # Convert grid to a 2D numpy array
-    matrix = Matrix(grid)
-    flat_grid = matrix.flat
-    permuted_grid = permute_grid(flat_grid, key)
-
-    permuted_3d_grid = np.array(permuted_grid).reshape((size, size, size)).tolist()
+    return (centres[:, None, :] + template[None, :, :]).reshape(-1, 3)
 
-    return permuted_3d_grid
+def create_3d_grid(size, hex_size):
+    """
+    Create a 3D hexagonal grid as a single mesh holding every cell, in ring order.
+    """
+    cells = hex_ring_cells(size)
+    template = _hexagon_template(hex_size)
+
+    # Shade the cells by their original ring order, so their movement can be followed
+    shade = np.linspace(1.0, 0.35, len(cells), dtype=np.float32)
+    colors = np.zeros((len(cells), HEX_VERTICES, 3), dtype=np.float32)
+    colors[:, :, 1] = shade[:, None]
+
+    normals = np.zeros((len(cells) * HEX_VERTICES, 3), dtype=np.float32)
+    normals[:, 2] = 1
+
+    geometry = BufferGeometry(
+        index=BufferAttribute(array=_hexagon_faces(len(cells)), normalized=False),
+        attributes={
+            'position': BufferAttribute(array=merged_vertices(cells_to_positions(cells, hex_size), template),
+                                        normalized=False),
+            'normal': BufferAttribute(array=normals, normalized=False),
+            'color': BufferAttribute(array=colors.reshape(-1, 3), normalized=False),
+        })
+    material = MeshLambertMaterial(vertexColors='VertexColors', side='DoubleSide')
+    return Mesh(geometry=geometry, material=material)
+
+def permute_3d_grid(cells, key):
+    """
+    Permute the cube coordinates of a hexagonal grid using a key: cell i moves to the
+    position of cell perm[i].
+    """
+    return cells[permutation_indices(len(cells), key)]
 
-def animate_permutation_3d(size=3, key="mysecretkey"):
+def animate_permutation_3d(size=3, key="mysecretkey", steps=ANIMATION_STEPS, frame_seconds=FRAME_SECONDS):
     """
     Animate the 3D permutation process of a hexagonal grid using pythreejs.
+
+    Every cell moves towards its permuted position at once; each step rewrites the shared
+    position buffer in one update.
     """
-    # Convert the key to bytes and create a random number generator
-    aes_key = hashlib.sha256(key.encode()).digest()
+    # Accept a text key or an already derived key
+    aes_key = key if isinstance(key, bytes) else hashlib.sha256(key.encode()).digest()
 
     # Create the 3D grid
     hex_size = 0.5
     grid = create_3d_grid(size, hex_size)
+    cells = hex_ring_cells(size)
+    scale = max(1, size / 3)
 
     # Create scene and add hexagons
     scene = Scene(children=[
-        Mesh(geometry=PlaneGeometry(1000, 1000), material=MeshBasicMaterial(color='lightblue'), position=[0, 0, -0.01]),
-        AmbientLight(color='#777777')
-    ] + grid)
+        Mesh(geometry=PlaneGeometry(1000 * scale, 1000 * scale), material=MeshBasicMaterial(color='lightblue'),
+             position=[0, 0, -0.01]),
+        AmbientLight(color='#777777'),
+        grid
+    ])
 
-    # Setup camera
-    camera = PerspectiveCamera(position=[0, 5, 10], up=[0, 0, 1], children=[
+    # Setup camera, backed off far enough to see the whole grid
+    camera = PerspectiveCamera(position=[0, 5 * scale, 10 * scale], up=[0, 0, 1], far=2000 * scale, children=[
         DirectionalLight(color='white', position=[3, 5, 1], intensity=0.6)
     ])
     camera.lookAt([0, 0, 0])
@@ -72,14 +116,15 @@ def animate_permutation_3d(size=3, key="mysecretkey"):
     # Display the 3D grid
     display(renderer)
 
-    permuted_grid = permute_3d_grid(grid, aes_key, size)
-
-    for hexagon, pos in zip(grid, permuted_grid):
-        # Animate individual hexagons to their new permuted positions
-        hexagon.position = coords_to_hex(*pos, hex_size)
+    template = _hexagon_template(hex_size)
+    start = cells_to_positions(cells, hex_size)
+    end = cells_to_positions(permute_3d_grid(cells, aes_key), hex_size)
+    position = grid.geometry.attributes['position']
 
-        # Refresh the renderer
-        renderer.render()
+    for step in range(1, steps + 1):
+        # Move every hexagon part of the way with one buffer update; the widget re-renders on change
+        position.array = merged_vertices(start + (end - start) * (step / steps), template)
+        time.sleep(frame_seconds)
 
 # Main function to start the visualization process
 if __name__ == "__main__":
@@ -2,7 +2,7 @@ from setuptools import setup, find_packages
 
 setup(
     name="Hexagonal-Permutation-Cipher",  # Full package name
-    version="1.0.0",  # Version of the package
+    version="1.1.0",  # Version of the package
     description="A tool for encrypting and decrypting text using a hexagonal permutation cipher combined with AES encryption.",
     author="Joseph Webster Colby",
     author_email="rwc.webster@gmail.com",
@@ -15,6 +15,9 @@ setup(
         "pygame",
         "pythreejs"
     ],
+    extras_require={
+        "gif": ["Pillow"],  # Animated GIF export of the visualization
+    },
     entry_points={
         "console_scripts": [
             "hpc=hexagonal_permutation_cipher.__main__:main",  # Create a console script entry point for "hpc"
@@ -26,5 +29,5 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )
\ No newline at end of file
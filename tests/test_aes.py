@@ -0,0 +1,67 @@
+import os
+import pytest
+from hexagonal_permutation_cipher import encrypt_bytes, decrypt_range, CipherReader
+from hexagonal_permutation_cipher.aes import aes_encrypt, aes_decrypt, aes_decrypt_chunks, encrypted_size
+from hexagonal_permutation_cipher.benchmark import overhead_report
+
+KEY = os.urandom(32)
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ctr', 'gcm'])
+@pytest.mark.parametrize('chunk_size', [16, 256, 4096])
+@pytest.mark.parametrize('length', [0, 1, 255, 256, 10000])
+def test_round_trip(mode, chunk_size, length):
+    data = os.urandom(length)
+    encrypted = aes_encrypt(data, KEY, chunk_size, mode)
+    assert len(encrypted) == encrypted_size(length, chunk_size, mode)
+    assert aes_decrypt(encrypted, KEY, chunk_size, mode) == data
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ctr', 'gcm'])
+def test_nonces_differ_per_message(mode):
+    data = bytes(1000)
+    assert aes_encrypt(data, KEY, 256, mode) != aes_encrypt(data, KEY, 256, mode)
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ctr', 'gcm'])
+def test_decrypt_selected_chunks(mode):
+    data = os.urandom(5000)
+    encrypted = aes_encrypt(data, KEY, 256, mode)
+    chunks = aes_decrypt_chunks(encrypted, KEY, [0, 7, 19], len(data), 256, mode)
+    assert chunks == [data[0:256], data[7 * 256:8 * 256], data[19 * 256:]]
+
+
+def test_gcm_detects_modified_chunk():
+    encrypted = bytearray(aes_encrypt(os.urandom(1000), KEY, 256, 'gcm'))
+    encrypted[-100] ^= 0x80
+    with pytest.raises(ValueError):
+        aes_decrypt(bytes(encrypted), KEY, 256, 'gcm')
+
+
+def test_gcm_detects_dropped_chunks():
+    encrypted = aes_encrypt(os.urandom(1000), KEY, 256, 'gcm')
+    last_chunk = 1000 % 256 + 16
+    with pytest.raises(ValueError):
+        aes_decrypt(encrypted[:-last_chunk], KEY, 256, 'gcm')
+    with pytest.raises(ValueError):
+        aes_decrypt(encrypted[:-last_chunk - 256 - 16], KEY, 256, 'gcm')
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ctr', 'gcm'])
+@pytest.mark.parametrize('permutation', ['table', 'feistel'])
+def test_random_access(mode, permutation):
+    data = os.urandom(20000)
+    encrypted = encrypt_bytes(data, "test-key", container=True, mode=mode, chunk_size=1024,
+                              permutation=permutation)
+    assert decrypt_range(encrypted, "test-key", 12345, 600) == data[12345:12945]
+    reader = CipherReader(encrypted, "test-key")
+    reader.seek(-10, os.SEEK_END)
+    assert reader.read() == data[-10:]
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ctr', 'gcm'])
+def test_overhead_report_matches_encrypt_bytes(mode):
+    for row in overhead_report([100, 100000], mode):
+        encrypted = encrypt_bytes(os.urandom(row['length']), "test-key", container=True, mode=mode,
+                                  layout=row['layout'])
+        assert row['ciphertext_bytes'] == len(encrypted)
@@ -0,0 +1,76 @@
+import asyncio
+import concurrent.futures
+import pytest
+from hexagonal_permutation_cipher import (encrypt, decrypt, encrypt_async, decrypt_async, encrypt_bytes_async,
+                                          decrypt_bytes_async)
+from hexagonal_permutation_cipher.aio import set_async_executor, SMALL_REQUEST_BYTES
+
+KEY = "test-key"
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.jobs = 0
+
+    def submit(self, *args, **kwargs):
+        self.jobs += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.fixture
+def executor():
+    executor = CountingExecutor()
+    set_async_executor(executor)
+    yield executor
+    set_async_executor(None)
+    executor.shutdown()
+
+
+def test_batched_requests_resolve_in_order(executor):
+    texts = [f"message {index}" for index in range(100)]
+
+    async def run():
+        encrypted = await asyncio.gather(*(encrypt_async(text, KEY) for text in texts))
+        return encrypted, await asyncio.gather(*(decrypt_async(text, KEY) for text in encrypted))
+
+    encrypted, decrypted = asyncio.run(run())
+    assert decrypted == texts
+    assert [decrypt(text, KEY) for text in encrypted] == texts
+    assert executor.jobs < len(texts)  # Concurrent small requests shared executor jobs
+
+
+def test_bad_request_fails_alone(executor):
+    requests = [encrypt(f"message {index}", KEY) for index in range(10)]
+    requests[4] = "not base64!!"
+
+    async def run():
+        return await asyncio.gather(*(decrypt_async(text, KEY) for text in requests), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert isinstance(results[4], ValueError)
+    assert results[:4] + results[5:] == [f"message {index}" for index in range(10) if index != 4]
+
+
+def test_large_requests_bypass_the_batch(executor):
+    data = bytes(range(256)) * (SMALL_REQUEST_BYTES // 256 + 1)
+
+    async def run():
+        encrypted = await encrypt_bytes_async(data, KEY, container=True)
+        return await decrypt_bytes_async(encrypted, KEY)
+
+    assert asyncio.run(run()) == data
+    assert executor.jobs == 2
+
+
+def test_executor_failure_reaches_every_request():
+    broken = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    broken.shutdown()
+    set_async_executor(broken)
+    try:
+        async def run():
+            return await asyncio.gather(*(encrypt_async("text", KEY) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    finally:
+        set_async_executor(None)
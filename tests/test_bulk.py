@@ -0,0 +1,22 @@
+import concurrent.futures
+import pytest
+from hexagonal_permutation_cipher import encrypt, encrypt_many, decrypt_many
+
+KEY = "test-key"
+
+
+def test_round_trip_in_order():
+    texts = [f"record {index}" for index in range(100)]
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        assert list(decrypt_many(encrypt_many(texts, KEY, executor=executor), KEY, executor=executor)) == texts
+
+
+def test_bad_record_stops_exactly_at_its_position():
+    records = [encrypt(f"record {index}", KEY) for index in range(100)]
+    records[37] = "not base64!!"
+    decrypted = []
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        with pytest.raises(ValueError):
+            for text in decrypt_many(records, KEY, executor=executor):
+                decrypted.append(text)
+    assert decrypted == [f"record {index}" for index in range(37)]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from hexagonal_permutation_cipher import encrypt_bytes, configure_cache, cache_stats, clear_cache
+from hexagonal_permutation_cipher.cache import LRUCache, CacheStats, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES
+
+
+def array(nbytes):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_hits_misses_and_recency():
+    cache = LRUCache(max_entries=2)
+    assert cache.get_or_create('a', lambda: array(1)) is cache.get_or_create('a', lambda: array(1))
+    cache.get_or_create('b', lambda: array(1))
+    cache.get_or_create('a', lambda: array(1))  # 'b' is now the least recently used
+    cache.get_or_create('c', lambda: array(1))
+    assert cache.stats() == CacheStats(hits=2, misses=3, evictions=1, entries=2, bytes=2)
+    cache.get_or_create('a', lambda: array(1))
+    cache.get_or_create('b', lambda: array(1))
+    assert cache.stats().misses == 4  # 'b' was evicted, 'a' was kept
+
+
+def test_eviction_by_byte_budget():
+    cache = LRUCache(max_entries=100, max_bytes=100)
+    for key in range(4):
+        cache.get_or_create(key, lambda: array(30))
+    assert cache.stats() == CacheStats(hits=0, misses=4, evictions=1, entries=3, bytes=90)
+    # Values larger than the whole budget are returned but never stored
+    cache.get_or_create('huge', lambda: array(101))
+    assert cache.stats().entries == 3
+    cache.get_or_create('pair', lambda: (array(50), array(50)))
+    assert cache.stats() == CacheStats(hits=0, misses=6, evictions=4, entries=1, bytes=100)
+
+
+def test_configure_shrinks_and_disables():
+    cache = LRUCache()
+    for key in range(5):
+        cache.get_or_create(key, lambda: array(10))
+    cache.configure(max_entries=2)
+    assert cache.stats()[2:] == (3, 2, 20)
+    cache.configure(enabled=False)
+    cache.get_or_create('x', lambda: array(10))
+    assert cache.stats()[3:] == (0, 0)
+    cache.clear()
+    assert cache.stats() == CacheStats(0, 0, 0, 0, 0)
+
+
+@pytest.fixture
+def shared_cache():
+    clear_cache()
+    yield
+    configure_cache(DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES, enabled=True)
+    clear_cache()
+
+
+def test_shared_cache_counts_permutation_tables(shared_cache):
+    encrypt_bytes(b'payload', "test-key", container=True)
+    first = cache_stats()
+    encrypt_bytes(b'payload', "test-key", container=True)
+    second = cache_stats()
+    assert first.misses > 0 and first.entries > 0 and first.bytes > 0
+    assert second.hits > first.hits and second.misses == first.misses
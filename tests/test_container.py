@@ -0,0 +1,120 @@
+import pytest
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+from hexagonal_permutation_cipher import (encrypt, decrypt, encrypt_bytes, decrypt_bytes, is_container, parse_header,
+                                          check_container, HexCipher)
+from hexagonal_permutation_cipher.aes import aes_decrypt
+from hexagonal_permutation_cipher.container import HEADER, CONTAINER_MAGIC, CONTAINER_VERSION, FLAG_FEISTEL
+from hexagonal_permutation_cipher.encryption import (derive_key, pad_payload, encrypt_payloads, decrypt_payloads,
+                                                     encrypt_text_payloads, decrypt_text_payloads)
+
+KEY = "test-key"
+
+# "Hello, World!" encrypted with the key "k" by 1.0.0
+LEGACY_CIPHERTEXT = "cEMtBASCYpj8ZBIKs1vvOJu5slPm/4DZk+MT8zVnlNrZx34TMrnVVC/6AmGOcmjETlu5rrLa6GsB7d4M1ggi4w=="
+
+PAYLOADS = [b'', b'a', b'ab  ', b'\x00' * 17, bytes(range(256)) * 7, b' trailing and leading ']
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ctr', 'gcm'])
+@pytest.mark.parametrize('layout', ['rect', 'dense', 'partial'])
+@pytest.mark.parametrize('permutation', ['table', 'feistel'])
+def test_container_round_trip(mode, layout, permutation):
+    for data in PAYLOADS:
+        encrypted = encrypt_bytes(data, KEY, container=True, mode=mode, layout=layout, permutation=permutation)
+        assert is_container(encrypted)
+        assert parse_header(encrypted).length == len(data)
+        assert decrypt_bytes(encrypted, KEY) == data
+
+
+def test_text_round_trip_is_exact():
+    for text in ["Hello, World!", "  padded  ", "héllo wörld ☃", ""]:
+        assert decrypt(encrypt(text, KEY, container=True), KEY) == text
+
+
+def test_default_is_the_headerless_format():
+    assert not is_container(encrypt_bytes(b'data', KEY))
+    assert decrypt(encrypt("Hello, World!", KEY), KEY) == "Hello, World!"
+    assert not is_container(HexCipher(KEY).encrypt_bytes(b'data'))
+
+
+def test_headerless_format_strips_padding():
+    encrypted = encrypt_bytes(b'ab  ', KEY)
+    assert not is_container(encrypted)
+    assert decrypt_bytes(encrypted, KEY) == b'ab'
+    assert decrypt(encrypt("ab  ", KEY), KEY) == "ab"
+
+
+def test_headerless_format_is_not_permuted():
+    data = bytes(range(40))
+    encrypted = encrypt_bytes(data, KEY)
+    assert aes_decrypt(encrypted, derive_key(KEY)) == pad_payload(data).tobytes()
+
+
+def test_legacy_ciphertext_decrypts():
+    assert decrypt(LEGACY_CIPHERTEXT, "k") == "Hello, World!"
+
+
+def test_headerless_ciphertext_starting_with_magic_falls_back():
+    # Build a headerless ciphertext whose first IV happens to spell the container magic
+    aes_key = derive_key(KEY)
+    padded = pad_payload(b'lucky ciphertext').tobytes()
+    iv = CONTAINER_MAGIC + bytes([CONTAINER_VERSION]) + bytes(12)
+    encrypted = iv + AES.new(aes_key, AES.MODE_CBC, iv).encrypt(pad(padded, 16))
+    assert is_container(encrypted)
+    with pytest.raises(ValueError):
+        check_container(encrypted)
+    assert decrypt_bytes(encrypted, KEY) == b'lucky ciphertext'
+
+
+def test_corrupt_container_reports_the_container_error():
+    encrypted = encrypt_bytes(b'some data', KEY, container=True)
+    with pytest.raises(ValueError, match="Corrupt container"):
+        decrypt_bytes(encrypted[:-1], KEY)
+    bad_mode = bytearray(encrypted)
+    bad_mode[4] = 9
+    with pytest.raises(ValueError, match="Unsupported container options"):
+        decrypt_bytes(bytes(bad_mode), KEY)
+
+
+@pytest.mark.parametrize('position', [HEADER.size + 20, -1])
+def test_gcm_detects_tampering(position):
+    encrypted = bytearray(encrypt_bytes(b'authenticated payload' * 10, KEY, container=True, mode='gcm'))
+    encrypted[position] ^= 0x01
+    with pytest.raises(ValueError):
+        decrypt_bytes(bytes(encrypted), KEY)
+
+
+def test_wrong_key_fails():
+    with pytest.raises(ValueError):
+        decrypt_bytes(encrypt_bytes(b'secret', KEY, container=True, mode='gcm'), "other-key")
+
+
+def test_batch_matches_single_messages():
+    aes_key = derive_key(KEY)
+    containers = encrypt_payloads(PAYLOADS, aes_key, container=True, mode='gcm', layout='dense')
+    headerless = encrypt_payloads(PAYLOADS, aes_key)
+    decrypted = decrypt_payloads(containers + headerless, aes_key)
+    assert decrypted[:len(PAYLOADS)] == PAYLOADS
+    assert decrypted[len(PAYLOADS):] == [data.rstrip(b' ') for data in PAYLOADS]
+
+    texts = ["one ", "two", ""]
+    assert decrypt_text_payloads(encrypt_text_payloads(texts, aes_key, container=True), aes_key) == texts
+
+
+def test_hex_cipher_validates_options():
+    with pytest.raises(ValueError):
+        HexCipher(KEY, mode='ecb')
+    with pytest.raises(ValueError):
+        HexCipher(KEY, layout='dense')
+    cipher = HexCipher(KEY, container=True, mode='ctr', layout='partial')
+    assert cipher.decrypt_bytes(cipher.encrypt_bytes(b'ab  ')) == b'ab  '
+
+
+@pytest.mark.parametrize('offset, value', [(HEADER.size - 1, 14), (5, FLAG_FEISTEL)])
+def test_gcm_authenticates_the_header(offset, value):
+    # Headers that still validate: a shorter recorded length, or another permutation engine
+    encrypted = bytearray(encrypt_bytes(b'transfer 1000 coins', KEY, container=True, mode='gcm'))
+    encrypted[offset] = value
+    with pytest.raises(ValueError):
+        decrypt_bytes(bytes(encrypted), KEY)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from hexagonal_permutation_cipher import FeistelPermutation, encrypt_bytes, decrypt_bytes, decrypt_range
+from hexagonal_permutation_cipher import feistel
+from hexagonal_permutation_cipher.feistel import permute_blocks, unpermute_blocks
+
+KEY = b'k' * 32
+
+
+@pytest.mark.parametrize('cells', [0, 1, 2, 3, 7, 64, 1000, 4097])
+def test_bijection_and_inverse(cells):
+    permutation = FeistelPermutation(cells, KEY)
+    forward = permutation.indices()
+    assert forward.dtype == np.int64
+    assert np.array_equal(np.sort(forward), np.arange(cells))
+    assert np.array_equal(permutation.inverse(forward), np.arange(cells))
+    assert np.array_equal(permutation.forward(permutation.inverse(np.arange(cells))), np.arange(cells))
+
+
+def test_indices_match_forward():
+    permutation = FeistelPermutation(1000, KEY)
+    full = permutation.forward(np.arange(1000))
+    for start, stop in [(0, 1), (10, 20), (999, 1000), (0, 1000), (500, 500)]:
+        assert np.array_equal(permutation.indices(start, stop), full[start:stop])
+
+
+def test_depends_on_key_and_cell_count():
+    forward = FeistelPermutation(1000, KEY).indices()
+    assert not np.array_equal(forward, FeistelPermutation(1000, b'j' * 32).indices())
+    assert not np.array_equal(forward[:999], FeistelPermutation(999, KEY).indices())
+    assert np.array_equal(forward, FeistelPermutation(1000, KEY).indices())
+    with pytest.raises(ValueError):
+        FeistelPermutation(-1, KEY)
+
+
+def test_blocks_round_trip(monkeypatch):
+    monkeypatch.setattr(feistel, 'BLOCK_CELLS', 100)  # Several blocks, the last one short
+    payload = np.frombuffer(bytes(range(256)) * 4, dtype=np.uint8)[:1001]
+    permutation = FeistelPermutation(len(payload), KEY)
+    permuted = permute_blocks(payload, permutation)
+    assert np.array_equal(permuted, payload[permutation.indices()])
+    assert np.array_equal(unpermute_blocks(permuted, permutation), payload)
+
+
+@pytest.mark.parametrize('layout', ['rect', 'dense', 'partial'])
+def test_container_round_trip(layout):
+    data = bytes(range(256)) * 40 + b'  '
+    encrypted = encrypt_bytes(data, "test-key", container=True, layout=layout, permutation='feistel')
+    assert decrypt_bytes(encrypted, "test-key") == data
+    assert decrypt_range(encrypted, "test-key", 5000, 300) == data[5000:5300]
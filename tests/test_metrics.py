@@ -0,0 +1,76 @@
+import pytest
+from hexagonal_permutation_cipher import (encrypt_bytes, decrypt_bytes, enable_metrics, metrics_enabled,
+                                          metrics_snapshot, reset_metrics, prometheus_text, add_metrics_listener,
+                                          remove_metrics_listener)
+from hexagonal_permutation_cipher import metrics
+
+KEY = "test-key"
+
+
+@pytest.fixture
+def enabled():
+    reset_metrics()
+    enable_metrics()
+    yield
+    enable_metrics(False)
+    reset_metrics()
+
+
+def test_disabled_metrics_stay_zero():
+    reset_metrics()
+    assert not metrics_enabled()
+    assert metrics.stage('aes') is metrics.stage('permutation')  # The shared no-op timer
+    decrypt_bytes(encrypt_bytes(b'payload', KEY, container=True), KEY)
+    snapshot = metrics_snapshot()
+    assert snapshot.stages == {} and snapshot.counters == {} and snapshot.gauges == {}
+
+
+def test_stages_and_counters(enabled):
+    data = b'x' * 1000
+    decrypt_bytes(encrypt_bytes(data, KEY, container=True), KEY)
+    snapshot = metrics_snapshot()
+    assert snapshot.counters['encrypt_input_bytes'] == len(data)
+    for name in ('key_derivation', 'permutation', 'aes'):
+        timings = snapshot.stages[name]
+        assert timings.calls >= 1 and 0 <= timings.max_seconds <= timings.total_seconds
+
+    metrics.count('custom', 2)
+    metrics.count('custom')
+    metrics.adjust_gauge('depth', 3)
+    metrics.adjust_gauge('depth', -1)
+    snapshot = metrics_snapshot()
+    assert snapshot.counters['custom'] == 3 and snapshot.gauges['depth'] == 2
+
+    reset_metrics()
+    assert metrics_snapshot().counters == {}
+
+
+def test_listeners(enabled):
+    updates = []
+    listener = lambda *update: updates.append(update)  # noqa: E731
+    add_metrics_listener(listener)
+    metrics.count('custom', 5)
+    with metrics.stage('work'):
+        pass
+    remove_metrics_listener(listener)
+    metrics.count('custom')
+    assert updates[0] == ('counter', 'custom', 5)
+    assert updates[1][:2] == ('stage', 'work') and len(updates) == 2
+
+
+def test_prometheus_text(enabled):
+    with metrics.stage('a"b'):
+        pass
+    metrics.count('encrypt_input_bytes', 42)
+    metrics.adjust_gauge('pool_queue_depth', 1)
+    text = prometheus_text(prefix='test')
+    lines = text.splitlines()
+    assert text.endswith('\n')
+    assert '# TYPE test_stage_seconds_total counter' in lines
+    assert 'test_stage_calls_total{stage="a\\"b"} 1' in lines
+    assert '# TYPE test_encrypt_input_bytes_total counter' in lines
+    assert 'test_encrypt_input_bytes_total 42' in lines
+    assert '# TYPE test_pool_queue_depth gauge' in lines and 'test_pool_queue_depth 1' in lines
+    assert any(line.startswith('test_cache_hits_total ') for line in lines)
+    for line in lines:
+        assert line.startswith('# HELP test_') or line.startswith('# TYPE test_') or line.startswith('test_')
@@ -0,0 +1,39 @@
+import numpy as np
+from hexagonal_permutation_cipher.store import PermutationStore, MAX_CELLS
+
+KEY = b'k' * 32
+CELLS = 1000
+
+
+def build():
+    return np.random.default_rng(0).permutation(CELLS)
+
+
+def test_tables_are_stored_and_loaded(tmp_path):
+    store = PermutationStore(str(tmp_path), min_cells=0)
+    table = store.get_or_create('permutation', KEY, CELLS, build)
+    assert table.dtype == np.int32 and np.array_equal(table, build())
+    assert np.array_equal(store.get_or_create('inverse', KEY, CELLS, build), table)
+    assert np.array_equal(store.get_or_create('permutation', KEY, CELLS, build), table)
+    assert store.stats()[:2] == (1, 2)
+
+
+def test_checksum_is_checked_once_per_process(tmp_path):
+    store = PermutationStore(str(tmp_path), min_cells=0)
+    store.get_or_create('permutation', KEY, CELLS, build)
+    sidecar = next(tmp_path.glob('*.sha256'))
+    sidecar.write_text('0' * 64)
+    store.get_or_create('permutation', KEY, CELLS, build)
+    assert store.stats().corrupt == 0
+
+    # A fresh store, like another process, checks the table and rebuilds it
+    other = PermutationStore(str(tmp_path), min_cells=0)
+    assert np.array_equal(other.get_or_create('permutation', KEY, CELLS, build), build())
+    assert other.stats().corrupt == 1
+
+
+def test_oversized_grids_bypass_the_store(tmp_path):
+    store = PermutationStore(str(tmp_path), min_cells=0)
+    table = np.arange(4, dtype=np.int64)
+    assert store.get_or_create('permutation', KEY, MAX_CELLS + 1, lambda: table) is table
+    assert store.stats().files == 0
@@ -0,0 +1,115 @@
+import io
+import os
+import pytest
+from hexagonal_permutation_cipher import (encrypt_blocks, decrypt_blocks, encrypt_file, decrypt_file, encrypt_file_mmap,
+                                          decrypt_file_mmap)
+from hexagonal_permutation_cipher.mmap_io import encrypted_file_size
+from hexagonal_permutation_cipher.stream import read_blocks, check_block_size
+
+KEY = "test-key"
+BLOCK_SIZE = 4096
+
+
+@pytest.fixture
+def plaintext_file(tmp_path):
+    path = tmp_path / "plain.bin"
+    path.write_bytes(os.urandom(3 * BLOCK_SIZE + 123) + b'   ')
+    return path
+
+
+@pytest.mark.parametrize('length', [0, 1, BLOCK_SIZE, 2 * BLOCK_SIZE + 7])
+@pytest.mark.parametrize('layout', ['rect', 'dense', 'partial'])
+def test_blocks_round_trip(length, layout):
+    data = os.urandom(length)
+    stream = b''.join(encrypt_blocks(read_blocks(io.BytesIO(data), BLOCK_SIZE), KEY, BLOCK_SIZE, layout))
+    assert len(stream) == encrypted_file_size(length, BLOCK_SIZE, layout)
+    assert b''.join(decrypt_blocks(io.BytesIO(stream), KEY)) == data
+
+
+@pytest.mark.parametrize('encrypt', [encrypt_file, encrypt_file_mmap])
+@pytest.mark.parametrize('decrypt', [decrypt_file, decrypt_file_mmap])
+@pytest.mark.parametrize('layout', ['rect', 'partial'])
+def test_file_round_trip(tmp_path, plaintext_file, encrypt, decrypt, layout):
+    encrypted, decrypted = tmp_path / "data.hpc", tmp_path / "data.out"
+    encrypt(str(plaintext_file), str(encrypted), KEY, BLOCK_SIZE, layout)
+    assert encrypted.stat().st_size == encrypted_file_size(plaintext_file.stat().st_size, BLOCK_SIZE, layout)
+    decrypt(str(encrypted), str(decrypted), KEY)
+    assert decrypted.read_bytes() == plaintext_file.read_bytes()
+
+
+def test_default_layout_adds_no_padding():
+    # Only the stream and frame headers and the CBC IVs and padding remain
+    assert encrypted_file_size(3000000) < 3000000 * 1.15
+    assert encrypted_file_size(3000000, layout='rect') > 3000000 * 2
+
+
+def test_stream_and_mmap_formats_match(tmp_path, plaintext_file):
+    streamed, mapped = tmp_path / "streamed.hpc", tmp_path / "mapped.hpc"
+    encrypt_file(str(plaintext_file), str(streamed), KEY, BLOCK_SIZE)
+    encrypt_file_mmap(str(plaintext_file), str(mapped), KEY, BLOCK_SIZE)
+    assert streamed.stat().st_size == mapped.stat().st_size
+    assert streamed.read_bytes()[:16] == mapped.read_bytes()[:16]
+
+
+@pytest.mark.parametrize('decrypt', [decrypt_file, decrypt_file_mmap])
+def test_truncated_stream_is_rejected(tmp_path, plaintext_file, decrypt):
+    encrypted = tmp_path / "data.hpc"
+    encrypt_file(str(plaintext_file), str(encrypted), KEY, BLOCK_SIZE)
+    truncated = tmp_path / "truncated.hpc"
+    truncated.write_bytes(encrypted.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        decrypt(str(truncated), str(tmp_path / "data.out"), KEY)
+
+
+def test_bad_header_is_rejected():
+    with pytest.raises(ValueError, match="bad header"):
+        list(decrypt_blocks(io.BytesIO(b'NOPE' + bytes(16)), KEY))
+    stream = bytearray(b''.join(encrypt_blocks([b'data'], KEY, BLOCK_SIZE)))
+    stream[5] = 0x80  # Unknown layout flag
+    with pytest.raises(ValueError, match="Unsupported stream options"):
+        list(decrypt_blocks(io.BytesIO(bytes(stream)), KEY))
+
+
+def test_mmap_wrong_key_raises_and_removes_output(tmp_path, plaintext_file):
+    encrypted, decrypted = tmp_path / "data.hpc", tmp_path / "data.out"
+    encrypt_file_mmap(str(plaintext_file), str(encrypted), KEY, BLOCK_SIZE)
+    with pytest.raises(ValueError):
+        decrypt_file_mmap(str(encrypted), str(decrypted), "other-key")
+    assert not decrypted.exists()
+
+
+@pytest.mark.parametrize('block_size', [0, -1, 2 ** 32])
+def test_invalid_block_size(tmp_path, plaintext_file, block_size):
+    with pytest.raises(ValueError):
+        list(encrypt_blocks([], KEY, block_size))
+    with pytest.raises(ValueError):
+        encrypt_file(str(plaintext_file), str(tmp_path / "a.hpc"), KEY, block_size)
+    with pytest.raises(ValueError):
+        encrypt_file_mmap(str(plaintext_file), str(tmp_path / "b.hpc"), KEY, block_size)
+    assert not (tmp_path / "a.hpc").exists()
+
+
+@pytest.mark.parametrize('layout, block_size', [('rect', 2 ** 31), ('dense', 2 ** 32 - 1), ('partial', 2 ** 32 - 1)])
+def test_block_size_must_fit_the_frame_header(layout, block_size):
+    # The encrypted block, grown by grid and CBC padding, must fit the 32-bit frame length
+    with pytest.raises(ValueError, match="too large"):
+        check_block_size(block_size, layout)
+    assert check_block_size(2 ** 30, layout) == 2 ** 30
+
+
+def test_mmap_encrypt_failure_removes_output(tmp_path, plaintext_file, monkeypatch):
+    from hexagonal_permutation_cipher import mmap_io
+    calls = []
+
+    def failing_encrypt_into(*args):
+        calls.append(None)
+        if len(calls) == 2:
+            raise ValueError("simulated failure")
+        return original(*args)
+
+    original = mmap_io.aes_encrypt_into
+    monkeypatch.setattr(mmap_io, 'aes_encrypt_into', failing_encrypt_into)
+    encrypted = tmp_path / "data.hpc"
+    with pytest.raises(ValueError, match="simulated"):
+        encrypt_file_mmap(str(plaintext_file), str(encrypted), KEY, BLOCK_SIZE)
+    assert not encrypted.exists()
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+pygame = pytest.importorskip('pygame')
+from hexagonal_permutation_cipher.visualization import export_animation, HEX_COLOR  # noqa: E402
+
+
+def test_export_fits_the_grid_into_the_frame(tmp_path):
+    # A wide grid: unscaled it covers the whole frame, fitted it is a thin strip across the middle
+    grid = np.arange(4 * 200).reshape(4, 200)
+    paths = export_animation(grid, b'key', str(tmp_path), width=200, height=150, noise=0, step=grid.size,
+                             max_workers=1)
+    pixels = pygame.surfarray.pixels3d(pygame.image.load(paths[-1]))
+    hexagons = (pixels == HEX_COLOR).all(axis=2)[:, 1::2]  # Even rows hold the scanlines
+    assert hexagons[:, 30:45].any(axis=1).sum() > 150  # The strip spans the frame width
+    assert not hexagons[:, :25].any() and not hexagons[:, 50:].any()